@@ -18,12 +18,33 @@ class Settings(BaseSettings):
     # 数据库配置
     MONGODB_URL: str = "mongodb://localhost:27017"
     DATABASE_NAME: str = "for_health"
+    # 连接池与传输配置
+    MONGODB_MAX_POOL_SIZE: int = 100  # 每个服务器的最大连接数
+    MONGODB_MIN_POOL_SIZE: int = 0  # 保持的最小空闲连接数
+    MONGODB_MAX_IDLE_TIME_MS: int = 300000  # 空闲连接最长保留时间（毫秒），0 表示不限制
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = 10000  # 连接池耗尽时等待连接的超时（毫秒）
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000  # 服务器选择超时（毫秒）
+    MONGODB_COMPRESSORS: str = ""  # 网络压缩算法，逗号分隔，如 "zstd,snappy,zlib"（zstd 需安装 zstandard，snappy 需安装 python-snappy）
+    MONGODB_READ_PREFERENCE: str = "primary"  # 读偏好：primary / primaryPreferred / secondary / secondaryPreferred / nearest
+    # 请求级数据库耗时统计（Server-Timing 响应头）
+    DB_TIMING_ENABLED: bool = True
+    # Prometheus 指标（/metrics，按路由模块统计请求耗时）
+    METRICS_ENABLED: bool = True
+    # 慢请求采样分析（默认关闭，关闭时不注册中间件）
+    PROFILER_ENABLED: bool = False
+    PROFILER_THRESHOLD_MS: int = 2000  # 超过该耗时的请求保存采样结果
+    PROFILER_INTERVAL_MS: int = 5  # 采样间隔（毫秒）
+    PROFILER_TOKEN: str = ""  # 请求头 X-Profile 携带该值时强制保存采样（为空表示不允许手动触发）
+    PROFILER_OUTPUT_DIR: str = "profiles"  # 采样文件目录（相对于 backend/）
+    PROFILER_RETENTION_COUNT: int = 200  # 最多保留的采样文件数量（至少保留 1 个）
 
     # JWT 配置
     SECRET_KEY: str = "default-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15  # 15分钟 - 短期有效
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30  # 30天 - 长期有效，用于刷新 access token
+    JWT_CLAIMS_CACHE_SIZE: int = 10000  # 已验证 token 声明的缓存条目数（0 表示不缓存）
+    JWT_CLAIMS_CACHE_TTL_SECONDS: int = 300  # 声明缓存的最长保留时间（不会超过 token 自身的过期时间）
 
     # 邮件配置
     SMTP_HOST: str = "smtp.gmail.com"
@@ -40,6 +61,56 @@ class Settings(BaseSettings):
     IMAGE_STORAGE_PATH: str = "uploads"  # 图片存储基础路径（相对于项目根目录），包含 food_images 和 sports_images 等子文件夹
     IMAGE_BASE_URL: str = "/static"  # 图片访问基础URL（相对路径）
 
+    # AI 拍照识别缓存配置（基于图片感知哈希，命中时跳过大模型调用）
+    AI_RECOGNITION_CACHE_ENABLED: bool = True  # 是否启用识别结果缓存（默认按用户隔离）
+    AI_RECOGNITION_CACHE_GLOBAL: bool = False  # 是否允许跨用户共享缓存（全局开关，默认关闭）
+    AI_RECOGNITION_CACHE_MAX_DISTANCE: int = 5  # 判定为同一图片的最大汉明距离（0-7）
+    AI_RECOGNITION_CACHE_TTL_HOURS: int = 72  # 缓存有效期（小时）
+
+    # 按天统计的默认时区（用户资料未设置 timezone 时使用，IANA 名称）
+    DEFAULT_TIMEZONE: str = "Asia/Shanghai"
+    # 启动时把切换前按本地时间保存的记录时间换算为 UTC（只执行一次；若旧客户端发送的本就是 UTC 时间应关闭）
+    LOCAL_TIME_BACKFILL_ENABLED: bool = True
+
+    # 目录类数据缓存（运动类型、食谱分类、食物/食谱详情），写操作时主动失效
+    CATALOG_CACHE_ENABLED: bool = True
+    CATALOG_CACHE_TTL_SECONDS: int = 300  # 兜底过期时间（多 worker 部署时跨进程写入的最大可见延迟）
+    CATALOG_CACHE_MAX_ENTRIES: int = 10000  # 最大缓存条目数
+
+    # 本地食物搜索索引（拼音/首字母/错别字匹配，BM25 排序），进程内维护
+    FOOD_SEARCH_INDEX_ENABLED: bool = True  # 关闭时回退到名称/品牌正则搜索
+    FOOD_SEARCH_INDEX_REFRESH_SECONDS: int = 600  # 定期全量重建（多 worker 部署时其他进程写入的最大可见延迟）
+    FOOD_SEARCH_POPULARITY_LIMIT: int = 500  # 按用户记录次数加权时读取的常吃食物数量
+    FOOD_SEARCH_SKIP_EXTERNAL_MIN_MATCHES: int = 10  # 第一页本地强匹配达到该数量时不再调用薄荷接口（0 表示总是调用）
+
+    # 食物/食谱热度计数（popularity_counters 集合），用于搜索、联想和推荐排序
+    POPULARITY_HALF_LIFE_DAYS: float = 30.0  # 时间衰减半衰期：一次记录的权重每过该天数减半（至少 1 天）
+
+    # 快速记录列表（quick_logs 集合，每个用户一条文档），记录饮食时更新
+    QUICK_LOG_MAX_ITEMS: int = 30  # 每个用户保留的最近不重复食物/食谱数量（0 表示不维护）
+
+    # 首页看板缓存（每日卡路里摘要、每日营养摘要、运动报告），记录变更时按日期失效
+    DASHBOARD_CACHE_ENABLED: bool = True
+    DASHBOARD_CACHE_MAX_USERS: int = 5000  # 最多缓存的用户数（超出按最近最少使用淘汰）
+    DASHBOARD_CACHE_TTL_SECONDS: int = 600  # 兜底过期时间
+
+    # 健康报告异步导出任务（export_jobs 集合 + 进程内 worker）
+    EXPORT_OUTPUT_DIR: str = "exports"  # 导出文件目录（相对于 backend/）
+    EXPORT_WORKER_CONCURRENCY: int = 2  # 每个进程同时执行的导出任务数（0 表示不在本进程执行导出）
+    EXPORT_MAX_ACTIVE_JOBS_PER_USER: int = 2  # 每个用户排队中和执行中的任务数上限
+    EXPORT_MAX_DAYS: int = 3660  # 单个任务最大日期范围（天）
+    EXPORT_BATCH_SIZE: int = 500  # 每批写入文件的行数（同时也是进度更新粒度）
+    EXPORT_POLL_INTERVAL_SECONDS: float = 2.0  # 空闲时轮询新任务的间隔
+    EXPORT_LEASE_SECONDS: int = 300  # 执行中任务超过该时间未更新进度视为 worker 已退出，可被重新领取
+    EXPORT_JOB_RETENTION_HOURS: int = 24  # 完成后导出文件和任务记录的保留时间
+
+    # 启动预热：后台初始化完成后在线程中预先导入较重的可选依赖（cv2/pyzbar、openai）
+    WARM_UP_OPTIONAL_MODULES: bool = True
+
+    # 后台初始化失败重试：从失败的步骤开始按指数退避重试，直到全部完成（/ready 在此期间返回 503）
+    INIT_RETRY_BASE_SECONDS: float = 5.0
+    INIT_RETRY_MAX_SECONDS: float = 300.0
+
     def get_full_image_base_url(self) -> str:
         """获取完整的图片访问基础URL（包含协议和主机）"""
         protocol = "https" if self.PORT == 443 else "http"
@@ -63,6 +134,14 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in v.split(",")]
         return v
 
+    @field_validator("POPULARITY_HALF_LIFE_DAYS")
+    @classmethod
+    def validate_popularity_half_life(cls, v):
+        """半衰期过短时衰减分值增长过快，很快超出浮点数范围"""
+        if v < 1:
+            raise ValueError("POPULARITY_HALF_LIFE_DAYS 不能小于 1 天")
+        return v
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,19 +1,89 @@
+import time
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config import settings
+from app.utils.db_timing import DBCommandListener
 
 # MongoDB 客户端
 client = None
 database = None
 
+# 集合索引声明：(集合名, 索引键, 额外参数)
+INDEXES = [
+    # 食物：按名称精确/批量匹配，按创建者分区后按时间排序
+    ("foods", [("name", 1)], {}),
+    ("foods", [("created_by", 1), ("created_at", -1)], {}),
+    # 食物：条形码查询，薄荷食物缓存按 boohee_id / boohee_code 去重（字段只存在于部分文档）
+    ("foods", [("barcode", 1)], {"sparse": True}),
+    ("foods", [("boohee_id", 1)], {"sparse": True}),
+    ("foods", [("boohee_code", 1)], {"sparse": True}),
+    # 运动类型：初始化与记录时按名称查找，按创建者列出可用运动类型
+    ("sports", [("sport_name", 1)], {}),
+    ("sports", [("created_by", 1), ("sport_name", 1)], {}),
+    # 用户：登录、请求内加载用户、体重同步都按邮箱查找
+    ("users", [("email", 1)], {}),
+    # 食谱：创建时检查重名，按创建者分区后按时间排序（分类列表同样按创建者筛选）
+    ("recipes", [("name", 1)], {}),
+    ("recipes", [("created_by", 1), ("created_at", -1)], {}),
+    # 饮食记录：按用户和记录时间范围查询/聚合；食谱记录按批次查找
+    ("food_records", [("user_email", 1), ("recorded_at", -1)], {}),
+    ("food_records", [("user_email", 1), ("recipe_record_batch_id", 1), ("recorded_at", -1)], {}),
+    # 运动记录：按用户和记录时间范围查询/聚合
+    ("sports_log", [("created_by", 1), ("created_at", -1)], {}),
+    # 体重记录：按用户和记录时间范围查询/聚合
+    ("weight_records", [("user_email", 1), ("recorded_at", -1)], {}),
+    # 拍照识别缓存：按哈希分段预筛选，expires_at 到期自动删除
+    ("food_recognition_cache", [("user_email", 1), ("bands", 1)], {}),
+    ("food_recognition_cache", [("bands", 1)], {}),
+    ("food_recognition_cache", [("expires_at", 1)], {"expireAfterSeconds": 0}),
+    # 趋势变更日志：每个用户每天一条，按用户和日期查找变更
+    ("trend_changes", [("user_email", 1), ("day", 1)], {"unique": True}),
+    # 热度计数：按 (类型, 范围, 条目) 原子累加，按范围读取热门条目
+    ("popularity_counters", [("kind", 1), ("scope", 1), ("item_id", 1)], {"unique": True}),
+    ("popularity_counters", [("kind", 1), ("scope", 1), ("score", -1)], {}),
+    # 快速记录列表：每个用户一条，按用户点查
+    ("quick_logs", [("user_email", 1)], {"unique": True}),
+    # 导出任务：按用户列出/计数，worker 按状态领取最早的任务，按过期时间清理
+    ("export_jobs", [("user_email", 1), ("created_at", -1)], {}),
+    ("export_jobs", [("status", 1), ("created_at", 1)], {}),
+    ("export_jobs", [("expires_at", 1)], {}),
+    # 导出名额：每个用户一条，唯一索引保证名额满时条件 upsert 失败
+    ("export_job_slots", [("user_email", 1)], {"unique": True}),
+]
+
+# 索引创建状态（供 /ready 就绪检查使用）
+_index_state = {
+    "status": "pending",
+    "total": len(INDEXES),
+    "created": 0,
+    "failed": 0,
+}
+
+
+def get_client_options() -> dict:
+    """根据配置生成 MongoDB 客户端参数（连接池、压缩、读偏好、命令监听）"""
+    options = {
+        "serverSelectionTimeoutMS": settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+        "waitQueueTimeoutMS": settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        "readPreference": settings.MONGODB_READ_PREFERENCE,
+    }
+    if settings.MONGODB_MAX_IDLE_TIME_MS > 0:
+        options["maxIdleTimeMS"] = settings.MONGODB_MAX_IDLE_TIME_MS
+    compressors = [c.strip() for c in settings.MONGODB_COMPRESSORS.split(",") if c.strip()]
+    if compressors:
+        # 未安装对应压缩库的算法会被 pymongo 忽略并给出警告
+        options["compressors"] = compressors
+    if settings.DB_TIMING_ENABLED:
+        options["event_listeners"] = [DBCommandListener()]
+    return options
+
 
 async def connect_to_mongo():
     """连接到 MongoDB"""
     global client, database
     try:
-        client = AsyncIOMotorClient(
-            settings.MONGODB_URL,
-            serverSelectionTimeoutMS=5000  # 5秒超时
-        )
+        client = AsyncIOMotorClient(settings.MONGODB_URL, **get_client_options())
         # 测试连接
         await client.admin.command('ping')
         database = client[settings.DATABASE_NAME]
@@ -33,6 +103,42 @@ async def close_mongo_connection():
         print("✅ MongoDB 连接已关闭")
 
 
+async def ensure_indexes():
+    """创建 INDEXES 中声明的索引（幂等，已存在的索引会被跳过）"""
+    db = get_database()
+    _index_state.update(status="building", created=0, failed=0)
+    for collection, keys, options in INDEXES:
+        try:
+            await db[collection].create_index(keys, **options)
+            _index_state["created"] += 1
+        except Exception as e:
+            _index_state["failed"] += 1
+            print(f"⚠️  创建索引失败 {collection} {keys}: {e}")
+    _index_state["status"] = "ready" if _index_state["failed"] == 0 else "degraded"
+
+
+def get_index_state() -> dict:
+    """获取索引创建状态"""
+    return dict(_index_state)
+
+
+async def ping_database() -> float:
+    """
+    Ping MongoDB
+
+    Returns:
+        往返耗时（毫秒）
+
+    Raises:
+        RuntimeError: 数据库未连接
+    """
+    if client is None:
+        raise RuntimeError("数据库未连接")
+    started = time.perf_counter()
+    await client.admin.command("ping")
+    return (time.perf_counter() - started) * 1000
+
+
 def get_database():
     """获取数据库实例"""
     if database is None:
@@ -78,19 +78,60 @@ import json
 import httpx
 import uuid
 import io
+import asyncio
+import hashlib
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Any, Tuple
 from datetime import datetime
 from PIL import Image
+from pymongo import UpdateOne
 from app.utils.image_storage import get_image_url,ALLOWED_IMAGE_EXTENSIONS
 
-async def _download_and_save_food_image(image_url: str, food_name: str) -> Optional[str]:
+# 初始化图片下载的最大并发数（共享同一个 httpx 客户端）
+IMAGE_DOWNLOAD_CONCURRENCY = 8
+
+# 记录各数据集已完成初始化时的校验和，数据集未变化时直接跳过初始化
+INIT_STATE_COLLECTION = "init_state"
+
+
+def _load_dataset(dataset_path: Path) -> Tuple[Any, str]:
+    """
+    读取数据集文件并计算校验和
+
+    Returns:
+        (解析后的数据, 文件内容的 sha256)
+    """
+    raw = dataset_path.read_bytes()
+    return json.loads(raw.decode("utf-8")), hashlib.sha256(raw).hexdigest()
+
+
+async def _is_dataset_initialized(db, dataset_key: str, checksum: str) -> bool:
+    """数据集是否已按当前版本完成初始化"""
+    state = await db[INIT_STATE_COLLECTION].find_one({"_id": dataset_key})
+    return bool(state and state.get("checksum") == checksum)
+
+
+async def _mark_dataset_initialized(db, dataset_key: str, checksum: str, total: int):
+    """全部写入成功后再记录校验和，中途失败时下次启动会继续补齐缺失的数据"""
+    await db[INIT_STATE_COLLECTION].update_one(
+        {"_id": dataset_key},
+        {"$set": {"checksum": checksum, "total": total, "initialized_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+async def _download_and_save_food_image(
+    image_url: str,
+    food_name: str,
+    client: Optional[httpx.AsyncClient] = None,
+) -> Optional[str]:
     """
     从外部URL下载图片并保存到本地文件系统（与init_dataset.py中的逻辑一致）
     
     Args:
         image_url: 外部图片URL
         food_name: 食物名称（用于生成文件名）
+        client: 共享的 httpx 客户端（为空时临时创建）
         
     Returns:
         本地图片访问URL，如果下载失败则返回None
@@ -100,12 +141,15 @@ async def _download_and_save_food_image(image_url: str, food_name: str) -> Optio
     
     try:
         # 下载图片
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        if client is None:
+            async with httpx.AsyncClient(timeout=10.0) as own_client:
+                response = await own_client.get(image_url)
+        else:
             response = await client.get(image_url)
-            if(response.status_code!=200):
-                print("download failed:",response.status_code)
-                return None
-            content = response.content
+        if(response.status_code!=200):
+            print("download failed:",response.status_code)
+            return None
+        content = response.content
         
         # 检查文件大小（10MB限制）
         MAX_FILE_SIZE = 10 * 1024 * 1024
@@ -187,7 +231,13 @@ async def _download_and_save_food_image(image_url: str, food_name: str) -> Optio
 
 
 async def initialize_foods_table():
-    """初始化食物表，从JSON文件加载默认食物数据并下载图片"""
+    """
+    初始化食物表，从JSON文件加载默认食物数据并下载图片
+
+    - 数据集校验和与上次成功初始化时一致则直接跳过
+    - 一次查询取出已存在的公共食物名称，只处理缺失的食物（可断点续跑）
+    - 图片通过共享客户端并发下载，最后一次 bulk_write upsert 写入
+    """
     
     db = get_database()
     
@@ -200,54 +250,92 @@ async def initialize_foods_table():
         return
     
     try:
-        with open(dataset_path, 'r', encoding='utf-8') as f:
-            dataset = json.load(f)
+        dataset, checksum = _load_dataset(dataset_path)
     except Exception:
         return
     
     foods = dataset.get('foods', [])
     if not foods:
         return
+
+    if await _is_dataset_initialized(db, "foods", checksum):
+        print("✅ 食物数据集未变化，跳过初始化")
+        return
+
+    # 一次性取出已存在的公共食物名称
+    existing_names = set(await db["foods"].distinct("name", {"created_by": "all"}))
+    pending = []
+    seen_names = set()
+    for food in foods:
+        food_name = food.get('name', '未命名')
+        if food_name in existing_names or food_name in seen_names:
+            continue
+        seen_names.add(food_name)
+        pending.append(food)
     
     # 添加时间戳
     now = datetime.utcnow()
-    
-    for food in foods:
-        try:
-            food_name = food.get('name', '未命名')
-            original_image_url = food.get('image_url')
-            
-            # 检查是否已存在（通过 name 和 created_by="all"）
-            existing = await db["foods"].find_one({
-                "name": food_name,
-                "created_by": "all"
-            })
-            
-            if existing:
-                continue
-            
-            # 处理图片：如果是外部URL，下载并保存到本地
-            if original_image_url and original_image_url.startswith(("http://", "https://")):
-                local_image_url = await _download_and_save_food_image(original_image_url, food_name)
-                if local_image_url:
-                    food['image_url'] = local_image_url
-                else:
-                    print("图片下载或保存失败，返回为空")
+
+    semaphore = asyncio.Semaphore(IMAGE_DOWNLOAD_CONCURRENCY)
+
+    async def _prepare(food: dict, client: httpx.AsyncClient) -> dict:
+        food = dict(food)
+        food_name = food.get('name', '未命名')
+        original_image_url = food.get('image_url')
+
+        # 处理图片：如果是外部URL，下载并保存到本地
+        if original_image_url and original_image_url.startswith(("http://", "https://")):
+            async with semaphore:
+                local_image_url = await _download_and_save_food_image(original_image_url, food_name, client)
+            if local_image_url:
+                food['image_url'] = local_image_url
             else:
-                print("url不存在或者格式错误")
-            
-            # 添加时间戳
-            food['created_at'] = now
-            food['updated_at'] = now
-            
-            # 确保 created_by 为 "all"（表示所有人可见）
-            food['created_by'] = "all"
-            
-            # 插入食物
-            await db["foods"].insert_one(food)
-            
-        except Exception:
-            pass
+                print("图片下载或保存失败，返回为空")
+        else:
+            print("url不存在或者格式错误")
+
+        food['name'] = food_name
+        # 添加时间戳
+        food['created_at'] = now
+        food['updated_at'] = now
+
+        # 确保 created_by 为 "all"（表示所有人可见）
+        food['created_by'] = "all"
+        return food
+
+    prepared = []
+    if pending:
+        limits = httpx.Limits(
+            max_connections=IMAGE_DOWNLOAD_CONCURRENCY,
+            max_keepalive_connections=IMAGE_DOWNLOAD_CONCURRENCY,
+        )
+        async with httpx.AsyncClient(timeout=10.0, limits=limits) as client:
+            results = await asyncio.gather(
+                *(_prepare(food, client) for food in pending),
+                return_exceptions=True,
+            )
+        prepared = [food for food in results if isinstance(food, dict)]
+
+    try:
+        if prepared:
+            # 按名称 upsert：并发启动或重复执行时也不会插入重复食物
+            await db["foods"].bulk_write(
+                [
+                    UpdateOne(
+                        {"name": food["name"], "created_by": "all"},
+                        {"$setOnInsert": food},
+                        upsert=True,
+                    )
+                    for food in prepared
+                ],
+                ordered=False,
+            )
+    except Exception as e:
+        print(f"⚠ 警告: 写入初始食物数据失败: {e}")
+        return
+
+    if len(prepared) == len(pending):
+        await _mark_dataset_initialized(db, "foods", checksum, len(foods))
 
 
 # 初始化运动表，填入默认运动类型和卡路里消耗
@@ -277,6 +365,7 @@ async def _download_and_save_sport_image(image_url: str, sport_name: str) -> Opt
             content = f.read()
     except:
         print(f"文件读取失败")
+        return None
     
     # 确定文件扩展名
     from urllib.parse import urlparse
@@ -323,6 +412,9 @@ async def _download_and_save_sport_image(image_url: str, sport_name: str) -> Opt
 
 
 async def initialize_sports_table():
+    """
+    初始化运动表（数据集未变化时跳过，缺失的运动一次 bulk_write upsert 写入）
+    """
     
     db = get_database()
 
@@ -336,17 +428,23 @@ async def initialize_sports_table():
         return
     
     try:
-        with open(dataset_path, 'r', encoding='utf-8') as f:
-            dataset = json.load(f)
+        dataset, checksum = _load_dataset(dataset_path)
     except Exception:
         print("""⚠ 警告: 无法加载运动数据集文件，跳过初始化运动表""")
         return
-    
+
+    if await _is_dataset_initialized(db, "sports", checksum):
+        print("✅ 运动数据集未变化，跳过初始化")
+        return
+
+    #一次性取出已存在的运动名称
+    existing_names = set(await db["sports"].distinct("sport_name"))
+    operations = []
     for sport in dataset:
-        #检查是否已存在
-        existing = await db["sports"].find_one({"sport_name": sport["sport_name"]})
-        if existing:
+        if sport["sport_name"] in existing_names:
             continue
+        existing_names.add(sport["sport_name"])
+        sport = dict(sport)
         # 处理图片：将外部URL下载并保存到本地
         if "image_url" in sport:
             local_image_url = await _download_and_save_sport_image(sport["image_url"], sport["sport_name"])
@@ -354,9 +452,176 @@ async def initialize_sports_table():
                 sport["image_url"] = local_image_url
         else:
             sport["image_url"] = ""
-        await db["sports"].insert_one(SportsTypeInDB(**sport).model_dump())
-    
+        operations.append(
+            UpdateOne(
+                {"sport_name": sport["sport_name"]},
+                {"$setOnInsert": SportsTypeInDB(**sport).model_dump()},
+                upsert=True,
+            )
+        )
+
+    try:
+        if operations:
+            await db["sports"].bulk_write(operations, ordered=False)
+    except Exception as e:
+        print(f"⚠ 警告: 写入初始运动数据失败: {e}")
+        return
+
+    await _mark_dataset_initialized(db, "sports", checksum, len(dataset))
+
+
+# 体重同步改为按 weight_recorded_at 条件更新后，为已有用户补齐该字段（只需执行一次）
+WEIGHT_RECORDED_AT_BACKFILL_KEY = "users_weight_recorded_at"
+WEIGHT_RECORDED_AT_BACKFILL_VERSION = "1"
+
+
+async def backfill_weight_recorded_at():
+    """按每个用户最新一条体重记录的时间补齐 users.weight_recorded_at"""
+    db = get_database()
+    if await _is_dataset_initialized(db, WEIGHT_RECORDED_AT_BACKFILL_KEY, WEIGHT_RECORDED_AT_BACKFILL_VERSION):
+        return
+
+    latest = await db["weight_records"].aggregate([
+        {"$group": {"_id": "$user_email", "recorded_at": {"$max": "$recorded_at"}}},
+    ]).to_list(length=None)
+
+    operations = [
+        UpdateOne(
+            {"email": item["_id"], "weight_recorded_at": {"$exists": False}},
+            {"$set": {"weight_recorded_at": item["recorded_at"]}},
+        )
+        for item in latest
+        if item["_id"] and item["recorded_at"]
+    ]
+    if operations:
+        await db["users"].bulk_write(operations, ordered=False)
+
+    await _mark_dataset_initialized(db, WEIGHT_RECORDED_AT_BACKFILL_KEY, WEIGHT_RECORDED_AT_BACKFILL_VERSION, len(operations))
+
+
+# 按用户时区统计后，记录时间统一按 UTC 保存；此前客户端发送的不带时区的本地时间原样入库，
+# 需要按用户时区换算一次（切换时间点之后写入的记录已在写入时换算，不受影响）
+LOCAL_TIME_BACKFILL_KEY = "record_times_local_to_utc"
+LOCAL_TIME_BACKFILL_VERSION = "1"
+# 已换算的记录带此标记，中途失败后重新执行不会重复换算
+LOCAL_TIME_MIGRATED_FIELD = "local_time_migrated"
+# (集合, 用户字段, 时间字段)
+LOCAL_TIME_FIELDS = (
+    ("food_records", "user_email", "recorded_at"),
+    ("weight_records", "user_email", "recorded_at"),
+    ("sports_log", "created_by", "created_at"),
+)
+# 服务端以 utcnow() 生成的时间本来就是 UTC，不能换算：
+# - 时间与 _id 的生成时间相差不超过该毫秒数的记录（如未传 created_at 的运动记录）视为服务端生成
+# - 注册 / 修改个人资料时自动写入的体重记录按备注识别
+SERVER_TIME_TOLERANCE_MS = 60 * 1000
+SERVER_WEIGHT_RECORD_NOTES = ("通过个人资料更新",)
+
+
+def _local_time_filter(collection: str, time_field: str, cutover_id) -> dict:
+    """
+    需要换算的记录：切换前写入、尚未换算，且不是服务端按 UTC 生成的时间
+
+    Args:
+        collection: 集合名
+        time_field: 时间字段
+        cutover_id: 切换时间点对应的 ObjectId
+
+    Returns:
+        update_many 的筛选条件
+    """
+    condition = {
+        "_id": {"$lt": cutover_id},
+        LOCAL_TIME_MIGRATED_FIELD: {"$exists": False},
+        time_field: {"$type": "date"},
+        "$expr": {
+            "$gt": [
+                {"$abs": {"$subtract": [f"${time_field}", {"$toDate": "$_id"}]}},
+                SERVER_TIME_TOLERANCE_MS,
+            ]
+        },
+    }
+    if collection == "weight_records":
+        condition["notes"] = {"$nin": list(SERVER_WEIGHT_RECORD_NOTES)}
+    return condition
+
+
+def _local_to_utc_pipeline(field: str, tz_name: str) -> list:
+    """把按本地时间保存的日期字段换算为 UTC 的更新管道（日期各部分按 tz_name 重新组装）"""
+    value = f"${field}"
+    return [{
+        "$set": {
+            field: {
+                "$dateFromParts": {
+                    "year": {"$year": value},
+                    "month": {"$month": value},
+                    "day": {"$dayOfMonth": value},
+                    "hour": {"$hour": value},
+                    "minute": {"$minute": value},
+                    "second": {"$second": value},
+                    "millisecond": {"$millisecond": value},
+                    "timezone": tz_name,
+                }
+            },
+            LOCAL_TIME_MIGRATED_FIELD: True,
+        }
+    }]
+
+
+async def backfill_local_record_times():
+    """
+    把切换前写入的饮食/体重/运动记录时间从用户本地时间换算为 UTC，并重新同步 users.weight_recorded_at
+
+    服务端以 utcnow() 生成的时间（见 _local_time_filter）本来就是 UTC，保持不变。
+    """
+    from bson import ObjectId
+    from pymongo import ReturnDocument
+    from app.services.day_boundary_service import is_valid_timezone
+
+    if not settings.LOCAL_TIME_BACKFILL_ENABLED:
+        return
+    db = get_database()
+    if await _is_dataset_initialized(db, LOCAL_TIME_BACKFILL_KEY, LOCAL_TIME_BACKFILL_VERSION):
+        return
+
+    # 切换时间点在首次执行时记录（多个进程共享同一个），此后写入的记录 _id 不小于该时间
+    state = await db[INIT_STATE_COLLECTION].find_one_and_update(
+        {"_id": LOCAL_TIME_BACKFILL_KEY},
+        {"$setOnInsert": {"cutover_at": datetime.utcnow()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    cutover_id = ObjectId.from_datetime(state["cutover_at"])
 
+    # 按时区分组用户：非默认时区的用户逐组换算，其余记录（含默认时区和已不存在的用户）最后统一按默认时区换算
+    emails_by_timezone = {}
+    async for user in db["users"].find({"timezone": {"$nin": [None, "", settings.DEFAULT_TIMEZONE]}}, {"email": 1, "timezone": 1}):
+        if is_valid_timezone(user["timezone"]):
+            emails_by_timezone.setdefault(user["timezone"], []).append(user["email"])
 
+    total = 0
+    for collection, user_field, time_field in LOCAL_TIME_FIELDS:
+        base_filter = _local_time_filter(collection, time_field, cutover_id)
+        for tz_name, emails in emails_by_timezone.items():
+            result = await db[collection].update_many(
+                {**base_filter, user_field: {"$in": emails}}, _local_to_utc_pipeline(time_field, tz_name)
+            )
+            total += result.modified_count
+        result = await db[collection].update_many(
+            base_filter, _local_to_utc_pipeline(time_field, settings.DEFAULT_TIMEZONE)
+        )
+        total += result.modified_count
 
+    # 当前体重的记录时间跟随最新一条体重记录
+    latest = await db["weight_records"].aggregate([
+        {"$group": {"_id": "$user_email", "recorded_at": {"$max": "$recorded_at"}}},
+    ]).to_list(length=None)
+    operations = [
+        UpdateOne({"email": item["_id"]}, {"$set": {"weight_recorded_at": item["recorded_at"]}})
+        for item in latest
+        if item["_id"] and item["recorded_at"]
+    ]
+    if operations:
+        await db["users"].bulk_write(operations, ordered=False)
 
+    await _mark_dataset_initialized(db, LOCAL_TIME_BACKFILL_KEY, LOCAL_TIME_BACKFILL_VERSION, total)
@@ -1,17 +1,41 @@
 import asyncio
-from fastapi import FastAPI
+import importlib
+from datetime import datetime, timedelta
+from fastapi import FastAPI, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from contextlib import asynccontextmanager
 from app.config import settings
-from app.database import (connect_to_mongo, close_mongo_connection)
+from app.database import (
+    connect_to_mongo,
+    close_mongo_connection,
+    ensure_indexes,
+    get_index_state,
+    ping_database,
+)
 from app.db_init.init_dataset import (
     initialize_foods_table,
     initialize_sports_table,
     initialize_default_user,
+    backfill_weight_recorded_at,
+    backfill_local_record_times,
 )
 from app.routers import auth, user, sports, food, recipe, visualization, ai_assistant
+from app.services import export_service, external_api_service, food_search_service
+from app.utils import catalog_cache
+from app.utils.db_timing import DBTimingMiddleware, get_db_timing_stats
+from app.utils.metrics import MetricsMiddleware, render_metrics
+from app.utils.request_scope import RequestScopeMiddleware
+
+# 导入较慢的可选依赖：路由中按需导入，启动后可在后台线程中预热
+OPTIONAL_MODULES = (
+    "app.utils.barcode_scanner",  # cv2 / pyzbar / numpy
+    "app.utils.series",  # numpy
+    "pypinyin",  # 食物搜索索引的拼音转换
+    "openai",
+)
 
 
 @asynccontextmanager
@@ -23,26 +47,103 @@ async def lifespan(app: FastAPI):
     await connect_to_mongo()
 
     asyncio.create_task(run_initialization())# 异步初始化数据
+    export_service.start_worker()  # 健康报告导出任务 worker
 
     yield
 
     # 关闭时执行
     print("关闭 FastAPI 应用...")
+    await export_service.stop_worker()
     await close_mongo_connection()
 
+
+# 后台初始化步骤：(步骤名, 提示信息, 初始化函数)
+INIT_STEPS = (
+    # 最先执行：尽早确定本地时间换算的切换时间点
+    ("local_record_times", "⚙️ 开始换算按本地时间保存的记录时间...", backfill_local_record_times),
+    ("indexes", "⚙️ 开始创建数据库索引...", ensure_indexes),
+    ("default_user", "⚙️ 开始初始化默认用户...", initialize_default_user),
+    ("sports", "⚙️ 开始初始化运动表...", initialize_sports_table),
+    ("foods", "⚙️ 开始初始化食物表...", initialize_foods_table),
+    ("weight_recorded_at", "⚙️ 开始补齐用户体重记录时间...", backfill_weight_recorded_at),
+)
+
+# 后台初始化进度（供 /ready 就绪检查使用）
+_init_state = {
+    "status": "pending",
+    "current_step": None,
+    "completed_steps": [],
+    "started_at": None,
+    "finished_at": None,
+    "error": None,
+    "attempts": 0,
+    "next_retry_at": None,
+}
+
+
 async def run_initialization():
-    """异步后台初始化：不会阻塞应用启动。"""
+    """
+    异步后台初始化：不会阻塞应用启动。
+
+    某一步失败时（如启动时数据库暂时不可用）状态置为 "retrying"，按指数退避
+    （INIT_RETRY_BASE_SECONDS 起，最长 INIT_RETRY_MAX_SECONDS）从失败的步骤重试，
+    已完成的步骤不再重复执行；全部完成后 /ready 才返回 200。
+    """
     print("⚙️ 开始初始化后台数据...")
-    
-    print("⚙️ 开始初始化默认用户...")
-    await initialize_default_user()
-    print("⚙️ 开始初始化运动表...")
-    await initialize_sports_table()
-    print("⚙️ 开始初始化食物表...")
-    await initialize_foods_table()
+    _init_state.update(
+        status="running",
+        current_step=None,
+        completed_steps=[],
+        started_at=datetime.utcnow(),
+        finished_at=None,
+        error=None,
+        attempts=0,
+        next_retry_at=None,
+    )
 
+    pending_steps = list(INIT_STEPS)
+    while pending_steps:
+        _init_state["attempts"] += 1
+        try:
+            while pending_steps:
+                step_name, message, step = pending_steps[0]
+                print(message)
+                _init_state["current_step"] = step_name
+                await step()
+                _init_state["completed_steps"].append(step_name)
+                pending_steps.pop(0)
+        except Exception as e:
+            delay = min(
+                settings.INIT_RETRY_BASE_SECONDS * 2 ** (_init_state["attempts"] - 1),
+                settings.INIT_RETRY_MAX_SECONDS,
+            )
+            _init_state.update(
+                status="retrying",
+                error=str(e),
+                next_retry_at=datetime.utcnow() + timedelta(seconds=delay),
+            )
+            print(f"⚠️  后台初始化失败（{_init_state['current_step']}），{delay:.0f} 秒后重试: {e}")
+            await asyncio.sleep(delay)
+            _init_state.update(status="running", next_retry_at=None)
+
+    _init_state.update(status="completed", current_step=None, error=None, finished_at=datetime.utcnow())
+    # 初始化期间可能已缓存了不完整的公共运动/食物数据
+    catalog_cache.clear()
+    food_search_service.invalidate()
     print("✅ 数据库初始化完成！")
 
+    if settings.WARM_UP_OPTIONAL_MODULES:
+        await asyncio.to_thread(warm_up_optional_modules)
+
+
+def warm_up_optional_modules():
+    """预先导入可选依赖，避免首个条形码/AI 请求承担导入耗时（导入失败不影响启动）"""
+    for module_name in OPTIONAL_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            print(f"⚠️  预热模块 {module_name} 失败: {e}")
+
 
 # 创建 FastAPI 应用
 app = FastAPI(
@@ -63,6 +164,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 请求级缓存作用域（同一请求内复用用户文档等查询结果）
+app.add_middleware(RequestScopeMiddleware)
+
+# 请求级数据库耗时统计（Server-Timing 响应头）
+if settings.DB_TIMING_ENABLED:
+    app.add_middleware(DBTimingMiddleware)
+
+# 按路由模块统计请求耗时（/metrics）
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# 慢请求采样分析（默认关闭）
+if settings.PROFILER_ENABLED:
+    from app.utils.profiler import ProfilerMiddleware
+
+    app.add_middleware(ProfilerMiddleware)
+
 # 注册路由
 app.include_router(auth.router, prefix="/api")
 app.include_router(user.router, prefix="/api")
@@ -100,6 +218,54 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus 指标（文本格式）"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/metrics/db")
+async def db_metrics():
+    """数据库命令数量与耗时汇总（按请求平均、按命令类型）"""
+    return get_db_timing_stats()
+
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    就绪检查端点（供 Docker HEALTHCHECK / 负载均衡在滚动重启时判断是否可以接流量）
+
+    只有数据库可用且后台初始化（索引、默认用户、种子数据）完成时返回 200，否则返回 503。
+    初始化失败时会在后台退避重试，重试成功后自动恢复就绪。
+    外部 API 客户端状态仅作展示，不影响就绪结果。
+    """
+    database_check = {"status": "ok", "latency_ms": None, "error": None}
+    try:
+        database_check["latency_ms"] = round(await ping_database(), 2)
+    except Exception as e:
+        database_check.update(status="error", error=str(e))
+
+    init_check = dict(_init_state)
+    init_check["progress"] = f"{len(_init_state['completed_steps'])}/{len(INIT_STEPS)}"
+    for key in ("started_at", "finished_at", "next_retry_at"):
+        if init_check[key]:
+            init_check[key] = init_check[key].isoformat()
+
+    ready = database_check["status"] == "ok" and _init_state["status"] == "completed"
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "checks": {
+                "database": database_check,
+                "indexes": get_index_state(),
+                "initialization": init_check,
+                "external_api": external_api_service.get_client_health(),
+            },
+        },
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -45,6 +45,7 @@ class UserInDB(BaseModel):
     # 身体基本数据
     height: Optional[float] = None  # 身高（厘米）
     weight: Optional[float] = None  # 体重（公斤）
+    weight_recorded_at: Optional[datetime] = None  # 当前体重对应的体重记录时间（用于按时间顺序同步体重）
     birthdate: Optional[date] = None  # 出生日期
     age: Optional[int] = None  # 年龄（由后端根据出生日期计算）
     gender: Optional[Gender] = None  # 性别
@@ -74,6 +75,9 @@ class UserInDB(BaseModel):
     budget_per_day: Optional[float] = None  # 每日预算（元）
     include_budget: bool = False  # 是否在生成计划时考虑预算
 
+    # 时区（IANA 名称），决定按天统计时的日边界；未设置时使用 settings.DEFAULT_TIMEZONE
+    timezone: Optional[str] = None
+
     # 提醒设置
     reminder_settings: Optional[dict] = None  # 提醒设置（存储 ReminderSettings 的字典形式）
 
@@ -13,7 +13,7 @@ from app.schemas.ai_assistant import (
     DietAnalysisResponse,
     MealRecommendationResponse,
 )
-from app.services import ai_assistant_service
+from app.services import ai_assistant_service, recognition_cache_service
 
 
 router = APIRouter(prefix="/ai", tags=["AI 助手"])
@@ -116,6 +116,26 @@ async def recognize_and_process_food(
         )
 
 
+@router.get(
+    "/food/recognize/cache-stats",
+    summary="拍照识别缓存统计",
+    description="返回拍照识别结果缓存的命中率统计（进程内计数）。",
+)
+async def get_recognition_cache_stats(
+    current_user: str = Depends(get_current_user),
+) -> dict:
+    """
+    获取拍照识别缓存的命中率统计。
+
+    **返回**：
+    - **enabled** / **global_scope**: 缓存开关与是否跨用户共享
+    - **max_distance** / **ttl_hours**: 汉明距离阈值与缓存有效期
+    - **hits** / **misses** / **hit_rate**: 命中次数、未命中次数与命中率
+    - **avg_lookup_ms**: 平均查找耗时（毫秒）
+    """
+    return recognition_cache_service.get_cache_stats()
+
+
 @router.post(
     "/ask",
     response_model=QuestionResponse,
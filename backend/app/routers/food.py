@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, status, Depends, Query, UploadFile, File, Form, Request
 from typing import Optional, Union
 from datetime import date
 import os
@@ -21,16 +21,21 @@ from app.schemas.food import (
     FoodRecordResponse,
     FoodRecordQueryRequest,
     FoodRecordListResponse,
+    FoodRecordCopyDayRequest,
+    FoodRecordCopyMealRequest,
+    FoodRecordCopyResponse,
     DailyNutritionSummary,
+    QuickLogResponse,
     MessageResponse,
     BarcodeScanResponse,
     BarcodeImageRecognitionResponse,
 )
 from app.services import food_service
 from app.services import external_api_service
+from app.services import quick_log_service
 from app.routers.auth import get_current_user
-from app.utils.barcode_scanner import decode_barcode_from_image
 from app.utils.image_storage import save_food_image, get_image_url, delete_food_image
+from app.utils.catalog_cache import etag_json_response
 
 router = APIRouter(prefix="/food", tags=["食物管理"])
 
@@ -219,8 +224,8 @@ async def search_food_by_name(
     - 不包括其他用户的私有食物
     
     **排序规则**：
-    - 用户自己创建的食物排在最前面（按创建时间倒序）
-    - 公共食物排在后面（按创建时间倒序）
+    - 按相关性排序：支持拼音全拼/首字母（如 jidan、jd）和错别字，用户自建和常记录的食物优先
+    - 本地搜索索引关闭时：用户自己创建的食物在前、公共食物在后（均按创建时间倒序）
     
     返回本地数据库的 ObjectId，适用于创建食谱、饮食记录等场景。
     """
@@ -249,15 +254,39 @@ async def search_food_by_name(
     )
 
 
+@router.get("/quick", response_model=QuickLogResponse)
+async def get_quick_log_items(
+    limit: int = Query(20, ge=1, le=100, description="每个列表的返回数量"),
+    current_user: str = Depends(get_current_user)
+):
+    """
+    获取最近和常吃的食物/食谱（用于一键再记一次）
+    
+    - **limit**: 每个列表的返回数量（默认20，最大100）
+    
+    **返回内容**：
+    - recent：最近记录过的不重复食物和食谱，按记录时间倒序
+    - frequent：同一批条目按记录次数倒序
+    
+    每个条目带上次记录的餐次和份量（食物为 serving_amount，食谱为 scale），
+    可直接用于 POST /food/record 或 POST /recipe/record。
+    """
+    quick_items = await quick_log_service.get_quick_items(current_user, limit=limit)
+    return QuickLogResponse(**quick_items)
+
+
 @router.get("/{food_id}", response_model=FoodResponse)
 async def get_food(
     food_id: str,
+    request: Request,
     current_user: str = Depends(get_current_user)
 ):
     """
     根据ID获取食物详情（仅本地库）
     
     - **food_id**: 食物ID（本地库 ObjectId）
+    
+    响应带 ETag，请求头 If-None-Match 与之匹配时返回 304
     """
     food = await food_service.get_food_by_id(food_id)
 
@@ -274,7 +303,7 @@ async def get_food(
             detail="无权访问此食物"
         )
 
-    return FoodResponse(
+    return etag_json_response(request, FoodResponse(
         id=food["_id"],
         name=food["name"],
         category=food.get("category"),
@@ -290,7 +319,7 @@ async def get_food(
         source=food.get("source"),
         boohee_id=food.get("boohee_id"),
         boohee_code=food.get("boohee_code"),
-    )
+    ))
 
 
 @router.put("/{food_id}", response_model=FoodResponse)
@@ -551,6 +580,91 @@ async def get_food_records(
     )
 
 
+async def _copy_food_records(
+    current_user: str,
+    source_date: date,
+    target_date: date,
+    meal_type: Optional[str] = None,
+    target_meal_type: Optional[str] = None,
+) -> FoodRecordCopyResponse:
+    try:
+        result = await food_service.copy_food_records(
+            current_user, source_date, target_date, meal_type=meal_type, target_meal_type=target_meal_type
+        )
+    except ValueError as e:
+        message = str(e)
+        status_code = status.HTTP_404_NOT_FOUND if "没有" in message else status.HTTP_400_BAD_REQUEST
+        raise HTTPException(status_code=status_code, detail=message)
+
+    records = result["records"]
+    record_responses = [
+        FoodRecordResponse(
+            id=record["_id"],
+            user_email=record["user_email"],
+            food_name=record["food_name"],
+            serving_amount=record["serving_amount"],
+            serving_size=record["serving_size"],
+            serving_unit=record["serving_unit"],
+            nutrition_data=record["nutrition_data"],
+            full_nutrition=record.get("full_nutrition"),
+            recorded_at=record["recorded_at"],
+            meal_type=record.get("meal_type"),
+            notes=record.get("notes"),
+            food_id=record.get("food_id"),
+            created_at=record["created_at"],
+        )
+        for record in records
+    ]
+    return FoodRecordCopyResponse(
+        total=len(record_responses),
+        records=record_responses,
+        total_nutrition=await food_service.calculate_total_nutrition(records),
+        recipe_batch_ids=result["recipe_batch_ids"],
+    )
+
+
+@router.post("/record/copy-day", response_model=FoodRecordCopyResponse, status_code=status.HTTP_201_CREATED)
+async def copy_day_food_records(
+    copy_request: FoodRecordCopyDayRequest,
+    current_user: str = Depends(get_current_user)
+):
+    """
+    把某一天的全部饮食记录复制到另一天
+    
+    - **source_date**: 来源日期（用户本地日期）
+    - **target_date**: 目标日期（用户本地日期）
+    
+    副本保留原记录的食物、份量、营养快照、餐次和当天时刻，只替换日期；
+    来自食谱的记录会分配新的批次ID（可按批次单独修改/删除）。来源日期没有记录时返回 404。
+    """
+    return await _copy_food_records(current_user, copy_request.source_date, copy_request.target_date)
+
+
+@router.post("/record/copy-meal", response_model=FoodRecordCopyResponse, status_code=status.HTTP_201_CREATED)
+async def copy_meal_food_records(
+    copy_request: FoodRecordCopyMealRequest,
+    current_user: str = Depends(get_current_user)
+):
+    """
+    把某一天某一餐的饮食记录复制到另一天（或同一天的另一餐）
+    
+    - **source_date**: 来源日期（用户本地日期）
+    - **target_date**: 目标日期（用户本地日期）
+    - **meal_type**: 要复制的餐次（早餐、午餐、晚餐、加餐）
+    - **target_meal_type**: 副本使用的餐次（可选，默认沿用原餐次）
+    
+    副本保留原记录的食物、份量、营养快照和当天时刻；来自食谱的记录会分配新的批次ID。
+    来源餐次没有记录时返回 404。
+    """
+    return await _copy_food_records(
+        current_user,
+        copy_request.source_date,
+        copy_request.target_date,
+        meal_type=copy_request.meal_type,
+        target_meal_type=copy_request.target_meal_type,
+    )
+
+
 @router.get("/record/daily/{target_date}", response_model=DailyNutritionSummary)
 async def get_daily_nutrition(
     target_date: date,
@@ -709,7 +823,9 @@ async def recognize_barcode_from_image(
             temp_file.write(content)
             temp_file_path = temp_file.name
         
-        # 识别条形码
+        # 识别条形码（cv2/pyzbar 导入较慢，首次使用时再加载）
+        from app.utils.barcode_scanner import decode_barcode_from_image
+
         result = decode_barcode_from_image(temp_file_path)
         
         if result:
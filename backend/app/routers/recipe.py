@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, status, Depends, Query, UploadFile, File, Form, Request
 from typing import Optional, List, Dict, Any
 import json
 from app.schemas.recipe import (
@@ -21,6 +21,7 @@ from app.schemas.recipe import (
 from app.services import recipe_service
 from app.routers.auth import get_current_user
 from app.utils.image_storage import save_recipe_image, get_image_url, delete_recipe_image
+from app.utils.catalog_cache import etag_json_response
 
 router = APIRouter(prefix="/recipe", tags=["食谱管理"])
 
@@ -194,10 +195,10 @@ async def search_recipe_by_name(
 
 
 @router.get("/categories", response_model=list)
-async def get_recipe_categories(current_user: str = Depends(get_current_user)):
-    """获取所有食谱分类"""
+async def get_recipe_categories(request: Request, current_user: str = Depends(get_current_user)):
+    """获取所有食谱分类（响应带 ETag，支持 If-None-Match 返回 304）"""
     categories = await recipe_service.get_recipe_categories(current_user)
-    return categories
+    return etag_json_response(request, categories)
 
 
 # ========== 食谱记录管理（必须在 /{recipe_id} 之前，避免路由冲突） ==========
@@ -377,9 +378,10 @@ async def delete_recipe_record(
 @router.get("/{recipe_id}", response_model=RecipeResponse)
 async def get_recipe(
     recipe_id: str,
+    request: Request,
     current_user: str = Depends(get_current_user)
 ):
-    """获取食谱详情"""
+    """获取食谱详情（响应带 ETag，支持 If-None-Match 返回 304）"""
     recipe = await recipe_service.get_recipe_by_id(recipe_id)
     
     if not recipe:
@@ -395,7 +397,7 @@ async def get_recipe(
             detail="无权访问此食谱"
         )
     
-    return RecipeResponse(
+    return etag_json_response(request, RecipeResponse(
         id=recipe["_id"],
         name=recipe["name"],
         description=recipe.get("description"),
@@ -409,7 +411,7 @@ async def get_recipe(
         created_by=recipe.get("created_by"),
         created_at=recipe["created_at"],
         updated_at=recipe["updated_at"],
-    )
+    ))
 
 
 @router.put("/{recipe_id}", response_model=RecipeResponse)
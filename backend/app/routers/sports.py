@@ -1,10 +1,13 @@
-from fastapi import APIRouter, HTTPException, status, Depends,File,Form
+from fastapi import APIRouter, HTTPException, status, Depends,File,Form,Request
 from typing import Optional
 from app.routers.auth import get_current_user
 from app.services import sports_service
+from app.utils.catalog_cache import etag_json_response
 from fastapi import UploadFile
 from app.schemas.sports import (
     LogSportsRequest,
+    BatchLogSportsRequest,
+    BatchLogSportsResponse,
     UpdateSportsRecordRequest,
     CreateSportsRequest,
     UpdateSportsRequest,
@@ -107,12 +110,14 @@ async def delete_sports(sport_name: str, current_user: str = Depends(get_current
 
 # 获取用户可用运动类型列表
 @router.get("/get-available-sports-types", response_model=list[SearchSportsResponse])
-async def get_available_sports_types(current_user: str = Depends(get_current_user)):
+async def get_available_sports_types(request: Request, current_user: str = Depends(get_current_user)):
     """
     获取用户可用的运动类型列表
     包括系统默认运动类型和用户自定义的运动类型
+    响应带 ETag，请求头 If-None-Match 与之匹配时返回 304
     """
-    return await sports_service.get_available_sports(current_user)
+    sports = await sports_service.get_available_sports(current_user)
+    return etag_json_response(request, sports)
 
 # 记录运动记录
 @router.post("/log-sports",response_model=SimpleSportsResponse)
@@ -133,6 +138,25 @@ async def log_sports_record(log_request: LogSportsRequest, current_user: str = D
             detail="保存运动记录失败"   
         )
     
+# 批量记录运动记录
+@router.post("/log/batch", response_model=BatchLogSportsResponse)
+async def log_sports_records_batch(batch_request: BatchLogSportsRequest, current_user: str = Depends(get_current_user)):
+    """
+    批量记录运动及消耗卡路里（手环同步、历史数据补录）
+    - **records**: 运动记录列表（每项同 /log-sports，最多 500 条）
+
+    返回每条记录的处理结果，单条失败不影响其他记录；用户未设置体重时整批返回 422
+    """
+    results = await sports_service.log_sports_records_batch(batch_request.records, current_user)
+    success_count = sum(1 for result in results if result["success"])
+
+    return BatchLogSportsResponse(
+        total=len(results),
+        success_count=success_count,
+        failed_count=len(results) - success_count,
+        results=results,
+    )
+
 # 更新运动记录
 @router.post("/update-sport-record",response_model=SimpleSportsResponse)
 async def update_sports_record(update_request: UpdateSportsRecordRequest, current_user: str = Depends(get_current_user)):
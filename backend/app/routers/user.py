@@ -14,6 +14,7 @@ from app.schemas.weight import (
     WeightRecordUpdateRequest,
     WeightRecordResponse,
     WeightRecordListResponse,
+    WeightSeriesResponse,
 )
 from app.services import user_service, weight_service
 from app.routers.auth import get_current_user
@@ -264,6 +265,34 @@ async def get_weight_records(
     return WeightRecordListResponse(total=total, records=record_responses)
 
 
+@router.get("/weight-records/series", response_model=WeightSeriesResponse)
+async def get_weight_series(
+    start_date: Optional[date] = Query(None, description="开始日期（格式：YYYY-MM-DD）"),
+    end_date: Optional[date] = Query(None, description="结束日期（格式：YYYY-MM-DD）"),
+    points: int = Query(200, ge=3, le=2000, description="目标点数"),
+    window_days: int = Query(7, ge=1, le=365, description="滑动平均窗口（天）"),
+    current_user: str = Depends(get_current_user)
+):
+    """
+    获取降采样后的体重曲线（用于图表展示）
+
+    - **start_date**: 开始日期（可选，格式：YYYY-MM-DD）
+    - **end_date**: 结束日期（可选，格式：YYYY-MM-DD）
+    - **points**: 目标点数（默认200，3-2000），记录数超过时使用 LTTB 算法降采样
+    - **window_days**: 滑动平均窗口（默认7天）
+
+    返回按时间升序的曲线点（含滑动平均）以及范围内的线性趋势（公斤/周）
+    """
+    series = await weight_service.get_weight_series(
+        user_email=current_user,
+        start_date=start_date,
+        end_date=end_date,
+        points=points,
+        window_days=window_days
+    )
+    return WeightSeriesResponse(**series)
+
+
 @router.put("/weight-record/{record_id}", response_model=WeightRecordResponse)
 async def update_weight_record(
     record_id: str,
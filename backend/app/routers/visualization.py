@@ -2,16 +2,21 @@
 可视化报告 API
 提供数据分析和可视化相关的端点
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
-from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from datetime import date, datetime, timezone
+from typing import Optional
 from app.routers.auth import get_current_user
 from app.schemas.visualization import (
     DailyCalorieSummary,
     NutritionAnalysisResponse,
     TimeSeriesTrendResponse,
     HealthReportExportResponse,
+    ExportJobCreateRequest,
+    ExportJobResponse,
+    ExportJobListResponse,
 )
-from app.services import visualization_service
+from app.services import day_boundary_service, export_service, visualization_service
 
 router = APIRouter(prefix="/api/visualization", tags=["可视化报告"])
 
@@ -33,7 +38,9 @@ async def get_daily_calorie_summary(
     - 净卡路里和目标完成百分比
     """
     if target_date is None:
-        target_date = date.today()
+        target_date = day_boundary_service.local_today(
+            await day_boundary_service.get_user_timezone(current_user)
+        )
 
     try:
         return await visualization_service.get_daily_calorie_summary(
@@ -75,6 +82,7 @@ async def get_time_series_trend(
     start_date: date = Query(..., description="开始日期(YYYY-MM-DD)"),
     end_date: date = Query(..., description="结束日期(YYYY-MM-DD)"),
     view_type: str = Query("day", description="视图类型: day, week, month"),
+    since: Optional[datetime] = Query(None, description="上次响应中的 watermark，只返回之后有变更的分组"),
     current_user: str = Depends(get_current_user)
 ):
     """
@@ -91,13 +99,19 @@ async def get_time_series_trend(
     - day: 每日数据
     - week: 每周聚合数据
     - month: 每月聚合数据
+
+    增量刷新：传入上次响应的 watermark 作为 since，只返回之后有变更的分组（changed_buckets），
+    客户端用返回数据替换这些分组；在 changed_buckets 中但不在趋势列表里的分组表示已无数据
     """
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
     try:
         return await visualization_service.get_time_series_trend(
             user_email=current_user,
             start_date=start_date,
             end_date=end_date,
-            view_type=view_type
+            view_type=view_type,
+            since=since
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -133,3 +147,72 @@ async def export_health_report(
         if "用户不存在" in str(e):
             raise HTTPException(status_code=404, detail=str(e))
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/export-jobs", response_model=ExportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_export_job(
+    job_request: ExportJobCreateRequest,
+    current_user: str = Depends(get_current_user)
+):
+    """
+    创建健康报告导出任务（异步执行）
+
+    - **start_date** / **end_date**: 日期范围
+    - **format**: csv（默认）、jsonl 或 pdf
+
+    任务在后台逐批写入文件，通过 GET /export-jobs/{job_id} 查询进度，
+    完成后使用返回的 download_url 下载。每个用户同时进行的任务数有上限（超出返回 429）。
+    """
+    try:
+        job = await export_service.create_export_job(
+            user_email=current_user,
+            start_date=job_request.start_date,
+            end_date=job_request.end_date,
+            export_format=job_request.format
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except export_service.ExportJobLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return ExportJobResponse(**export_service.to_response_dict(job))
+
+
+@router.get("/export-jobs", response_model=ExportJobListResponse)
+async def list_export_jobs(
+    limit: int = Query(20, ge=1, le=100, description="返回数量"),
+    current_user: str = Depends(get_current_user)
+):
+    """获取当前用户最近的导出任务"""
+    jobs = await export_service.list_export_jobs(current_user, limit)
+    return ExportJobListResponse(
+        jobs=[ExportJobResponse(**export_service.to_response_dict(job)) for job in jobs]
+    )
+
+
+@router.get("/export-jobs/{job_id}", response_model=ExportJobResponse)
+async def get_export_job(
+    job_id: str,
+    current_user: str = Depends(get_current_user)
+):
+    """查询导出任务状态和进度"""
+    job = await export_service.get_export_job(job_id, current_user)
+    if not job:
+        raise HTTPException(status_code=404, detail="导出任务不存在")
+    return ExportJobResponse(**export_service.to_response_dict(job))
+
+
+@router.get("/export-jobs/{job_id}/download")
+async def download_export_file(
+    job_id: str,
+    current_user: str = Depends(get_current_user)
+):
+    """下载已完成的导出文件（文件以流式方式返回）"""
+    try:
+        export_file = await export_service.get_export_file(job_id, current_user)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not export_file:
+        raise HTTPException(status_code=404, detail="导出文件不存在或已过期")
+
+    path, filename, media_type = export_file
+    return FileResponse(path, media_type=media_type, filename=filename)
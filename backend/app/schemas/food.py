@@ -666,6 +666,51 @@ class FoodRecordListResponse(BaseModel):
     total_nutrition: NutritionData = Field(..., description="总营养摄入")
 
 
+class FoodRecordCopyDayRequest(BaseModel):
+    """复制一天的饮食记录请求"""
+    source_date: date = Field(..., description="来源日期（YYYY-MM-DD）")
+    target_date: date = Field(..., description="目标日期（YYYY-MM-DD）")
+
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra={
+            "example": {
+                "source_date": "2025-11-02",
+                "target_date": "2025-11-03"
+            }
+        },
+    )
+
+
+class FoodRecordCopyMealRequest(FoodRecordCopyDayRequest):
+    """复制一餐的饮食记录请求"""
+    meal_type: str = Field(..., description="要复制的餐次")
+    target_meal_type: Optional[str] = Field(None, description="副本使用的餐次（默认沿用原餐次）")
+
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra={
+            "example": {
+                "source_date": "2025-11-02",
+                "target_date": "2025-11-03",
+                "meal_type": "早餐"
+            }
+        },
+    )
+
+    @field_validator("meal_type", "target_meal_type")
+    @classmethod
+    def validate_meal_type(cls, v):
+        if v and v not in ["早餐", "午餐", "晚餐", "加餐", "breakfast", "lunch", "dinner", "snack"]:
+            raise ValueError("餐次类型必须是：早餐、午餐、晚餐、加餐 之一")
+        return v
+
+
+class FoodRecordCopyResponse(FoodRecordListResponse):
+    """复制饮食记录响应"""
+    recipe_batch_ids: List[str] = Field(default_factory=list, description="副本中食谱记录的新批次ID")
+
+
 class DailyNutritionSummary(BaseModel):
     """每日营养摘要"""
     date: str = Field(..., description="日期（YYYY-MM-DD）")
@@ -677,6 +722,26 @@ class DailyNutritionSummary(BaseModel):
     records: List[FoodRecordResponse] = Field(..., description="当天的所有记录")
 
 
+class QuickLogItem(BaseModel):
+    """快速记录条目（最近记录过的食物或食谱）"""
+    kind: str = Field(..., description="条目类型：food（食物）或 recipe（食谱）")
+    item_id: str = Field(..., description="食物ID或食谱ID")
+    name: str = Field(..., description="名称")
+    meal_type: Optional[str] = Field(None, description="上次记录的餐次类型")
+    serving_amount: Optional[float] = Field(None, description="上次记录的食用份量数（食物）")
+    serving_size: Optional[float] = Field(None, description="每份大小（食物）")
+    serving_unit: Optional[str] = Field(None, description="份量单位（食物）")
+    scale: Optional[float] = Field(None, description="上次记录的份量倍数（食谱）")
+    count: int = Field(..., description="在列表中保留期间的累计记录次数")
+    logged_at: datetime = Field(..., description="最近一次记录时间")
+
+
+class QuickLogResponse(BaseModel):
+    """快速记录列表响应"""
+    recent: List[QuickLogItem] = Field(..., description="最近记录的食物/食谱（按记录时间倒序，不重复）")
+    frequent: List[QuickLogItem] = Field(..., description="常吃的食物/食谱（按记录次数倒序）")
+
+
 # ========== 搜索和查询 ==========
 class FoodSearchQuery(BaseModel):
     """食物搜索查询参数"""
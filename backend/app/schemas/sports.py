@@ -1,13 +1,35 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional
-from datetime import datetime,date
+from typing import List, Optional
+from datetime import datetime,date,timezone
 
 # 记录运动及消耗卡路里的请求
 class LogSportsRequest(BaseModel):
     sport_name: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # 默认值带 UTC 时区，不会被当作用户本地时间换算
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     duration_time: Optional[int] = Field(None, gt=0)
 
+# 批量记录运动的单次请求最大条数
+SPORTS_LOG_BATCH_MAX = 500
+
+# 批量记录运动的请求（手环同步、历史数据补录）
+class BatchLogSportsRequest(BaseModel):
+    records: List[LogSportsRequest] = Field(..., min_length=1, max_length=SPORTS_LOG_BATCH_MAX)
+
+# 批量记录运动中单条记录的处理结果
+class BatchLogSportsItemResult(BaseModel):
+    index: int  # 在请求 records 中的下标
+    success: bool
+    record_id: Optional[str] = None
+    calories_burned: Optional[float] = None
+    message: Optional[str] = None
+
+class BatchLogSportsResponse(BaseModel):
+    total: int
+    success_count: int
+    failed_count: int
+    results: List[BatchLogSportsItemResult]
+
 # 更新运动记录的请求
 class UpdateSportsRecordRequest(BaseModel):
     record_id: Optional[str] = None
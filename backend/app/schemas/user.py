@@ -129,6 +129,20 @@ class UserProfileUpdate(BaseModel):
     budget_per_day: Optional[float] = Field(None, gt=0, description="每日预算（元）")
     include_budget: Optional[bool] = Field(None, description="是否在生成计划时考虑预算")
 
+    # 时区（按天统计时使用的日边界）
+    timezone: Optional[str] = Field(None, max_length=64, description="时区（IANA 名称，如 Asia/Shanghai）")
+
+    @validator("timezone")
+    def validate_timezone(cls, v):
+        from zoneinfo import ZoneInfo
+        if v is None:
+            return v
+        try:
+            ZoneInfo(v)
+        except Exception:
+            raise ValueError("无效的时区名称")
+        return v
+
 
 class UserProfileResponse(BaseModel):
     """用户资料响应"""
@@ -159,6 +173,8 @@ class UserProfileResponse(BaseModel):
     budget_per_day: Optional[float] = None
     include_budget: bool = False
 
+    timezone: Optional[str] = None  # 时区（未设置时按服务器默认时区统计）
+
 
 # ========== 密码重置 ==========
 class PasswordResetRequest(BaseModel):
@@ -1,8 +1,9 @@
 """
 可视化报告相关的数据模型
 """
-from typing import List, Dict, Any
-from pydantic import BaseModel
+from datetime import date, datetime
+from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, Field
 
 
 class DailyCalorieSummary(BaseModel):
@@ -60,6 +61,8 @@ class TimeSeriesTrendResponse(BaseModel):
     intake_trend: List[TimeSeriesDataPoint]  # 摄入趋势
     burned_trend: List[TimeSeriesDataPoint]  # 消耗趋势
     weight_trend: List[TimeSeriesDataPoint]  # 体重趋势
+    changed_buckets: Optional[List[str]] = None  # 增量请求时有变更的分组（全量请求为空）
+    watermark: Optional[datetime] = None  # 下次增量请求携带的 since
 
 
 class HealthReportExportResponse(BaseModel):
@@ -71,3 +74,34 @@ class HealthReportExportResponse(BaseModel):
     nutrition_analysis: NutritionAnalysisResponse  # 营养素分析
     time_series_trend: TimeSeriesTrendResponse  # 时间序列趋势
     generated_at: str  # 报告生成时间
+
+
+class ExportJobCreateRequest(BaseModel):
+    """创建导出任务请求"""
+    start_date: date = Field(..., description="开始日期(YYYY-MM-DD)")
+    end_date: date = Field(..., description="结束日期(YYYY-MM-DD)")
+    format: str = Field("csv", description="导出格式: csv, jsonl, pdf")
+
+
+class ExportJobResponse(BaseModel):
+    """导出任务状态"""
+    id: str  # 任务ID
+    format: str  # csv, jsonl, pdf
+    start_date: str
+    end_date: str
+    status: str  # pending, running, completed, failed
+    progress: float  # 进度百分比（0-100）
+    rows_written: int  # 已写入行数
+    total_rows: Optional[int] = None  # 总行数（开始执行后才有）
+    file_size: Optional[int] = None  # 文件大小（字节）
+    summary: Optional[Dict[str, Any]] = None  # 总体摘要（完成后才有）
+    error: Optional[str] = None  # 失败原因
+    download_url: Optional[str] = None  # 下载地址（完成后才有）
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None  # 文件清理时间
+
+
+class ExportJobListResponse(BaseModel):
+    """导出任务列表"""
+    jobs: List[ExportJobResponse]
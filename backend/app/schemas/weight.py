@@ -6,7 +6,7 @@ from pydantic import BaseModel, Field
 class WeightRecordCreateRequest(BaseModel):
     """创建体重记录请求"""
     weight: float = Field(..., gt=0, le=500, description="体重（公斤，0-500kg）")
-    recorded_at: datetime = Field(..., description="记录时间")
+    recorded_at: datetime = Field(..., description="记录时间（不带时区时视为用户本地时间）")
     notes: Optional[str] = Field(None, max_length=200, description="备注")
 
     class Config:
@@ -22,7 +22,7 @@ class WeightRecordCreateRequest(BaseModel):
 class WeightRecordUpdateRequest(BaseModel):
     """更新体重记录请求"""
     weight: Optional[float] = Field(None, gt=0, le=500, description="体重（公斤，0-500kg）")
-    recorded_at: Optional[datetime] = Field(None, description="记录时间")
+    recorded_at: Optional[datetime] = Field(None, description="记录时间（不带时区时视为用户本地时间）")
     notes: Optional[str] = Field(None, max_length=200, description="备注")
 
     class Config:
@@ -75,3 +75,49 @@ class WeightRecordListResponse(BaseModel):
                 ]
             }
         }
+
+
+class WeightSeriesPoint(BaseModel):
+    """体重曲线上的一个点"""
+    recorded_at: datetime = Field(..., description="记录时间")
+    weight: float = Field(..., description="体重（公斤）")
+    moving_average: float = Field(..., description="截至该点的滑动平均体重（公斤）")
+
+
+class WeightTrend(BaseModel):
+    """体重趋势"""
+    slope_per_week: float = Field(..., description="线性趋势斜率（公斤/周，负数表示下降）")
+    start_weight: float = Field(..., description="范围内第一条记录的体重")
+    end_weight: float = Field(..., description="范围内最后一条记录的体重")
+    change: float = Field(..., description="体重变化（公斤）")
+
+
+class WeightSeriesResponse(BaseModel):
+    """降采样体重曲线响应"""
+    total: int = Field(..., description="范围内原始记录数")
+    downsampled: bool = Field(..., description="是否进行了降采样")
+    window_days: int = Field(..., description="滑动平均窗口（天）")
+    trend: Optional[WeightTrend] = Field(None, description="体重趋势（无记录时为空）")
+    points: list[WeightSeriesPoint] = Field(..., description="按时间升序的曲线点")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "total": 730,
+                "downsampled": True,
+                "window_days": 7,
+                "trend": {
+                    "slope_per_week": -0.12,
+                    "start_weight": 78.4,
+                    "end_weight": 70.5,
+                    "change": -7.9
+                },
+                "points": [
+                    {
+                        "recorded_at": "2025-11-24T10:30:00",
+                        "weight": 70.5,
+                        "moving_average": 70.8
+                    }
+                ]
+            }
+        }
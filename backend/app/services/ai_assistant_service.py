@@ -19,10 +19,13 @@ from app.schemas.ai_assistant import (
 )
 from datetime import datetime, date, timedelta
 from app.schemas.food import FoodRecordCreateRequest, FoodCreateRequest
-from app.services import food_service, user_service
+from app.services import food_service, user_service, recognition_cache_service, popularity_service
 from app.utils.image_storage import save_food_image, validate_image_file, delete_food_image
 from app.utils.qwen_vl_client import call_qwen_vl_with_local_file, call_qwen_vl_with_url
 
+# 推荐菜式时提供给大模型的常吃食谱/食物数量（各取前 N 个）
+RECOMMEND_FAVORITES_LIMIT = 5
+
 
 async def _call_ai_for_foods(image_path: Path) -> List[Dict[str, Any]]:
     """
@@ -142,9 +145,18 @@ async def recognize_and_process_food_image(
     # 计算本地物理路径，用于传给 Qwen
     image_path = Path(settings.IMAGE_STORAGE_PATH) / relative_path
 
+    # 相似图片命中缓存时直接复用上次的识别结果，跳过大模型调用
+    image_hash = recognition_cache_service.compute_image_hash(image_path)
+    ai_foods = None
+    if image_hash is not None:
+        ai_foods = await recognition_cache_service.lookup_recognized_foods(image_hash, user_email)
+
     try:
-        # 调用 AI 识别
-        ai_foods = await _call_ai_for_foods(image_path)
+        if ai_foods is None:
+            # 调用 AI 识别
+            ai_foods = await _call_ai_for_foods(image_path)
+            if image_hash is not None:
+                await recognition_cache_service.store_recognized_foods(image_hash, user_email, ai_foods)
     except Exception as e:
         # AI 调用失败时，删除图片并返回错误响应
         try:
@@ -159,8 +171,16 @@ async def recognize_and_process_food_image(
     # 将 AI 识别结果转换为 RecognizedFoodItemResponse 列表
     recognized_items: List[RecognizedFoodItemResponse] = []
 
-    for item in ai_foods:
-        food_name = (item.get("food_name") or "").strip()
+    # 一次查询批量匹配所有识别出的食物名称，避免逐项查库
+    recognized_names = [(item.get("food_name") or "").strip() for item in ai_foods]
+    local_matches, taken_names = await food_service.match_local_foods_by_names(
+        recognized_names,
+        user_email,
+    )
+    # food_id -> 本地食物文档，后续处理阶段直接复用，无需再按 ID 查询
+    foods_by_id: Dict[str, dict] = {}
+
+    for item, food_name in zip(ai_foods, recognized_names):
         if not food_name:
             continue
 
@@ -169,15 +189,11 @@ async def recognize_and_process_food_image(
         confidence = item.get("confidence")
         category = item.get("category")
 
-        # 1. 先在本地数据库中按名称搜索，优先使用本地数据
-        local_candidates = await food_service.search_local_foods_only(
-            keyword=food_name,
-            user_email=user_email,
-            limit=1,
-        )
+        # 1. 优先使用本地数据库中的匹配结果
+        local = local_matches.get(food_name)
 
-        if local_candidates:
-            local = local_candidates[0]
+        if local:
+            foods_by_id[local["food_id"]] = local
             nutrition = local.get("nutrition_per_serving") or {}
             recognized_items.append(
                 RecognizedFoodItemResponse(
@@ -228,50 +244,53 @@ async def recognize_and_process_food_image(
         )
 
     # 处理识别结果：创建/匹配食物
+    # 第一遍：收集需要新建的食物（同名只建一次），最后一次 insert_many 批量创建
+    pending_creates: Dict[str, FoodCreateRequest] = {}
+    for item in recognized_items:
+        if item.food_id and item.food_id in foods_by_id:
+            continue
+        # 名称已被其他用户占用且对当前用户不可见时无法创建，跳过该识别项
+        if item.food_name in taken_names or item.food_name in pending_creates:
+            continue
+        try:
+            pending_creates[item.food_name] = FoodCreateRequest(
+                name=item.food_name,
+                category=item.category,
+                serving_size=item.serving_size if item.serving_size > 0 else 100.0,
+                serving_unit=item.serving_unit or "克",
+                nutrition_per_serving=item.nutrition_per_serving,
+                full_nutrition=item.full_nutrition,
+                brand=None,
+                barcode=None,
+                image=None,
+            )
+        except Exception:
+            # 如果构建失败，跳过该识别项
+            continue
+
+    created_by_name: Dict[str, dict] = {}
+    if pending_creates:
+        try:
+            created_foods = await food_service.create_foods_bulk(
+                list(pending_creates.values()),
+                creator_email=user_email,
+            )
+        except Exception as e:
+            # 部分写入失败由 create_foods_bulk 处理并返回已成功写入的食物；到这里说明整体失败，
+            # 所有识别项都按未匹配返回（不带 food_id）
+            print(f"警告：批量创建识别食物失败: {str(e)}")
+            created_foods = []
+        created_by_name = {food["name"]: food for food in created_foods if food.get("_id")}
+
+    # 第二遍：按识别顺序组装结果
     processed_foods: List[ProcessedFoodItem] = []
 
     for item in recognized_items:
-        # 1. 优先尝试使用已有 food_id（如果存在且合法）
-        food = None
         food_id: str | None = item.food_id
-        if food_id:
-            food = await food_service.get_food_by_id(food_id)
-
-        # 2. 如果没有 food_id 或查不到对应食物，则根据 AI 结果自动创建本地食物
+        food = foods_by_id.get(food_id) if food_id else None
         if not food:
-            # 使用 AI 识别结果构建 FoodCreateRequest
-            try:
-                food_create = FoodCreateRequest(
-                    name=item.food_name,
-                    category=item.category,
-                    serving_size=item.serving_size if item.serving_size > 0 else 100.0,
-                    serving_unit=item.serving_unit or "克",
-                    nutrition_per_serving=item.nutrition_per_serving,
-                    full_nutrition=item.full_nutrition,
-                    brand=None,
-                    barcode=None,
-                    image=None,
-                )
-            except Exception:
-                # 如果构建失败，跳过该识别项
-                continue
-
-            try:
-                food = await food_service.create_food(food_create, creator_email=user_email)
-                food_id = food.get("_id")
-            except ValueError:
-                # 如果名称冲突等原因导致创建失败，尝试按名称在本地查找已有食物
-                local_candidates = await food_service.search_local_foods_only(
-                    keyword=item.food_name,
-                    user_email=user_email,
-                    limit=1,
-                )
-                if local_candidates:
-                    food = local_candidates[0]
-                    food_id = str(food.get("food_id") or food.get("_id"))
-                else:
-                    # 仍然失败则跳过该识别项
-                    continue
+            food = created_by_name.get(item.food_name)
+            food_id = food.get("_id") if food else None
 
         if not food or not food_id:
             # 兜底：既没有找到食物也无法创建时跳过
@@ -829,12 +848,24 @@ async def recommend_meal(user_email: str) -> MealRecommendationResponse:
     if not nutrition_needs:
         nutrition_needs = ["均衡营养"]
     
-    # 4. 使用 LLM 推荐菜式
+    # 4. 读取用户常吃的食谱和食物（热度计数，按时间衰减）
+    favorite_names: List[str] = []
+    try:
+        for kind in (popularity_service.RECIPE, popularity_service.FOOD):
+            for item in await popularity_service.top_items(kind, user_email, limit=RECOMMEND_FAVORITES_LIMIT):
+                if item.get("name") and item["name"] not in favorite_names:
+                    favorite_names.append(item["name"])
+    except Exception as e:
+        print(f"⚠️  读取常吃食物失败: {e}")
+    favorites_line = f"用户常吃：{'、'.join(favorite_names)}\n" if favorite_names else ""
+    
+    # 5. 使用 LLM 推荐菜式
     prompt = (
         f"你是一个亲切的营养师小助手。请根据以下信息推荐一道适合的菜式。\n\n"
         f"当前时间：{now.strftime('%H:%M')}（{meal_type}时间）\n"
         f"用户近期营养配比：蛋白质{protein_percent:.0f}%，碳水{carbs_percent:.0f}%，脂肪{fat_percent:.0f}%\n"
-        f"需要补充的营养：{', '.join(nutrition_needs)}\n\n"
+        f"需要补充的营养：{', '.join(nutrition_needs)}\n"
+        f"{favorites_line}\n"
         f"请输出一个 JSON 对象，格式如下：\n"
         f'{{\n'
         f'  "dish": "菜式名称",\n'
@@ -844,7 +875,7 @@ async def recommend_meal(user_email: str) -> MealRecommendationResponse:
         f"要求：\n"
         f"1. 推荐的菜式要符合{meal_type}的特点\n"
         f"2. 优先补充用户缺乏的营养素\n"
-        f"3. 菜式要常见、易获取\n"
+        f"3. 菜式要常见、易获取，合适时优先选择用户常吃的或与之相近的菜式\n"
         f"4. 只输出 JSON，不要其他解释"
     )
     
@@ -881,7 +912,7 @@ async def recommend_meal(user_email: str) -> MealRecommendationResponse:
             reason = "健康小食，补充能量"
             highlight = "蛋白质、健康脂肪"
     
-    # 5. 生成亲和的推荐语
+    # 6. 生成亲和的推荐语
     need_str = nutrition_needs[0] if nutrition_needs else "营养"
     message = f"{meal_reminder}！向你推荐{dish}，可以补充{need_str}～😋"
     
@@ -1,5 +1,13 @@
 from app.models.user import PAL_COEFFICIENTS, Gender, ActivityLevel, HealthGoalType
 from datetime import date
+from typing import Any, Dict
+
+# 健康目标对应的每日卡路里调整量
+GOAL_CALORIE_ADJUSTMENTS = {
+    HealthGoalType.LOSE_WEIGHT: -500,
+    HealthGoalType.GAIN_WEIGHT: 500,
+    HealthGoalType.MAINTAIN_WEIGHT: 0,
+}
 
 
 def calculate_age(birthdate: date) -> int:
@@ -73,14 +81,81 @@ def calculate_daily_calorie_goal(
     Returns:
         每日卡路里目标（卡路里/天）
     """
-    if health_goal_type == HealthGoalType.LOSE_WEIGHT:
-        # 减重：TDEE - 500
-        goal = tdee - 500
-    elif health_goal_type == HealthGoalType.GAIN_WEIGHT:
-        # 增重：TDEE + 500
-        goal = tdee + 500
-    else:  # MAINTAIN_WEIGHT
-        # 保持：TDEE
-        goal = tdee
+    # 减重：TDEE - 500；增重：TDEE + 500；保持：TDEE
+    goal = tdee + GOAL_CALORIE_ADJUSTMENTS.get(health_goal_type, 0)
 
     return round(goal, 2)
+
+
+# ========== MongoDB 聚合表达式版本 ==========
+# 与上面的 Python 函数计算结果一致，用于在 users 的管道更新（update with aggregation pipeline）
+# 中直接根据文档字段重新计算派生指标，避免“读取用户 → 计算 → 写回”的多次往返。
+# $round 与 Python round 一样采用银行家舍入。
+
+
+def bmr_expression(weight: Any = "$weight") -> Dict[str, Any]:
+    """
+    BMR 聚合表达式（Mifflin-St Jeor 公式，使用文档中的 height/age/gender）
+
+    Args:
+        weight: 体重表达式（默认取文档的 weight 字段，也可以直接传入数值）
+    """
+    return {
+        "$round": [
+            {
+                "$add": [
+                    {"$multiply": [10, weight]},
+                    {"$multiply": [6.25, "$height"]},
+                    {"$multiply": [-5, "$age"]},
+                    {"$cond": [{"$eq": ["$gender", Gender.MALE.value]}, 5, -161]},
+                ]
+            },
+            2,
+        ]
+    }
+
+
+def tdee_expression(bmr: Any = "$bmr") -> Dict[str, Any]:
+    """TDEE 聚合表达式（按文档的 activity_level 取 PAL 系数，未知活动水平时为 null）"""
+    return {
+        "$round": [
+            {
+                "$multiply": [
+                    bmr,
+                    {
+                        "$switch": {
+                            "branches": [
+                                {"case": {"$eq": ["$activity_level", level.value]}, "then": pal}
+                                for level, pal in PAL_COEFFICIENTS.items()
+                            ],
+                            "default": None,
+                        }
+                    },
+                ]
+            },
+            2,
+        ]
+    }
+
+
+def daily_calorie_goal_expression(tdee: Any = "$tdee") -> Dict[str, Any]:
+    """每日卡路里目标聚合表达式（按文档的 health_goal_type 调整）"""
+    return {
+        "$round": [
+            {
+                "$add": [
+                    tdee,
+                    {
+                        "$switch": {
+                            "branches": [
+                                {"case": {"$eq": ["$health_goal_type", goal.value]}, "then": adjustment}
+                                for goal, adjustment in GOAL_CALORIE_ADJUSTMENTS.items()
+                            ],
+                            "default": 0,
+                        }
+                    },
+                ]
+            },
+            2,
+        ]
+    }
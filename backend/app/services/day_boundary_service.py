@@ -0,0 +1,204 @@
+"""
+用户日边界服务层
+
+记录时间在数据库中统一按 UTC 保存（naive datetime），而"某一天"的含义取决于用户所在时区。
+所有按天筛选、分组的查询都通过本模块换算：
+- 用户时区保存在用户资料的 timezone 字段（IANA 名称，如 Asia/Shanghai），未设置时使用 settings.DEFAULT_TIMEZONE
+- day_window / time_range_filter: 把本地日期范围换算为左闭右开的 UTC 时间窗口 [开始日 00:00, 结束日次日 00:00)
+- date_to_string: 聚合分组表达式，$dateToString 带上 timezone，分组键为本地日期
+- publish_changes: 记录变更时按用户本地日期发布失效通知，与按本地日期缓存的结果保持一致
+- input_to_utc / normalize_input: 写入前换算接口传入的时间，不带时区的时间视为用户本地时间
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.config import settings
+from app.services.user_service import load_user
+from app.utils import invalidation_bus
+
+
+@lru_cache(maxsize=128)
+def _zone(tz_name: str) -> ZoneInfo:
+    return ZoneInfo(tz_name)
+
+
+def is_valid_timezone(tz_name: str) -> bool:
+    """
+    检查时区名称是否有效
+
+    Args:
+        tz_name: IANA 时区名称
+
+    Returns:
+        是否有效
+    """
+    try:
+        _zone(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+async def get_user_timezone(user_email: str) -> str:
+    """
+    获取用户时区
+
+    Args:
+        user_email: 用户邮箱
+
+    Returns:
+        IANA 时区名称（用户未设置或设置无效时为默认时区）
+    """
+    user = await load_user(user_email, ["timezone"])
+    tz_name = (user or {}).get("timezone")
+    if tz_name and is_valid_timezone(tz_name):
+        return tz_name
+    return settings.DEFAULT_TIMEZONE
+
+
+def to_utc(local_datetime: datetime, tz_name: str) -> datetime:
+    """本地时间（naive）换算为 UTC（naive，与数据库存储一致）"""
+    aware = local_datetime.replace(tzinfo=_zone(tz_name))
+    return aware.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def input_to_utc(value: Optional[datetime], tz_name: str) -> Optional[datetime]:
+    """
+    接口传入的时间换算为存储用的 UTC 时间
+
+    客户端（如 Android 端）通常发送不带时区的本地时间，按用户时区换算；
+    带时区的时间（如以 Z 结尾）按其自身时区换算。
+
+    Args:
+        value: 请求中的时间（None 原样返回）
+        tz_name: 用户时区名称
+
+    Returns:
+        UTC 时间（naive）
+    """
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return to_utc(value, tz_name)
+
+
+async def normalize_input(user_email: str, value: Optional[datetime]) -> Optional[datetime]:
+    """
+    按用户时区把接口传入的时间换算为 UTC（见 input_to_utc）
+
+    Args:
+        user_email: 用户邮箱
+        value: 请求中的时间
+
+    Returns:
+        UTC 时间（naive）；value 为 None 时返回 None
+    """
+    if value is None:
+        return None
+    return input_to_utc(value, await get_user_timezone(user_email))
+
+
+def to_local(utc_datetime: datetime, tz_name: str) -> datetime:
+    """
+    UTC 时间换算为本地时间
+
+    Args:
+        utc_datetime: UTC 时间（naive 视为 UTC；aware 按其自身时区换算）
+        tz_name: 时区名称
+
+    Returns:
+        本地时间（naive）
+    """
+    if utc_datetime.tzinfo is None:
+        utc_datetime = utc_datetime.replace(tzinfo=timezone.utc)
+    return utc_datetime.astimezone(_zone(tz_name)).replace(tzinfo=None)
+
+
+def local_date(value: datetime, tz_name: str) -> date:
+    """记录时间所在的本地日期"""
+    return to_local(value, tz_name).date()
+
+
+def local_today(tz_name: str) -> date:
+    """用户本地的今天"""
+    return datetime.now(_zone(tz_name)).date()
+
+
+def day_window(start_date: date, end_date: date, tz_name: str) -> Tuple[datetime, datetime]:
+    """
+    本地日期范围对应的 UTC 时间窗口
+
+    Args:
+        start_date: 开始日期（含）
+        end_date: 结束日期（含）
+        tz_name: 时区名称
+
+    Returns:
+        (窗口开始, 窗口结束)，左闭右开
+    """
+    return (
+        to_utc(datetime.combine(start_date, time.min), tz_name),
+        to_utc(datetime.combine(end_date + timedelta(days=1), time.min), tz_name),
+    )
+
+
+def time_range_filter(
+    start_date: Optional[date],
+    end_date: Optional[date],
+    tz_name: str
+) -> Dict[str, datetime]:
+    """
+    本地日期范围对应的查询条件（开始或结束日期可省略）
+
+    Returns:
+        如 {"$gte": 窗口开始, "$lt": 窗口结束}；两者都省略时为空字典
+    """
+    condition: Dict[str, datetime] = {}
+    if start_date:
+        condition["$gte"] = to_utc(datetime.combine(start_date, time.min), tz_name)
+    if end_date:
+        condition["$lt"] = to_utc(datetime.combine(end_date + timedelta(days=1), time.min), tz_name)
+    return condition
+
+
+def date_to_string(field: str, date_format: str, tz_name: str) -> Dict[str, Any]:
+    """
+    按用户时区格式化日期的聚合表达式
+
+    Args:
+        field: 日期字段名（不带 $）
+        date_format: $dateToString 格式
+        tz_name: 时区名称
+
+    Returns:
+        $dateToString 表达式
+    """
+    return {
+        "$dateToString": {
+            "format": date_format,
+            "date": f"${field}",
+            "timezone": tz_name,
+        }
+    }
+
+
+async def publish_changes(topic: str, user_email: str, values: Iterable[Optional[datetime]]) -> None:
+    """
+    发布记录变更通知，受影响日期按用户本地日期计算
+
+    Args:
+        topic: invalidation_bus 主题
+        user_email: 用户邮箱
+        values: 变更记录的时间（None 会被忽略）
+    """
+    tz_name = await get_user_timezone(user_email)
+    dates: Set[date] = set()
+    for value in values:
+        if isinstance(value, datetime):
+            dates.add(local_date(value, tz_name))
+        elif isinstance(value, date):
+            dates.add(value)
+    invalidation_bus.publish(topic, user_email, dates)
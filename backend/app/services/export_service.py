@@ -0,0 +1,557 @@
+"""
+健康报告异步导出服务层
+
+导出任务保存在 export_jobs 集合中，由应用进程内的 worker 领取执行：
+- 创建任务只写入一条 pending 记录，接口立即返回；每个用户排队中和执行中的任务数受
+  EXPORT_MAX_ACTIVE_JOBS_PER_USER 限制，名额保存在 export_job_slots 中按用户原子占用，任务结束时释放
+- worker 通过 find_one_and_update 原子领取任务（多进程部署时不会重复执行），
+  按记录类型依次读取投影后的游标，每 EXPORT_BATCH_SIZE 行写入一次文件并更新进度
+- 执行中的任务定期刷新 heartbeat_at，超过 EXPORT_LEASE_SECONDS 未刷新视为 worker 已退出，可被重新领取；
+  每次领取写入独立的文件（文件名带领取次数），失去租约的 worker 只会删除自己的文件
+- 完成或失败的任务在 EXPORT_JOB_RETENTION_HOURS 后连同文件一起清理
+"""
+import asyncio
+import os
+import socket
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.config import settings
+from app.database import get_database
+from app.services import day_boundary_service
+from app.utils import report_writers
+
+COLLECTION = "export_jobs"
+# 每个用户一条：active_jobs 为占用名额的任务ID列表
+SLOTS_COLLECTION = "export_job_slots"
+
+# 任务状态
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+ACTIVE_STATUSES = (PENDING, RUNNING)
+
+# 同一任务最多被领取的次数（worker 反复异常退出时不再重试）
+MAX_ATTEMPTS = 3
+
+# 过期任务清理间隔（秒）
+CLEANUP_INTERVAL_SECONDS = 600
+
+_worker_id = f"{socket.gethostname()}:{os.getpid()}"
+_worker_tasks: List[asyncio.Task] = []
+_wakeup: Optional[asyncio.Event] = None
+_last_cleanup = 0.0
+
+
+class ExportJobLimitError(Exception):
+    """用户进行中的导出任务数达到上限"""
+    pass
+
+
+def _output_dir() -> Path:
+    base = Path(settings.EXPORT_OUTPUT_DIR)
+    if not base.is_absolute():
+        base = Path(__file__).parent.parent.parent / base  # backend/
+    return base
+
+
+def _download_filename(job: Dict[str, Any]) -> str:
+    extension = report_writers.FILE_EXTENSIONS[job["format"]]
+    return f"health_report_{job['start_date']}_{job['end_date']}{extension}"
+
+
+def to_response_dict(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将任务文档转换为响应字典
+
+    Args:
+        job: export_jobs 文档
+
+    Returns:
+        响应字典（完成的任务带 download_url）
+    """
+    job_id = str(job["_id"])
+    total_rows = job.get("total_rows")
+    rows_written = job.get("rows_written", 0)
+    if job["status"] == COMPLETED:
+        progress = 100.0
+    elif total_rows:
+        progress = round(min(rows_written / total_rows, 1.0) * 100, 1)
+    else:
+        progress = 0.0
+
+    return {
+        "id": job_id,
+        "format": job["format"],
+        "start_date": job["start_date"],
+        "end_date": job["end_date"],
+        "status": job["status"],
+        "progress": progress,
+        "rows_written": rows_written,
+        "total_rows": total_rows,
+        "file_size": job.get("file_size"),
+        "summary": job.get("summary"),
+        "error": job.get("error"),
+        "download_url": (
+            f"/api/visualization/export-jobs/{job_id}/download" if job["status"] == COMPLETED else None
+        ),
+        "created_at": job["created_at"],
+        "finished_at": job.get("finished_at"),
+        "expires_at": job.get("expires_at"),
+    }
+
+
+async def create_export_job(
+    user_email: str,
+    start_date: date,
+    end_date: date,
+    export_format: str
+) -> Dict[str, Any]:
+    """
+    创建导出任务
+
+    Args:
+        user_email: 用户邮箱
+        start_date: 开始日期
+        end_date: 结束日期
+        export_format: 导出格式（csv / jsonl / pdf）
+
+    Returns:
+        任务文档
+
+    Raises:
+        ValueError: 参数无效或格式不可用
+        ExportJobLimitError: 进行中的任务数达到上限
+    """
+    if start_date > end_date:
+        raise ValueError("开始日期不能晚于结束日期")
+    if (end_date - start_date).days + 1 > settings.EXPORT_MAX_DAYS:
+        raise ValueError(f"导出日期范围不能超过 {settings.EXPORT_MAX_DAYS} 天")
+    if export_format not in report_writers.WRITERS:
+        raise ValueError("导出格式必须是 csv, jsonl 或 pdf")
+    if not report_writers.is_format_available(export_format):
+        raise ValueError("服务器未安装 PDF 导出依赖（reportlab），请选择 csv 或 jsonl")
+
+    db = get_database()
+    job_id = ObjectId()
+    # 名额满时先释放已结束任务残留的名额（如 worker 在结束任务后、释放名额前退出）再重试一次
+    if not await _reserve_slot(user_email, job_id):
+        await _prune_slots(user_email)
+        if not await _reserve_slot(user_email, job_id):
+            raise ExportJobLimitError(
+                f"最多同时进行 {settings.EXPORT_MAX_ACTIVE_JOBS_PER_USER} 个导出任务，请等待已有任务完成"
+            )
+
+    job = {
+        "_id": job_id,
+        "user_email": user_email,
+        "format": export_format,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "status": PENDING,
+        "attempts": 0,
+        "rows_written": 0,
+        "total_rows": None,
+        "created_at": datetime.utcnow(),
+    }
+    try:
+        await db[COLLECTION].insert_one(job)
+    except Exception:
+        await _release_slot(user_email, job_id)
+        raise
+
+    if _wakeup is not None:
+        _wakeup.set()
+    return job
+
+
+async def _reserve_slot(user_email: str, job_id: ObjectId) -> bool:
+    """
+    原子占用一个导出名额
+
+    条件更新只在 active_jobs 未满时追加任务ID；已满时 upsert 会因 user_email 唯一索引冲突而失败，
+    并发请求不会同时通过检查。
+
+    Returns:
+        是否占用成功
+    """
+    max_jobs = settings.EXPORT_MAX_ACTIVE_JOBS_PER_USER
+    if max_jobs <= 0:
+        return False
+    db = get_database()
+    try:
+        await db[SLOTS_COLLECTION].update_one(
+            {"user_email": user_email, f"active_jobs.{max_jobs - 1}": {"$exists": False}},
+            {"$push": {"active_jobs": job_id}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+async def _release_slot(user_email: str, job_id: ObjectId) -> None:
+    """释放任务占用的导出名额"""
+    db = get_database()
+    await db[SLOTS_COLLECTION].update_one({"user_email": user_email}, {"$pull": {"active_jobs": job_id}})
+
+
+async def _prune_slots(user_email: str) -> None:
+    """释放已结束或已删除任务残留的名额"""
+    db = get_database()
+    slots = await db[SLOTS_COLLECTION].find_one({"user_email": user_email})
+    job_ids = (slots or {}).get("active_jobs") or []
+    if not job_ids:
+        return
+    active_ids = {
+        job["_id"]
+        async for job in db[COLLECTION].find(
+            {"_id": {"$in": job_ids}, "status": {"$in": list(ACTIVE_STATUSES)}}, {"_id": 1}
+        )
+    }
+    stale_ids = [job_id for job_id in job_ids if job_id not in active_ids]
+    if stale_ids:
+        await db[SLOTS_COLLECTION].update_one(
+            {"user_email": user_email}, {"$pull": {"active_jobs": {"$in": stale_ids}}}
+        )
+
+
+async def get_export_job(job_id: str, user_email: str) -> Optional[Dict[str, Any]]:
+    """
+    获取当前用户的导出任务
+
+    Args:
+        job_id: 任务ID
+        user_email: 用户邮箱
+
+    Returns:
+        任务文档，不存在时返回 None
+    """
+    if not ObjectId.is_valid(job_id):
+        return None
+    db = get_database()
+    return await db[COLLECTION].find_one({"_id": ObjectId(job_id), "user_email": user_email})
+
+
+async def list_export_jobs(user_email: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    获取当前用户最近的导出任务
+
+    Args:
+        user_email: 用户邮箱
+        limit: 返回数量
+
+    Returns:
+        任务文档列表（按创建时间倒序）
+    """
+    db = get_database()
+    cursor = db[COLLECTION].find({"user_email": user_email}).sort("created_at", -1).limit(limit)
+    return await cursor.to_list(length=limit)
+
+
+async def get_export_file(job_id: str, user_email: str) -> Optional[Tuple[Path, str, str]]:
+    """
+    获取已完成任务的导出文件
+
+    Args:
+        job_id: 任务ID
+        user_email: 用户邮箱
+
+    Returns:
+        (文件路径, 下载文件名, 媒体类型)，任务不存在或文件已清理时返回 None
+
+    Raises:
+        ValueError: 任务尚未完成
+    """
+    job = await get_export_job(job_id, user_email)
+    if not job:
+        return None
+    if job["status"] != COMPLETED:
+        raise ValueError("导出任务尚未完成")
+
+    path = _output_dir() / job["file_name"]
+    if not path.is_file():
+        return None
+    return path, _download_filename(job), report_writers.MEDIA_TYPES[job["format"]]
+
+
+# ================== worker ==================
+
+def start_worker() -> None:
+    """在当前事件循环中启动导出 worker（EXPORT_WORKER_CONCURRENCY 为 0 时不启动）"""
+    global _wakeup
+    if _worker_tasks or settings.EXPORT_WORKER_CONCURRENCY <= 0:
+        return
+    try:
+        get_database()
+    except Exception:
+        print("⚠️  数据库未连接，导出 worker 未启动")
+        return
+    _wakeup = asyncio.Event()
+    for slot in range(settings.EXPORT_WORKER_CONCURRENCY):
+        _worker_tasks.append(asyncio.create_task(_worker_loop(slot)))
+
+
+async def stop_worker() -> None:
+    """停止导出 worker（执行中的任务会在租约过期后被重新领取）"""
+    for task in _worker_tasks:
+        task.cancel()
+    await asyncio.gather(*_worker_tasks, return_exceptions=True)
+    _worker_tasks.clear()
+
+
+async def _worker_loop(slot: int) -> None:
+    while True:
+        try:
+            job = await _claim_next_job()
+            if job is not None:
+                await _run_job(job)
+                continue
+            if slot == 0:
+                await _cleanup_expired_jobs()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️  导出 worker 异常: {e}")
+
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=settings.EXPORT_POLL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+
+
+async def _claim_next_job() -> Optional[Dict[str, Any]]:
+    """领取最早创建的待执行任务（包括租约已过期的执行中任务）"""
+    db = get_database()
+    now = datetime.utcnow()
+    return await db[COLLECTION].find_one_and_update(
+        {
+            "$or": [
+                {"status": PENDING},
+                {
+                    "status": RUNNING,
+                    "heartbeat_at": {"$lt": now - timedelta(seconds=settings.EXPORT_LEASE_SECONDS)},
+                },
+            ]
+        },
+        {
+            "$set": {
+                "status": RUNNING,
+                "worker_id": _worker_id,
+                "started_at": now,
+                "heartbeat_at": now,
+                "rows_written": 0,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _update_running_job(job: Dict[str, Any], fields: Dict[str, Any]) -> bool:
+    """更新本 worker 持有的任务；任务已被其他 worker 接管时返回 False"""
+    db = get_database()
+    result = await db[COLLECTION].update_one(
+        {"_id": job["_id"], "status": RUNNING, "worker_id": _worker_id, "attempts": job["attempts"]},
+        {"$set": {**fields, "heartbeat_at": datetime.utcnow()}},
+    )
+    return result.matched_count == 1
+
+
+def _format_time(value: Optional[datetime], tz_name: str) -> Optional[str]:
+    if not value:
+        return None
+    return day_boundary_service.to_local(value, tz_name).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _food_row(record: Dict[str, Any], tz_name: str) -> Dict[str, Any]:
+    nutrition = record.get("nutrition_data") or {}
+    return {
+        "record_type": "food",
+        "time": _format_time(record.get("recorded_at"), tz_name),
+        "name": record.get("food_name"),
+        "meal_type": record.get("meal_type"),
+        "amount": round(record.get("serving_amount", 0) * record.get("serving_size", 0), 2),
+        "unit": record.get("serving_unit"),
+        "calories": nutrition.get("calories"),
+        "protein": nutrition.get("protein"),
+        "carbohydrates": nutrition.get("carbohydrates"),
+        "fat": nutrition.get("fat"),
+        "notes": record.get("notes"),
+    }
+
+
+def _sports_row(record: Dict[str, Any], tz_name: str) -> Dict[str, Any]:
+    return {
+        "record_type": "sports",
+        "time": _format_time(record.get("created_at"), tz_name),
+        "name": record.get("sport_name") or record.get("sport_type"),
+        "duration_minutes": record.get("duration_time"),
+        "calories": record.get("calories_burned"),
+    }
+
+
+def _weight_row(record: Dict[str, Any], tz_name: str) -> Dict[str, Any]:
+    return {
+        "record_type": "weight",
+        "time": _format_time(record.get("recorded_at"), tz_name),
+        "weight": record.get("weight"),
+        "notes": record.get("notes"),
+    }
+
+
+def _export_sources(user_email: str, start_date: date, end_date: date, tz_name: str) -> List[tuple]:
+    """导出数据源：(类型, 集合, 查询条件, 投影, 排序字段, 行转换函数)"""
+    db = get_database()
+    time_range = day_boundary_service.time_range_filter(start_date, end_date, tz_name)
+    return [
+        (
+            "food",
+            db.food_records,
+            {"user_email": user_email, "recorded_at": time_range},
+            {
+                "_id": 0, "food_name": 1, "serving_amount": 1, "serving_size": 1, "serving_unit": 1,
+                "nutrition_data": 1, "recorded_at": 1, "meal_type": 1, "notes": 1,
+            },
+            "recorded_at",
+            _food_row,
+        ),
+        (
+            "sports",
+            db.sports_log,
+            {"created_by": user_email, "created_at": time_range},
+            {"_id": 0, "sport_name": 1, "sport_type": 1, "duration_time": 1, "calories_burned": 1, "created_at": 1},
+            "created_at",
+            _sports_row,
+        ),
+        (
+            "weight",
+            db.weight_records,
+            {"user_email": user_email, "recorded_at": time_range},
+            {"_id": 0, "weight": 1, "recorded_at": 1, "notes": 1},
+            "recorded_at",
+            _weight_row,
+        ),
+    ]
+
+
+async def _run_job(job: Dict[str, Any]) -> None:
+    """执行导出任务：逐批读取记录并写入文件"""
+    if job["attempts"] > MAX_ATTEMPTS:
+        await _finish_job(job, {"status": FAILED, "error": "导出任务多次中断，已停止重试"})
+        return
+
+    start_date = date.fromisoformat(job["start_date"])
+    end_date = date.fromisoformat(job["end_date"])
+    tz_name = await day_boundary_service.get_user_timezone(job["user_email"])
+    sources = _export_sources(job["user_email"], start_date, end_date, tz_name)
+
+    output_dir = _output_dir()
+    # 每次领取写入独立的文件：租约被接管后，原 worker 的清理不会影响新 worker 的文件
+    file_name = f"{job['_id']}-{job['attempts']}{report_writers.FILE_EXTENSIONS[job['format']]}"
+    path = output_dir / file_name
+    writer = None
+    try:
+        counts = {}
+        for record_type, collection, query, _, _, _ in sources:
+            counts[record_type] = await collection.count_documents(query)
+        if not await _update_running_job(job, {"total_rows": sum(counts.values())}):
+            return
+
+        await asyncio.to_thread(output_dir.mkdir, parents=True, exist_ok=True)
+        meta = {"user_email": job["user_email"], "start_date": job["start_date"], "end_date": job["end_date"]}
+        writer = await asyncio.to_thread(report_writers.open_writer, job["format"], path, meta)
+
+        rows_written = 0
+        total_intake = 0.0
+        total_burned = 0.0
+        for record_type, collection, query, projection, sort_field, to_row in sources:
+            batch: List[Dict[str, Any]] = []
+            cursor = collection.find(query, projection).sort(sort_field, 1).batch_size(settings.EXPORT_BATCH_SIZE)
+            async for record in cursor:
+                row = to_row(record, tz_name)
+                if record_type == "food":
+                    total_intake += row["calories"] or 0
+                elif record_type == "sports":
+                    total_burned += row["calories"] or 0
+                batch.append(row)
+                if len(batch) >= settings.EXPORT_BATCH_SIZE:
+                    await asyncio.to_thread(writer.write_rows, batch)
+                    rows_written += len(batch)
+                    batch = []
+                    if not await _update_running_job(job, {"rows_written": rows_written}):
+                        raise RuntimeError("导出任务已被其他 worker 接管")
+            if batch:
+                await asyncio.to_thread(writer.write_rows, batch)
+                rows_written += len(batch)
+
+        summary = {
+            "food_records": counts["food"],
+            "sports_records": counts["sports"],
+            "weight_records": counts["weight"],
+            "total_intake_calories": round(total_intake, 2),
+            "total_burned_calories": round(total_burned, 2),
+        }
+        await asyncio.to_thread(writer.close, summary)
+        writer = None
+
+        file_size = (await asyncio.to_thread(path.stat)).st_size
+        completed = await _finish_job(job, {
+            "status": COMPLETED,
+            "file_name": file_name,
+            "file_size": file_size,
+            "rows_written": rows_written,
+            "summary": summary,
+        })
+        if not completed:
+            await asyncio.to_thread(path.unlink, missing_ok=True)
+    except Exception as e:
+        if writer is not None:
+            try:
+                await asyncio.to_thread(writer.close)
+            except Exception:
+                pass
+        await asyncio.to_thread(path.unlink, missing_ok=True)
+        print(f"⚠️  导出任务 {job['_id']} 失败: {e}")
+        await _finish_job(job, {"status": FAILED, "error": str(e)})
+
+
+async def _finish_job(job: Dict[str, Any], fields: Dict[str, Any]) -> bool:
+    now = datetime.utcnow()
+    finished = await _update_running_job(job, {
+        **fields,
+        "finished_at": now,
+        "expires_at": now + timedelta(hours=settings.EXPORT_JOB_RETENTION_HOURS),
+    })
+    if finished:
+        await _release_slot(job["user_email"], job["_id"])
+    return finished
+
+
+async def _cleanup_expired_jobs() -> None:
+    """删除过期任务及其导出文件（每 CLEANUP_INTERVAL_SECONDS 最多执行一次）"""
+    global _last_cleanup
+    if time.monotonic() - _last_cleanup < CLEANUP_INTERVAL_SECONDS:
+        return
+    _last_cleanup = time.monotonic()
+
+    db = get_database()
+    output_dir = _output_dir()
+    async for job in db[COLLECTION].find(
+        {"expires_at": {"$lt": datetime.utcnow()}}, {"_id": 1, "file_name": 1}
+    ):
+        # 包括异常退出的 worker 留下的其他领取次数的文件
+        for path in await asyncio.to_thread(lambda: list(output_dir.glob(f"{job['_id']}-*"))):
+            await asyncio.to_thread(path.unlink, missing_ok=True)
+        if job.get("file_name"):
+            await asyncio.to_thread((output_dir / job["file_name"]).unlink, missing_ok=True)
+        await db[COLLECTION].delete_one({"_id": job["_id"]})
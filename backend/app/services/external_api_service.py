@@ -21,6 +21,7 @@ from app.config_external_api import (
     EXTERNAL_API_TIMEOUT,
     EXTERNAL_API_ENABLED
 )
+from app.utils import metrics
 
 
 # Token缓存（每个账号独立缓存）
@@ -48,6 +49,7 @@ def _switch_to_next_account():
         if not BOOHEE_ACCOUNTS:
             return
         _current_account_index = (_current_account_index + 1) % len(BOOHEE_ACCOUNTS)
+        metrics.boohee_account_switches_total.inc()
         # 清除当前账号的token缓存
         if _current_account_index in _token_cache:
             del _token_cache[_current_account_index]
@@ -63,6 +65,23 @@ def _clear_token_cache(account_index: Optional[int] = None):
         _token_cache.clear()
 
 
+def get_client_health() -> Dict[str, Any]:
+    """获取薄荷API客户端状态（账号数量、当前账号、有效Token缓存数量）"""
+    now = datetime.now()
+    with _current_account_index_lock:
+        current_index = _current_account_index
+    valid_tokens = sum(
+        1 for cache in _token_cache.values()
+        if cache.get('expires_at') and cache['expires_at'] > now
+    )
+    return {
+        "enabled": EXTERNAL_API_ENABLED,
+        "accounts": len(BOOHEE_ACCOUNTS),
+        "current_account_index": current_index,
+        "cached_tokens": valid_tokens,
+    }
+
+
 def _generate_signature(params: Dict[str, Any], app_key: str) -> str:
     """
     生成API请求签名（根据官方文档）
@@ -160,7 +179,13 @@ async def _get_access_token(account_index: Optional[int] = None) -> Optional[str
         
         # 请求Token
         async with httpx.AsyncClient(timeout=EXTERNAL_API_TIMEOUT) as client:
-            response = await client.post(url, data=params)
+            started = time.perf_counter()
+            try:
+                response = await client.post(url, data=params)
+            except Exception:
+                metrics.observe_external_call("boohee", started, success=False)
+                raise
+            metrics.observe_external_call("boohee", started, success=response.status_code == 200)
             
             try:
                 result = response.json()
@@ -253,6 +278,7 @@ async def _call_boohee_api(endpoint: str, params: Dict[str, Any], method: str =
         
         # 发送请求（AccessToken通过Header传递）
         async with httpx.AsyncClient(timeout=EXTERNAL_API_TIMEOUT, follow_redirects=True) as client:
+            started = time.perf_counter()
             try:
                 if method.upper() == 'GET':
                     response = await client.get(
@@ -283,7 +309,9 @@ async def _call_boohee_api(endpoint: str, params: Dict[str, Any], method: str =
                             headers={'AccessToken': token}
                         )
             except Exception:
+                metrics.observe_external_call("boohee", started, success=False)
                 return None
+            metrics.observe_external_call("boohee", started, success=response.status_code == 200)
             
             try:
                 result = response.json()
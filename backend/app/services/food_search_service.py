@@ -0,0 +1,202 @@
+"""
+本地食物搜索服务层
+
+维护进程内的 FoodSearchIndex（拼音 / 容错 / BM25 排序，见 app.utils.food_search_index）：
+- 首次搜索时从 foods 集合全量构建（只投影名称、品牌、创建者、创建时间），构建在线程中进行
+- 本进程内的食物增删改通过 index_food / remove_food 增量更新
+- FOOD_SEARCH_INDEX_REFRESH_SECONDS 后在后台重建，兜底多 worker 部署时其他进程的写入
+- 热度加权读取 popularity_counters（见 popularity_service）：用户常吃的前 FOOD_SEARCH_POPULARITY_LIMIT 种食物
+  （按用户缓存，饮食记录变更时失效），以及随索引一起刷新的全站热门食物
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.config import settings
+from app.database import get_database
+from app.services import popularity_service
+from app.utils import invalidation_bus
+from app.utils.food_search_index import FoodSearchIndex, SearchHit
+
+# 全量构建索引的查询注释（查询计划回归测试据此识别这条有意的全表读取）
+BUILD_QUERY_COMMENT = "food_search_index_build"
+
+_index: Optional[FoodSearchIndex] = None
+_built_at = 0.0
+_build_task: Optional[asyncio.Task] = None
+# 构建期间发生的增量变更：("upsert", 食物) / ("remove", 食物ID)，构建完成后重放到新索引
+_changes_during_build: Optional[List[Tuple[str, object]]] = None
+
+# 全站热门食物：食物ID -> 衰减后的记录次数（随索引重建刷新）
+_global_counts: Dict[str, float] = {}
+# 用户邮箱 -> (过期时间戳, 食物ID -> 衰减后的记录次数)
+_log_counts: Dict[str, Tuple[float, Dict[str, float]]] = {}
+MAX_CACHED_USERS = 5000
+
+
+def _upsert(index: FoodSearchIndex, food: dict) -> None:
+    index.upsert(
+        str(food["_id"]),
+        food.get("name"),
+        food.get("brand"),
+        food.get("created_by"),
+        food.get("created_at"),
+    )
+
+
+def _build_from(foods: List[dict]) -> FoodSearchIndex:
+    index = FoodSearchIndex()
+    for food in foods:
+        _upsert(index, food)
+    return index
+
+
+async def _load_counts(scope: str) -> Dict[str, float]:
+    top = await popularity_service.top_items(
+        popularity_service.FOOD, scope, limit=settings.FOOD_SEARCH_POPULARITY_LIMIT
+    )
+    return {item["item_id"]: item["count"] for item in top}
+
+
+async def _rebuild() -> None:
+    global _index, _built_at, _changes_during_build, _global_counts
+    _changes_during_build = []
+    try:
+        db = get_database()
+        foods = await db.foods.find(
+            {}, {"name": 1, "brand": 1, "created_by": 1, "created_at": 1}, comment=BUILD_QUERY_COMMENT
+        ).to_list(length=None)
+        try:
+            _global_counts = await _load_counts(popularity_service.GLOBAL_SCOPE)
+        except Exception as e:
+            print(f"⚠️  读取全站热门食物失败: {e}")
+        index = await asyncio.to_thread(_build_from, foods)
+        # 重放与替换之间没有 await，期间不会再有新的变更
+        for action, payload in _changes_during_build:
+            if action == "upsert":
+                _upsert(index, payload)
+            else:
+                index.remove(payload)
+        _index, _built_at = index, time.monotonic()
+    finally:
+        _changes_during_build = None
+
+
+async def _get_index() -> Optional[FoodSearchIndex]:
+    """获取索引：尚未构建时等待构建完成，过期时返回当前索引并在后台重建"""
+    global _build_task
+    if not settings.FOOD_SEARCH_INDEX_ENABLED:
+        return None
+    stale = _index is None or time.monotonic() - _built_at > settings.FOOD_SEARCH_INDEX_REFRESH_SECONDS
+    if stale and (_build_task is None or _build_task.done()):
+        _build_task = asyncio.create_task(_rebuild())
+    if _index is None:
+        try:
+            await asyncio.shield(_build_task)
+        except Exception as e:
+            print(f"⚠️  构建食物搜索索引失败: {e}")
+            return None
+    return _index
+
+
+def invalidate() -> None:
+    """标记索引过期（如后台初始化批量写入公共食物后），下次搜索时重建"""
+    global _built_at
+    _built_at = 0.0
+
+
+def index_food(food: dict) -> None:
+    """
+    食物创建或更新后同步到索引
+
+    Args:
+        food: 食物文档（至少包含 _id、name、brand、created_by）
+    """
+    if _changes_during_build is not None:
+        _changes_during_build.append(("upsert", food))
+    if _index is not None:
+        _upsert(_index, food)
+
+
+def remove_food(food_id: str) -> None:
+    """食物删除后从索引移除"""
+    if _changes_during_build is not None:
+        _changes_during_build.append(("remove", food_id))
+    if _index is not None:
+        _index.remove(food_id)
+
+
+async def _get_log_counts(user_email: str) -> Dict[str, float]:
+    """用户常吃食物的衰减后记录次数"""
+    entry = _log_counts.get(user_email)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+
+    counts = await _load_counts(user_email)
+
+    if len(_log_counts) >= MAX_CACHED_USERS:
+        _log_counts.clear()
+    _log_counts[user_email] = (time.monotonic() + settings.FOOD_SEARCH_INDEX_REFRESH_SECONDS, counts)
+    return counts
+
+
+async def search(keyword: str, user_email: Optional[str], limit: int = 20) -> Optional[List[SearchHit]]:
+    """
+    在本地食物中搜索（支持拼音、首字母和错别字）
+
+    Args:
+        keyword: 搜索关键词
+        user_email: 用户邮箱（可见其自建食物，并按其记录次数加权；全站热门食物同样加权）
+        limit: 返回数量
+
+    Returns:
+        按相关性排序的结果；索引不可用时返回 None（调用方回退到正则搜索）
+    """
+    index = await _get_index()
+    if index is None:
+        return None
+    owners = ["all"] + ([user_email] if user_email else [])
+    log_counts = await _get_log_counts(user_email) if user_email else {}
+    return index.search(
+        keyword,
+        owners,
+        preferred_owner=user_email,
+        log_counts=log_counts,
+        global_counts=_global_counts,
+        limit=limit,
+    )
+
+
+async def find_foods(hits: List[SearchHit]) -> List[dict]:
+    """
+    按搜索结果的顺序读取食物文档（已被删除的食物会被跳过）
+
+    Args:
+        hits: search 返回的结果
+
+    Returns:
+        食物文档列表（_id 为字符串）
+    """
+    if not hits:
+        return []
+    db = get_database()
+    foods = await db.foods.find(
+        {"_id": {"$in": [ObjectId(hit.food_id) for hit in hits]}}
+    ).to_list(length=len(hits))
+    by_id = {str(food["_id"]): food for food in foods}
+    ordered = []
+    for hit in hits:
+        food = by_id.get(hit.food_id)
+        if food is not None:
+            food["_id"] = hit.food_id
+            ordered.append(food)
+    return ordered
+
+
+def _handle_food_records_change(user_email: str, dates) -> None:
+    _log_counts.pop(user_email, None)
+
+
+invalidation_bus.subscribe(invalidation_bus.FOOD_RECORDS, _handle_food_records_change)
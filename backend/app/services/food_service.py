@@ -1,6 +1,8 @@
+import re
 from typing import Optional, List, Dict, Any
 from datetime import datetime, date
 from fastapi import UploadFile, HTTPException, status
+from app.config import settings
 from app.database import get_database
 from app.models.food import (
     FoodInDB,
@@ -15,9 +17,17 @@ from app.schemas.food import (
     FoodRecordCreateRequest,
     FoodRecordUpdateRequest,
 )
-from app.services import external_api_service
+from app.services import (
+    day_boundary_service,
+    external_api_service,
+    food_search_service,
+    popularity_service,
+    quick_log_service,
+)
+from app.utils import catalog_cache, dashboard_cache, invalidation_bus
 from app.utils.image_storage import save_food_image, get_image_url, delete_food_image
 from bson import ObjectId
+from pymongo.errors import BulkWriteError
 
 
 # ========== 食物管理 ==========
@@ -170,20 +180,24 @@ async def create_food(food_data: FoodCreateRequest, creator_email: Optional[str]
     food_dict = food.dict()
     result = await db.foods.insert_one(food_dict)
     food_dict["_id"] = str(result.inserted_id)
+    food_search_service.index_food(food_dict)
     
     return food_dict
 
 
 async def get_food_by_id(food_id: str) -> Optional[dict]:
-    """根据ID获取食物信息"""
-    db = get_database()
-    try:
-        food = await db.foods.find_one({"_id": ObjectId(food_id)})
-        if food:
-            food["_id"] = str(food["_id"])
-        return food
-    except Exception:
-        return None
+    """根据ID获取食物信息（结果会缓存，食物更新/删除时失效）"""
+    async def load():
+        db = get_database()
+        try:
+            food = await db.foods.find_one({"_id": ObjectId(food_id)})
+            if food:
+                food["_id"] = str(food["_id"])
+            return food
+        except Exception:
+            return None
+
+    return await catalog_cache.get_or_load(catalog_cache.FOOD_NAMESPACE, food_id, load)
 
 
 async def get_boohee_food_by_identifier(
@@ -345,6 +359,8 @@ async def _cache_boohee_food_item(
         )
         existing.update(payload)
         existing["_id"] = str(existing["_id"])
+        catalog_cache.invalidate(catalog_cache.FOOD_NAMESPACE, existing["_id"])
+        food_search_service.index_food(existing)
         return existing
 
     payload["created_at"] = datetime.utcnow()
@@ -352,6 +368,7 @@ async def _cache_boohee_food_item(
 
     result = await db.foods.insert_one(payload)
     payload["_id"] = str(result.inserted_id)
+    food_search_service.index_food(payload)
     return payload
 
 
@@ -360,10 +377,18 @@ async def _search_local_foods(
     user_email: Optional[str],
     include_full_nutrition: bool,
     limit: int = 20,
-) -> List[Dict[str, Any]]:
+) -> tuple[List[Dict[str, Any]], int]:
+    """
+    搜索本地食物（有关键词时使用本地搜索索引，支持拼音和错别字）
+
+    Returns:
+        (搜索结果列表, 强匹配数量)；强匹配指名称/品牌/拼音完全、前缀、包含或容错匹配，
+        正则回退路径的强匹配数量为 0
+    """
     db = get_database()
     remaining = max(limit, 0)
     results: List[Dict[str, Any]] = []
+    strong_matches = 0
 
     def build_query(created_by_value: str) -> Dict[str, Any]:
         filters = []
@@ -395,12 +420,23 @@ async def _search_local_foods(
             )
         return remaining_limit - len(foods_inner)
 
-    # 先获取用户自建食物
-    if user_email:
-        remaining = await fetch_and_append(build_query(user_email), remaining)
+    hits = await food_search_service.search(keyword, user_email, remaining) if keyword else None
+    if hits is not None:
+        strong_matches = sum(1 for hit in hits if hit.strong)
+        for food in await food_search_service.find_foods(hits):
+            results.append(
+                _convert_local_food_to_search_item(
+                    food,
+                    include_full_nutrition=include_full_nutrition,
+                )
+            )
+    else:
+        # 先获取用户自建食物
+        if user_email:
+            remaining = await fetch_and_append(build_query(user_email), remaining)
 
-    # 再获取所有人可见的食物 (created_by="all")
-    remaining = await fetch_and_append(build_query("all"), remaining)
+        # 再获取所有人可见的食物 (created_by="all")
+        remaining = await fetch_and_append(build_query("all"), remaining)
 
     # 通过Pydantic规范化数据结构
     normalized: List[Dict[str, Any]] = []
@@ -410,7 +446,7 @@ async def _search_local_foods(
         except Exception:
             normalized.append(item)
 
-    return normalized
+    return normalized, strong_matches
 
 
 async def search_local_foods_only(
@@ -421,7 +457,8 @@ async def search_local_foods_only(
     """
     仅搜索本地数据库中的食物（不调用薄荷API）
     
-    用户自己创建的食物会排在最前面
+    有关键词时通过本地搜索索引按相关性排序（支持拼音、首字母和错别字，用户自建和常记录的食物加权）；
+    没有关键词或索引不可用时，用户自己创建的食物排在最前面
     
     Args:
         keyword: 搜索关键词
@@ -429,9 +466,17 @@ async def search_local_foods_only(
         limit: 返回数量限制
     
     Returns:
-        本地食物列表，用户自己的食物在前，公共食物在后
+        本地食物列表
     """
     db = get_database()
+
+    if keyword:
+        hits = await food_search_service.search(keyword, user_email, limit)
+        if hits is not None:
+            foods = await food_search_service.find_foods(hits)
+            for food in foods:
+                food["food_id"] = food["_id"]
+            return foods
     
     # 构建关键词搜索条件
     keyword_condition = {}
@@ -477,6 +522,154 @@ async def search_local_foods_only(
     return result
 
 
+async def match_local_foods_by_names(
+    names: List[str],
+    user_email: Optional[str],
+) -> tuple[Dict[str, dict], set]:
+    """
+    批量按名称匹配本地食物
+
+    先用一次 name 精确 $in 查询（命中 name 索引）匹配所有名称；没有精确命中的名称再用一次聚合做
+    名称/品牌包含匹配（每个名称一个 $facet 子管道，只取用户自建和公共食物中最新的各一条）。
+    无论名称多少，最多两次数据库往返，也不会把大量子串命中读入内存。
+    同一匹配方式下用户自建食物优先于公共食物，同一来源内取创建时间最新的一条。
+
+    Args:
+        names: 待匹配的食物名称列表
+        user_email: 用户邮箱
+
+    Returns:
+        (名称 -> 最佳匹配食物 的字典, 已被占用的食物名称集合)
+        已占用名称包含任何用户创建的同名食物，用于判断能否以该名称新建食物
+    """
+    db = get_database()
+
+    unique_names = list(dict.fromkeys(name for name in names if name))
+    if not unique_names:
+        return {}, set()
+
+    owners = ["all"] + ([user_email] if user_email else [])
+
+    def pick(foods: List[dict]) -> Optional[dict]:
+        # 候选已按创建时间倒序排列：用户自建的第一条优先，否则取第一条公共食物
+        visible = [food for food in foods if food.get("created_by") in owners]
+        own = [food for food in visible if user_email and food.get("created_by") == user_email]
+        return (own or visible or [None])[0]
+
+    # 1. 精确名称匹配（同时得到已被任何用户占用的名称）
+    exact = await db.foods.find({"name": {"$in": unique_names}}).sort("created_at", -1).to_list(length=None)
+    taken_names = {food.get("name") for food in exact}
+    best_by_name: Dict[str, dict] = {}
+    for name in unique_names:
+        best = pick([food for food in exact if food.get("name") == name])
+        if best is not None:
+            best_by_name[name] = best
+
+    # 2. 其余名称在一次聚合中做包含匹配：每个名称一个 $facet 子管道，
+    #    按创建者分组各取最新的一条，结果大小与候选数量无关
+    unmatched = [name for name in unique_names if name not in best_by_name]
+    if unmatched:
+        def contains(name: str) -> dict:
+            pattern = re.escape(name)
+            return {
+                "$or": [
+                    {"name": {"$regex": pattern, "$options": "i"}},
+                    {"brand": {"$regex": pattern, "$options": "i"}},
+                ]
+            }
+
+        facets = {
+            f"n{position}": [
+                {"$match": contains(name)},
+                {"$sort": {"created_at": -1}},
+                {"$group": {"_id": "$created_by", "food": {"$first": "$$ROOT"}}},
+            ]
+            for position, name in enumerate(unmatched)
+        }
+        result = await db.foods.aggregate([
+            {"$match": {"created_by": {"$in": owners}, "$or": [contains(name) for name in unmatched]}},
+            {"$facet": facets},
+        ]).to_list(length=1)
+        grouped = result[0] if result else {}
+        for position, name in enumerate(unmatched):
+            candidates = {group["_id"]: group["food"] for group in grouped.get(f"n{position}", [])}
+            best = candidates.get(user_email) if user_email else None
+            best = best or candidates.get("all")
+            if best is not None:
+                best_by_name[name] = best
+
+    matches: Dict[str, dict] = {}
+    for name, best in best_by_name.items():
+        matched = dict(best)
+        matched["_id"] = str(best["_id"])
+        matched["food_id"] = matched["_id"]
+        matches[name] = matched
+
+    return matches, taken_names
+
+
+async def create_foods_bulk(
+    foods_data: List[FoodCreateRequest],
+    creator_email: Optional[str] = None,
+) -> List[dict]:
+    """
+    批量创建食物（一次 insert_many）
+
+    调用方需保证名称不与已有食物重复（可先通过 match_local_foods_by_names 获取已占用名称），
+    本函数仅对本批次内的重名做去重。
+
+    Args:
+        foods_data: 食物数据列表
+        creator_email: 创建者邮箱（None表示系统食物）
+
+    Returns:
+        成功创建的食物信息列表（与去重后的输入顺序一致，写入失败的食物不在其中）
+    """
+    db = get_database()
+
+    food_dicts = []
+    seen_names = set()
+    for food_data in foods_data:
+        if food_data.name in seen_names:
+            continue
+        seen_names.add(food_data.name)
+        food = FoodInDB(
+            name=food_data.name,
+            category=food_data.category,
+            serving_size=food_data.serving_size,
+            serving_unit=food_data.serving_unit,
+            nutrition_per_serving=food_data.nutrition_per_serving,
+            full_nutrition=food_data.full_nutrition,
+            brand=food_data.brand,
+            barcode=food_data.barcode,
+            image_url=None,
+            source="local",
+            created_by=creator_email,
+        )
+        food_dicts.append(food.dict())
+
+    if not food_dicts:
+        return []
+
+    # insert_many 会为每个文档写入 _id；ordered=False 时单条失败不影响其他文档写入
+    failed_positions = set()
+    try:
+        await db.foods.insert_many(food_dicts, ordered=False)
+    except BulkWriteError as e:
+        failed_positions = {error["index"] for error in e.details.get("writeErrors", [])}
+        print(f"⚠️  批量创建食物部分失败（{len(failed_positions)}/{len(food_dicts)}）: {e}")
+
+    created = []
+    for position, food_dict in enumerate(food_dicts):
+        if position in failed_positions:
+            continue
+        food_dict["_id"] = str(food_dict["_id"])
+        food_search_service.index_food(food_dict)
+        created.append(food_dict)
+
+    return created
+
+
 async def search_foods(
     keyword: Optional[str] = None,
     page: int = 1,
@@ -485,7 +678,7 @@ async def search_foods(
 ) -> Dict[str, Any]:
     """优先搜索本地食物，再从薄荷健康补充结果"""
 
-    local_foods = await _search_local_foods(
+    local_foods, strong_matches = await _search_local_foods(
         keyword=keyword,
         user_email=user_email,
         include_full_nutrition=include_full_nutrition,
@@ -493,8 +686,10 @@ async def search_foods(
 
     boohee_result = {"page": page, "total_pages": 0, "foods": []}
 
-    # 只有提供关键词时才调用薄荷健康接口
-    if keyword:
+    # 只有提供关键词时才调用薄荷健康接口；第一页本地强匹配已足够多时不再调用
+    skip_threshold = settings.FOOD_SEARCH_SKIP_EXTERNAL_MIN_MATCHES
+    local_sufficient = page == 1 and skip_threshold > 0 and strong_matches >= skip_threshold
+    if keyword and not local_sufficient:
         boohee_result = await external_api_service.search_foods(
             keyword=keyword,
             page=page,
@@ -699,9 +894,11 @@ async def update_food(
         {"$set": update_data},
         return_document=True
     )
+    catalog_cache.invalidate(catalog_cache.FOOD_NAMESPACE, food_id)
     
     if result:
         result["_id"] = str(result["_id"])
+        food_search_service.index_food(result)
     
     return result
 
@@ -736,6 +933,7 @@ async def update_food_image_url(food_id: str, image_url: str, user_email: str) -
             {"_id": ObjectId(food_id), "created_by": user_email},
             {"$set": {"image_url": image_url, "updated_at": datetime.utcnow()}}
         )
+        catalog_cache.invalidate(catalog_cache.FOOD_NAMESPACE, food_id)
         
         if result.modified_count == 0:
             raise ValueError("更新失败：未找到匹配的记录")
@@ -783,6 +981,8 @@ async def delete_food(food_id: str, user_email: str) -> bool:
             "_id": ObjectId(food_id),
             "created_by": user_email
         })
+        catalog_cache.invalidate(catalog_cache.FOOD_NAMESPACE, food_id)
+        food_search_service.remove_food(food_id)
         return result.deleted_count > 0
     except Exception:
         return False
@@ -830,6 +1030,7 @@ async def create_food_record(
         else None
     )
 
+    recorded_at = await day_boundary_service.normalize_input(user_email, record_data.recorded_at)
     record = FoodRecordInDB(
         user_email=user_email,
         food_name=food_name,
@@ -838,7 +1039,7 @@ async def create_food_record(
         serving_unit=serving_unit,
         nutrition_data=nutrition_snapshot,
         full_nutrition=full_nutrition_snapshot,
-        recorded_at=record_data.recorded_at,
+        recorded_at=recorded_at,
         meal_type=record_data.meal_type,
         notes=record_data.notes,
         food_id=food_identifier,
@@ -847,6 +1048,18 @@ async def create_food_record(
     record_dict = record.dict()
     result = await db.food_records.insert_one(record_dict)
     record_dict["_id"] = str(result.inserted_id)
+    await popularity_service.record_logs(user_email, popularity_service.FOOD, [(food_identifier, food_name)])
+    await quick_log_service.record_item(
+        user_email,
+        quick_log_service.FOOD,
+        food_identifier,
+        food_name,
+        meal_type=record_data.meal_type,
+        serving_amount=record_data.serving_amount,
+        serving_size=base_serving_size,
+        serving_unit=serving_unit,
+    )
+    await day_boundary_service.publish_changes(invalidation_bus.FOOD_RECORDS, user_email, [recorded_at])
 
     return record_dict
 
@@ -878,13 +1091,10 @@ async def get_food_records(
     # 构建查询条件
     query = {"user_email": user_email}
     
-    # 日期范围筛选
+    # 日期范围筛选（按用户本地日期）
     if start_date or end_date:
-        query["recorded_at"] = {}
-        if start_date:
-            query["recorded_at"]["$gte"] = datetime.combine(start_date, datetime.min.time())
-        if end_date:
-            query["recorded_at"]["$lte"] = datetime.combine(end_date, datetime.max.time())
+        tz_name = await day_boundary_service.get_user_timezone(user_email)
+        query["recorded_at"] = day_boundary_service.time_range_filter(start_date, end_date, tz_name)
     
     # 餐次筛选
     if meal_type:
@@ -909,7 +1119,7 @@ async def get_daily_nutrition_summary(
     target_date: date
 ) -> Dict:
     """
-    获取某日的营养摘要
+    获取某日的营养摘要（按用户和日期缓存，当天饮食记录变更时失效）
     
     Args:
         user_email: 用户邮箱
@@ -918,17 +1128,28 @@ async def get_daily_nutrition_summary(
     Returns:
         营养摘要数据
     """
+    return await dashboard_cache.get_or_load(
+        user_email,
+        dashboard_cache.DAILY_NUTRITION,
+        target_date,
+        target_date,
+        lambda: _compute_daily_nutrition_summary(user_email, target_date),
+    )
+
+
+async def _compute_daily_nutrition_summary(user_email: str, target_date: date) -> Dict:
+    """查询并汇总某日的饮食记录"""
     db = get_database()
     
-    # 查询当天的所有记录
-    start_datetime = datetime.combine(target_date, datetime.min.time())
-    end_datetime = datetime.combine(target_date, datetime.max.time())
+    # 查询当天（用户本地日期）的所有记录
+    tz_name = await day_boundary_service.get_user_timezone(user_email)
+    start_datetime, end_datetime = day_boundary_service.day_window(target_date, target_date, tz_name)
     
     query = {
         "user_email": user_email,
         "recorded_at": {
             "$gte": start_datetime,
-            "$lte": end_datetime
+            "$lt": end_datetime
         }
     }
     
@@ -1007,7 +1228,7 @@ async def update_food_record(
     if record_data.full_nutrition is not None:
         update_data["full_nutrition"] = record_data.full_nutrition.dict() if record_data.full_nutrition else None
     if record_data.recorded_at is not None:
-        update_data["recorded_at"] = record_data.recorded_at
+        update_data["recorded_at"] = await day_boundary_service.normalize_input(user_email, record_data.recorded_at)
     if record_data.meal_type is not None:
         update_data["meal_type"] = record_data.meal_type
     if record_data.notes is not None:
@@ -1024,6 +1245,11 @@ async def update_food_record(
         {"$set": update_data},
         return_document=True
     )
+    await day_boundary_service.publish_changes(
+        invalidation_bus.FOOD_RECORDS,
+        user_email,
+        [record.get("recorded_at"), update_data.get("recorded_at")],
+    )
     
     if result:
         result["_id"] = str(result["_id"])
@@ -1044,13 +1270,86 @@ async def delete_food_record(record_id: str, user_email: str) -> bool:
     """
     db = get_database()
     try:
-        result = await db.food_records.delete_one({
-            "_id": ObjectId(record_id),
-            "user_email": user_email
-        })
-        return result.deleted_count > 0
+        deleted = await db.food_records.find_one_and_delete(
+            {"_id": ObjectId(record_id), "user_email": user_email},
+            projection={"recorded_at": 1},
+        )
     except Exception:
         return False
+    if not deleted:
+        return False
+    await day_boundary_service.publish_changes(
+        invalidation_bus.FOOD_RECORDS, user_email, [deleted.get("recorded_at")]
+    )
+    return True
+
+
+async def copy_food_records(
+    user_email: str,
+    source_date: date,
+    target_date: date,
+    meal_type: Optional[str] = None,
+    target_meal_type: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    把某天（或某天某餐）的饮食记录复制到另一天
+    
+    记录中的营养数据是记录时的快照，直接复制，不重新读取食物或计算营养；
+    所有副本通过一次 insert_many 写入，再发布一次变更通知（看板缓存、趋势变更日志随之更新）。
+    
+    Args:
+        user_email: 用户邮箱
+        source_date: 来源日期（用户本地日期）
+        target_date: 目标日期（用户本地日期）
+        meal_type: 只复制该餐次的记录（为空时复制整天）
+        target_meal_type: 副本使用的餐次（为空时沿用原餐次）
+    
+    Returns:
+        {"records": 新记录列表（按记录时间升序）, "recipe_batch_ids": 新的食谱记录批次ID列表}
+    """
+    if source_date == target_date and (target_meal_type is None or target_meal_type == meal_type):
+        raise ValueError("来源和目标相同，无需复制")
+    
+    db = get_database()
+    tz_name = await day_boundary_service.get_user_timezone(user_email)
+    start_datetime, end_datetime = day_boundary_service.day_window(source_date, source_date, tz_name)
+    query = {
+        "user_email": user_email,
+        "recorded_at": {"$gte": start_datetime, "$lt": end_datetime},
+    }
+    if meal_type:
+        query["meal_type"] = meal_type
+    
+    sources = await db.food_records.find(query).sort("recorded_at", 1).to_list(length=None)
+    if not sources:
+        raise ValueError("来源日期没有可复制的饮食记录" if not meal_type else f"来源日期没有{meal_type}的饮食记录")
+    
+    # 同一食谱记录的副本共用一个新的批次ID
+    batch_ids: Dict[str, str] = {}
+    now = datetime.utcnow()
+    copies = []
+    for source in sources:
+        copy = {key: value for key, value in source.items() if key != "_id"}
+        local_time = day_boundary_service.to_local(source["recorded_at"], tz_name).time()
+        copy["recorded_at"] = day_boundary_service.to_utc(datetime.combine(target_date, local_time), tz_name)
+        copy["created_at"] = now
+        if target_meal_type:
+            copy["meal_type"] = target_meal_type
+        batch_id = source.get("recipe_record_batch_id")
+        if batch_id:
+            copy["recipe_record_batch_id"] = batch_ids.setdefault(batch_id, str(ObjectId()))
+        copies.append(copy)
+    
+    result = await db.food_records.insert_many(copies)
+    for copy, inserted_id in zip(copies, result.inserted_ids):
+        copy["_id"] = str(inserted_id)
+    
+    await popularity_service.record_logs(
+        user_email, popularity_service.FOOD, [(copy.get("food_id"), copy.get("food_name")) for copy in copies]
+    )
+    await day_boundary_service.publish_changes(invalidation_bus.FOOD_RECORDS, user_email, [target_date])
+    
+    return {"records": copies, "recipe_batch_ids": list(batch_ids.values())}
 
 
 async def calculate_total_nutrition(records: List[dict]) -> NutritionData:
@@ -0,0 +1,151 @@
+"""
+食物 / 食谱热度计数服务层
+
+每次记录饮食时在 popularity_counters 集合中原子地 $inc 计数，按 (类型, 范围, 条目ID) 各一条：
+- 范围 scope 为 "all"（全站）或用户邮箱（个人）
+- 时间衰减：一次记录计入的分值为 2^((记录时间 - 基准时间) / 半衰期)，越晚的记录分值越大。
+  所有计数按同一比例增长，score 的大小顺序即衰减后热度的顺序，可以直接按索引排序；
+  decayed_count 把 score 换算回"当前时刻的等效记录次数"
+- 计数文档同时保存条目名称快照，热门列表不需要再读取 foods / recipes
+
+搜索、推荐等场景按 (kind, scope, score) 索引读取热门条目，不需要聚合 food_records。
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.database import get_database
+
+COLLECTION = "popularity_counters"
+
+# 条目类型
+FOOD = "food"
+RECIPE = "recipe"
+
+# 全站范围
+GLOBAL_SCOPE = "all"
+
+# 衰减分值的基准时间（修改会使已有 score 失去可比性）
+DECAY_EPOCH = datetime(2024, 1, 1)
+
+# 增长倍数的指数上限：2^960 距浮点数上限还留有 2^63 倍的累加空间。
+# 半衰期 30 天时约 79 年后才会达到；达到后新记录不再比旧记录权重更高（排序退化但不会出错），
+# 此前应前移 DECAY_EPOCH 并按比例重算已有 score
+MAX_GROWTH_EXPONENT = 960.0
+
+
+def _growth(at: datetime) -> float:
+    """基准时间到 at 经过的半衰期数对应的增长倍数（指数不超过 MAX_GROWTH_EXPONENT）"""
+    half_life_seconds = settings.POPULARITY_HALF_LIFE_DAYS * 86400
+    exponent = (at - DECAY_EPOCH).total_seconds() / half_life_seconds
+    return 2.0 ** min(exponent, MAX_GROWTH_EXPONENT)
+
+
+def decayed_count(score: float, at: Optional[datetime] = None) -> float:
+    """
+    把 score 换算为 at 时刻的等效记录次数（一个半衰期前的一次记录计 0.5 次）
+
+    Args:
+        score: 计数文档中的 score
+        at: 换算时刻，默认当前时间
+
+    Returns:
+        衰减后的记录次数
+    """
+    return score / _growth(at or datetime.utcnow())
+
+
+async def record_logs(user_email: str, kind: str, items: Iterable[Tuple[str, Optional[str]]]) -> None:
+    """
+    记录一次饮食记录中用到的条目（全站和个人计数各加一次）
+
+    Args:
+        user_email: 用户邮箱
+        kind: 条目类型（FOOD / RECIPE）
+        items: (条目ID, 名称) 列表，同一条目出现多次时计数多次
+    """
+    now = datetime.utcnow()
+    increments: Dict[str, Tuple[int, Optional[str]]] = {}
+    for item_id, name in items:
+        if not item_id:
+            continue
+        count, _ = increments.get(str(item_id), (0, None))
+        increments[str(item_id)] = (count + 1, name)
+    if not increments:
+        return
+
+    try:
+        weight = _growth(now)
+        operations = []
+        for item_id, (count, name) in increments.items():
+            update = {
+                "$inc": {"score": weight * count, "count": count},
+                "$max": {"last_logged_at": now},
+            }
+            if name:
+                update["$set"] = {"name": name}
+            for scope in (GLOBAL_SCOPE, user_email):
+                operations.append(UpdateOne({"kind": kind, "scope": scope, "item_id": item_id}, update, upsert=True))
+
+        db = get_database()
+        await db[COLLECTION].bulk_write(operations, ordered=False)
+    except Exception as e:
+        # 热度计数失败不影响记录本身
+        print(f"⚠️  更新热度计数失败: {e}")
+
+
+async def top_items(kind: str, scope: str, limit: int = 20) -> List[dict]:
+    """
+    热度最高的条目
+
+    Args:
+        kind: 条目类型
+        scope: GLOBAL_SCOPE 或用户邮箱
+        limit: 返回数量
+
+    Returns:
+        [{"item_id", "name", "count"（衰减后的记录次数）, "total_count"（累计记录次数）, "last_logged_at"}]
+    """
+    db = get_database()
+    cursor = db[COLLECTION].find(
+        {"kind": kind, "scope": scope},
+        {"_id": 0, "item_id": 1, "name": 1, "score": 1, "count": 1, "last_logged_at": 1},
+    ).sort("score", -1).limit(limit)
+
+    now = datetime.utcnow()
+    return [
+        {
+            "item_id": counter["item_id"],
+            "name": counter.get("name"),
+            "count": decayed_count(counter.get("score", 0.0), now),
+            "total_count": counter.get("count", 0),
+            "last_logged_at": counter.get("last_logged_at"),
+        }
+        async for counter in cursor
+    ]
+
+
+async def get_counts(kind: str, scope: str, item_ids: Iterable[str]) -> Dict[str, float]:
+    """
+    指定条目的衰减后记录次数
+
+    Args:
+        kind: 条目类型
+        scope: GLOBAL_SCOPE 或用户邮箱
+        item_ids: 条目ID列表
+
+    Returns:
+        条目ID -> 衰减后的记录次数（没有记录的条目不在结果中）
+    """
+    item_ids = list(dict.fromkeys(str(item_id) for item_id in item_ids))
+    if not item_ids:
+        return {}
+    db = get_database()
+    cursor = db[COLLECTION].find(
+        {"kind": kind, "scope": scope, "item_id": {"$in": item_ids}},
+        {"_id": 0, "item_id": 1, "score": 1},
+    )
+    now = datetime.utcnow()
+    return {counter["item_id"]: decayed_count(counter.get("score", 0.0), now) async for counter in cursor}
@@ -0,0 +1,141 @@
+"""
+快速记录（最近 / 常吃）服务层
+
+每个用户在 quick_logs 集合中有一条文档，items 数组按最近记录时间倒序保存不重复的食物和食谱：
+- 每次记录饮食时用一次原子的管道更新，把该条目移到最前（保留累计次数并加一），再截取前
+  QUICK_LOG_MAX_ITEMS 个，相当于按用户的环形缓冲区
+- 条目保存上次记录的份量、单位和餐次，客户端可以一键按原份量再记一次
+- 读取是按 user_email 唯一索引的单次点查，不需要查询 food_records
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.database import get_database
+
+COLLECTION = "quick_logs"
+
+# 条目类型（与 popularity_service 一致）
+FOOD = "food"
+RECIPE = "recipe"
+
+
+def _push_item_pipeline(item: Dict[str, Any], max_items: int) -> List[dict]:
+    """
+    把条目移到 items 最前面的更新管道
+
+    Args:
+        item: 条目（不含 count）
+        max_items: 保留的条目数
+
+    Returns:
+        update_one 使用的聚合管道
+    """
+    same_item = {
+        "$and": [
+            {"$eq": ["$$entry.kind", item["kind"]]},
+            {"$eq": ["$$entry.item_id", item["item_id"]]},
+        ]
+    }
+    items = {"$ifNull": ["$items", []]}
+    new_item = {
+        **{key: {"$literal": value} for key, value in item.items()},
+        # 累计次数沿用列表中已有的同一条目
+        "count": {
+            "$let": {
+                "vars": {
+                    "previous": {
+                        "$arrayElemAt": [{"$filter": {"input": items, "as": "entry", "cond": same_item}}, 0]
+                    }
+                },
+                "in": {"$add": [{"$ifNull": ["$$previous.count", 0]}, 1]},
+            }
+        },
+    }
+    return [
+        {
+            "$set": {
+                "items": {
+                    "$slice": [
+                        {
+                            "$concatArrays": [
+                                [new_item],
+                                {"$filter": {"input": items, "as": "entry", "cond": {"$not": [same_item]}}},
+                            ]
+                        },
+                        max_items,
+                    ]
+                },
+                "updated_at": {"$literal": item["logged_at"]},
+            }
+        }
+    ]
+
+
+async def record_item(
+    user_email: str,
+    kind: str,
+    item_id: Optional[str],
+    name: str,
+    meal_type: Optional[str] = None,
+    serving_amount: Optional[float] = None,
+    serving_size: Optional[float] = None,
+    serving_unit: Optional[str] = None,
+    scale: Optional[float] = None,
+) -> None:
+    """
+    记录一次食物或食谱，移到用户快速记录列表的最前面
+
+    Args:
+        user_email: 用户邮箱
+        kind: 条目类型（FOOD / RECIPE）
+        item_id: 食物ID或食谱ID（为空时忽略）
+        name: 名称
+        meal_type: 餐次类型
+        serving_amount: 食用份量数（食物）
+        serving_size: 每份大小（食物）
+        serving_unit: 份量单位（食物）
+        scale: 份量倍数（食谱）
+    """
+    if not item_id or settings.QUICK_LOG_MAX_ITEMS <= 0:
+        return
+    item = {
+        "kind": kind,
+        "item_id": str(item_id),
+        "name": name,
+        "meal_type": meal_type,
+        "serving_amount": serving_amount,
+        "serving_size": serving_size,
+        "serving_unit": serving_unit,
+        "scale": scale,
+        "logged_at": datetime.utcnow(),
+    }
+    try:
+        db = get_database()
+        await db[COLLECTION].update_one(
+            {"user_email": user_email},
+            _push_item_pipeline(item, settings.QUICK_LOG_MAX_ITEMS),
+            upsert=True,
+        )
+    except Exception as e:
+        # 快速记录列表更新失败不影响记录本身
+        print(f"⚠️  更新快速记录列表失败: {e}")
+
+
+async def get_quick_items(user_email: str, limit: int = 20) -> Dict[str, List[dict]]:
+    """
+    获取用户最近和常吃的食物/食谱
+
+    Args:
+        user_email: 用户邮箱
+        limit: 每个列表的返回数量
+
+    Returns:
+        {"recent": 按最近记录时间倒序, "frequent": 按记录次数倒序（同次数时最近的在前）}
+    """
+    db = get_database()
+    doc = await db[COLLECTION].find_one({"user_email": user_email}, {"_id": 0, "items": 1})
+    items = (doc or {}).get("items") or []
+    # items 已按记录时间倒序，sorted 稳定，同次数时保持该顺序
+    frequent = sorted(items, key=lambda item: item.get("count", 0), reverse=True)
+    return {"recent": items[:limit], "frequent": frequent[:limit]}
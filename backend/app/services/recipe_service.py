@@ -6,8 +6,13 @@ from app.models.recipe import RecipeInDB
 from app.models.food import NutritionData, FullNutritionData
 from app.schemas.recipe import RecipeCreateRequest, RecipeUpdateRequest
 from app.utils.image_storage import save_recipe_image, get_image_url, delete_recipe_image
+from app.services import day_boundary_service, popularity_service, quick_log_service
+from app.utils import catalog_cache, invalidation_bus
 from bson import ObjectId
 
+# 食谱名称联想：每组读取 limit 的多少倍候选，再按热度排序截取
+RECIPE_AUTOCOMPLETE_CANDIDATE_FACTOR = 5
+
 
 def calculate_recipe_full_nutrition(foods: list) -> Optional[FullNutritionData]:
     """
@@ -201,6 +206,7 @@ async def create_recipe(
     recipe_dict = recipe.dict()
     result = await db.recipes.insert_one(recipe_dict)
     recipe_dict["_id"] = str(result.inserted_id)
+    _invalidate_recipe_categories(creator_email)
     
     return recipe_dict
 
@@ -293,16 +299,27 @@ async def create_recipe_with_image(
     return recipe
 
 
+def _invalidate_recipe_categories(user_email: Optional[str]) -> None:
+    """失效食谱分类缓存（公共食谱变化时影响所有用户）"""
+    if user_email and user_email != "all":
+        catalog_cache.invalidate(catalog_cache.RECIPE_CATEGORIES_NAMESPACE, user_email)
+    else:
+        catalog_cache.invalidate(catalog_cache.RECIPE_CATEGORIES_NAMESPACE)
+
+
 async def get_recipe_by_id(recipe_id: str) -> Optional[dict]:
-    """根据ID获取食谱"""
-    db = get_database()
-    try:
-        recipe = await db.recipes.find_one({"_id": ObjectId(recipe_id)})
-        if recipe:
-            recipe["_id"] = str(recipe["_id"])
-        return recipe
-    except Exception:
-        return None
+    """根据ID获取食谱（结果会缓存，食谱更新/删除时失效）"""
+    async def load():
+        db = get_database()
+        try:
+            recipe = await db.recipes.find_one({"_id": ObjectId(recipe_id)})
+            if recipe:
+                recipe["_id"] = str(recipe["_id"])
+            return recipe
+        except Exception:
+            return None
+
+    return await catalog_cache.get_or_load(catalog_cache.RECIPE_NAMESPACE, recipe_id, load)
 
 
 async def search_recipes(
@@ -373,21 +390,24 @@ async def search_recipes(
 
 
 async def get_recipe_categories(user_email: Optional[str] = None) -> List[str]:
-    """获取所有食谱分类（只包含系统食谱和自己创建的食谱）"""
-    db = get_database()
-    
-    query = {}
-    if user_email:
-        query["$or"] = [
-            {"created_by": "all"},  # 所有人可见的食谱
-            {"created_by": user_email}  # 自己创建的食谱
-        ]
-    else:
-        # 未登录用户只能看到所有人可见的食谱
-        query["created_by"] = "all"
-    
-    categories = await db.recipes.distinct("category", query)
-    return [cat for cat in categories if cat]
+    """获取所有食谱分类（只包含系统食谱和自己创建的食谱，结果按用户缓存）"""
+    async def load():
+        db = get_database()
+        
+        query = {}
+        if user_email:
+            query["$or"] = [
+                {"created_by": "all"},  # 所有人可见的食谱
+                {"created_by": user_email}  # 自己创建的食谱
+            ]
+        else:
+            # 未登录用户只能看到所有人可见的食谱
+            query["created_by"] = "all"
+        
+        categories = await db.recipes.distinct("category", query)
+        return [cat for cat in categories if cat]
+
+    return await catalog_cache.get_or_load(catalog_cache.RECIPE_CATEGORIES_NAMESPACE, user_email, load)
 
 
 async def update_recipe(
@@ -463,6 +483,9 @@ async def update_recipe(
         {"$set": update_data},
         return_document=True
     )
+    catalog_cache.invalidate(catalog_cache.RECIPE_NAMESPACE, recipe_id)
+    if "category" in update_data:
+        _invalidate_recipe_categories(user_email)
     
     if result:
         result["_id"] = str(result["_id"])
@@ -500,6 +523,7 @@ async def update_recipe_image_url(recipe_id: str, image_url: str, user_email: st
             {"_id": ObjectId(recipe_id), "created_by": user_email},
             {"$set": {"image_url": image_url, "updated_at": datetime.utcnow()}}
         )
+        catalog_cache.invalidate(catalog_cache.RECIPE_NAMESPACE, recipe_id)
         
         if result.modified_count == 0:
             raise ValueError("更新失败：未找到匹配的记录")
@@ -547,6 +571,8 @@ async def delete_recipe(recipe_id: str, user_email: str) -> bool:
             "_id": ObjectId(recipe_id),
             "created_by": user_email
         })
+        catalog_cache.invalidate(catalog_cache.RECIPE_NAMESPACE, recipe_id)
+        _invalidate_recipe_categories(user_email)
         return result.deleted_count > 0
     except Exception:
         return False
@@ -578,6 +604,7 @@ async def create_recipe_record(
     from bson import ObjectId as BsonObjectId
     
     db = get_database()
+    recorded_at = await day_boundary_service.normalize_input(user_email, recorded_at)
     
     # 生成批次ID，用于关联这次食谱记录的所有食物记录
     batch_id = str(BsonObjectId())
@@ -694,6 +721,17 @@ async def create_recipe_record(
         record_ids.append(str(result.inserted_id))
         all_nutrition.append(scaled_nutrition)
     
+    await popularity_service.record_logs(user_email, popularity_service.RECIPE, [(recipe_id, recipe_name)])
+    await popularity_service.record_logs(
+        user_email,
+        popularity_service.FOOD,
+        [(food_item.get("food_id"), food_item.get("food_name")) for food_item in foods],
+    )
+    await quick_log_service.record_item(
+        user_email, quick_log_service.RECIPE, recipe_id, recipe_name, meal_type=meal_type, scale=scale
+    )
+    await day_boundary_service.publish_changes(invalidation_bus.FOOD_RECORDS, user_email, [recorded_at])
+    
     # 计算总营养
     total_nutrition = {
         "calories": 0.0,
@@ -750,8 +788,6 @@ async def get_recipe_records(
     Returns:
         (批次列表, 总数, 所有批次总营养)
     """
-    from datetime import datetime as dt, time
-    
     db = get_database()
     
     # 构建查询条件
@@ -760,17 +796,10 @@ async def get_recipe_records(
         "recipe_record_batch_id": {"$exists": True, "$ne": None}  # 只查询来自食谱的记录
     }
     
-    # 日期范围筛选
+    # 日期范围筛选（按用户本地日期）
     if start_date or end_date:
-        query["recorded_at"] = {}
-        if start_date:
-            # 转换 date 到 datetime（当天开始）
-            start_datetime = dt.combine(start_date, time.min)
-            query["recorded_at"]["$gte"] = start_datetime
-        if end_date:
-            # 转换 date 到 datetime（当天结束）
-            end_datetime = dt.combine(end_date, time.max)
-            query["recorded_at"]["$lte"] = end_datetime
+        tz_name = await day_boundary_service.get_user_timezone(user_email)
+        query["recorded_at"] = day_boundary_service.time_range_filter(start_date, end_date, tz_name)
     
     # 餐次类型筛选
     if meal_type:
@@ -936,6 +965,7 @@ async def update_recipe_record(
     # 构建更新字典
     update_dict = {}
     if recorded_at is not None:
+        recorded_at = await day_boundary_service.normalize_input(user_email, recorded_at)
         update_dict["recorded_at"] = recorded_at
     if meal_type is not None:
         update_dict["meal_type"] = meal_type
@@ -952,6 +982,11 @@ async def update_recipe_record(
             },
             {"$set": update_dict}
         )
+        await day_boundary_service.publish_changes(
+            invalidation_bus.FOOD_RECORDS,
+            user_email,
+            [record.get("recorded_at") for record in records] + [recorded_at],
+        )
     
     # 重新查询获取更新后的数据
     updated_records = await db.food_records.find({
@@ -1005,7 +1040,7 @@ async def search_recipe_by_name(user_email: str, keyword: str, limit: int = 10)
         limit: 返回数量限制
     
     Returns:
-        包含食谱ID列表的字典
+        包含食谱ID列表的字典（用户创建的在前，组内按热度排序）
     """
     db = get_database()
     
@@ -1022,21 +1057,36 @@ async def search_recipe_by_name(user_email: str, keyword: str, limit: int = 10)
         ]
     }
     
-    # 分两步查询：先查用户自己的，再查公开的
+    # 分两步查询：先查用户自己的，再查公开的；每组多取一些候选，按热度排序后截取
+    candidate_limit = limit * RECIPE_AUTOCOMPLETE_CANDIDATE_FACTOR
+    projection = {"name": 1, "category": 1, "created_by": 1}
     # 1. 查询用户创建的食谱
     user_recipes = await db.recipes.find({
         "created_by": user_email,
         "name": {"$regex": keyword, "$options": "i"}
-    }).limit(limit).to_list(length=limit)
+    }, projection).limit(candidate_limit).to_list(length=candidate_limit)
     
     # 2. 查询公开的食谱
-    remaining_limit = limit - len(user_recipes)
     public_recipes = []
-    if remaining_limit > 0:
+    if len(user_recipes) < limit:
         public_recipes = await db.recipes.find({
             "created_by": "all",
             "name": {"$regex": keyword, "$options": "i"}
-        }).limit(remaining_limit).to_list(length=remaining_limit)
+        }, projection).limit(candidate_limit).to_list(length=candidate_limit)
+    
+    # 3. 组内按用户自己的记录次数、再按全站记录次数排序
+    recipe_ids = [str(recipe["_id"]) for recipe in user_recipes + public_recipes]
+    personal_counts = await popularity_service.get_counts(popularity_service.RECIPE, user_email, recipe_ids)
+    global_counts = await popularity_service.get_counts(
+        popularity_service.RECIPE, popularity_service.GLOBAL_SCOPE, recipe_ids
+    )
+
+    def popularity(recipe: dict) -> tuple:
+        recipe_id = str(recipe["_id"])
+        return personal_counts.get(recipe_id, 0.0), global_counts.get(recipe_id, 0.0)
+
+    user_recipes = sorted(user_recipes, key=popularity, reverse=True)[:limit]
+    public_recipes = sorted(public_recipes, key=popularity, reverse=True)[:limit - len(user_recipes)]
     
     # 合并结果（用户创建的在前）
     all_recipes = user_recipes + public_recipes
@@ -1087,6 +1137,11 @@ async def delete_recipe_record(user_email: str, batch_id: str) -> Dict[str, Any]
         "user_email": user_email,
         "recipe_record_batch_id": batch_id
     })
+    await day_boundary_service.publish_changes(
+        invalidation_bus.FOOD_RECORDS,
+        user_email,
+        [record.get("recorded_at") for record in records],
+    )
     
     return {
         "message": "食谱记录删除成功",
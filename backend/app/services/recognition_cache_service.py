@@ -0,0 +1,171 @@
+"""
+AI 拍照识别结果缓存服务
+
+用户经常会对同一餐重复拍照，每次都会触发一次完整的 Qwen-VL 调用。
+本模块以图片感知哈希（dHash）为键，将大模型返回的 recognized_foods 缓存在 MongoDB 中：
+- 默认按用户隔离，开启 AI_RECOGNITION_CACHE_GLOBAL 后可跨用户共享
+- 汉明距离不超过 AI_RECOGNITION_CACHE_MAX_DISTANCE 即视为同一图片
+- 通过 expires_at 上的 TTL 索引自动清理过期缓存（索引声明见 app.database.INDEXES）
+"""
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.database import get_database
+from app.utils import metrics
+from app.utils.image_hash import (
+    HASH_BANDS,
+    compute_dhash,
+    hamming_distance,
+    hash_bands,
+    hash_to_hex,
+    hex_to_hash,
+)
+
+COLLECTION_NAME = "food_recognition_cache"
+
+# 单次查询最多比较的候选数量（分段索引预筛选后通常远小于此值）
+MAX_CANDIDATES = 200
+
+# 命中率统计（进程内）
+_cache_stats: Dict[str, float] = {
+    "hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "errors": 0,
+    "lookup_ms_total": 0.0,
+}
+
+
+def _max_distance() -> int:
+    """汉明距离阈值，限制在分段预筛选可保证召回的范围内"""
+    return max(0, min(settings.AI_RECOGNITION_CACHE_MAX_DISTANCE, HASH_BANDS - 1))
+
+
+def compute_image_hash(image_path: Path) -> Optional[int]:
+    """计算图片感知哈希，失败时返回 None（不影响识别主流程）"""
+    try:
+        return compute_dhash(image_path)
+    except Exception:
+        _cache_stats["errors"] += 1
+        return None
+
+
+async def lookup_recognized_foods(
+    image_hash: int,
+    user_email: str,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    查找近似重复图片的缓存识别结果
+
+    Args:
+        image_hash: 图片感知哈希
+        user_email: 用户邮箱
+
+    Returns:
+        命中时返回缓存的 recognized_foods 列表，未命中返回 None
+    """
+    if not settings.AI_RECOGNITION_CACHE_ENABLED:
+        return None
+
+    started = time.perf_counter()
+    try:
+        db = get_database()
+
+        query: Dict[str, Any] = {
+            "bands": {"$in": hash_bands(image_hash)},
+            "expires_at": {"$gt": datetime.utcnow()},
+        }
+        if not settings.AI_RECOGNITION_CACHE_GLOBAL:
+            query["user_email"] = user_email
+
+        candidates = await db[COLLECTION_NAME].find(
+            query,
+            {"phash": 1, "recognized_foods": 1},
+        ).sort("created_at", -1).limit(MAX_CANDIDATES).to_list(length=MAX_CANDIDATES)
+    except Exception:
+        _cache_stats["errors"] += 1
+        return None
+
+    threshold = _max_distance()
+    best = None
+    best_distance = threshold + 1
+    for candidate in candidates:
+        distance = hamming_distance(image_hash, hex_to_hash(candidate["phash"]))
+        if distance < best_distance:
+            best = candidate
+            best_distance = distance
+            if distance == 0:
+                break
+
+    _cache_stats["lookup_ms_total"] += (time.perf_counter() - started) * 1000
+
+    if best is None:
+        _cache_stats["misses"] += 1
+        metrics.cache_requests_total.inc(COLLECTION_NAME, "miss")
+        return None
+
+    _cache_stats["hits"] += 1
+    metrics.cache_requests_total.inc(COLLECTION_NAME, "hit")
+    try:
+        await db[COLLECTION_NAME].update_one(
+            {"_id": best["_id"]},
+            {"$inc": {"hit_count": 1}, "$set": {"last_hit_at": datetime.utcnow()}},
+        )
+    except Exception:
+        pass
+    return best.get("recognized_foods") or []
+
+
+async def store_recognized_foods(
+    image_hash: int,
+    user_email: str,
+    recognized_foods: List[Dict[str, Any]],
+) -> None:
+    """
+    缓存大模型识别结果（空结果不缓存，便于用户换角度重拍后重新识别）
+
+    Args:
+        image_hash: 图片感知哈希
+        user_email: 用户邮箱
+        recognized_foods: 大模型返回的 recognized_foods 列表
+    """
+    if not settings.AI_RECOGNITION_CACHE_ENABLED or not recognized_foods:
+        return
+
+    now = datetime.utcnow()
+    try:
+        db = get_database()
+        await db[COLLECTION_NAME].insert_one({
+            "user_email": user_email,
+            "phash": hash_to_hex(image_hash),
+            "bands": hash_bands(image_hash),
+            "recognized_foods": recognized_foods,
+            "hit_count": 0,
+            "created_at": now,
+            "expires_at": now + timedelta(hours=settings.AI_RECOGNITION_CACHE_TTL_HOURS),
+        })
+        _cache_stats["stores"] += 1
+    except Exception:
+        _cache_stats["errors"] += 1
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """获取缓存命中率统计"""
+    hits = int(_cache_stats["hits"])
+    misses = int(_cache_stats["misses"])
+    lookups = hits + misses
+    return {
+        "enabled": settings.AI_RECOGNITION_CACHE_ENABLED,
+        "global_scope": settings.AI_RECOGNITION_CACHE_GLOBAL,
+        "max_distance": _max_distance(),
+        "ttl_hours": settings.AI_RECOGNITION_CACHE_TTL_HOURS,
+        "hits": hits,
+        "misses": misses,
+        "stores": int(_cache_stats["stores"]),
+        "errors": int(_cache_stats["errors"]),
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        "avg_lookup_ms": round(_cache_stats["lookup_ms_total"] / lookups, 2) if lookups else 0.0,
+    }
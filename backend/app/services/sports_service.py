@@ -3,16 +3,19 @@ from datetime import datetime
 from app.database import get_database
 from app.config import settings
 
-from app.services.user_service import get_user_profile
+from app.services import day_boundary_service
+from app.services.user_service import load_user
 from app.models.sports import SportsLogInDB,SportsTypeInDB
 from app.utils.image_storage import save_sport_image,delete_sport_image
+from app.utils import catalog_cache, dashboard_cache, invalidation_bus
 from bson import ObjectId
+from pymongo.errors import BulkWriteError
 
 ###工具计算函数
 
 # 获取用户体重
 async def get_user_weight(email: str) -> float:
-    user= await get_user_profile(email)
+    user= await load_user(email, ("weight",))
 
     if user and "weight" in user:
         return user["weight"]
@@ -68,7 +71,9 @@ async def create_sports(create_request,image_file,current_user):
         image_url=image_url
     )
 
-    return await db["sports"].insert_one(SportType.model_dump())# 转为字典插入
+    result = await db["sports"].insert_one(SportType.model_dump())# 转为字典插入
+    catalog_cache.invalidate(catalog_cache.SPORTS_NAMESPACE, current_user)
+    return result
 
 # 更新自定义运动类型
 async def update_sports(update_request,image_file,current_user):
@@ -112,6 +117,7 @@ async def update_sports(update_request,image_file,current_user):
         {"$set": update_data},
         return_document=True  # 返回更新后的文档
     )
+    catalog_cache.invalidate(catalog_cache.SPORTS_NAMESPACE, current_user)
     
     return result
 
@@ -138,6 +144,7 @@ async def delete_sports(sport_name: str, current_user: str):
         "sport_name": sport_name,
         "created_by": current_user
     })
+    catalog_cache.invalidate(catalog_cache.SPORTS_NAMESPACE, current_user)
 
     # 返回删除是否成功（删除了至少一条记录）
     return result.deleted_count > 0
@@ -146,15 +153,17 @@ async def delete_sports(sport_name: str, current_user: str):
 async def get_available_sports(current_user: str):
     """
     获取用户可用的运动类型列表，包括默认运动类型和用户自定义的运动类型
+    （结果按用户缓存，自定义运动类型增删改时失效）
     """
-    db = get_database()
-    # 查询默认运动类型和用户自定义的运动类型
-    sports = await db["sports"].find(
-        {"$or": [{"created_by": "all"}, {"created_by": current_user}]},
-        {"sport_type": 1, "sport_name": 1, "describe": 1, "METs": 1,"image_url":1, "_id": 0}
-    ).to_list(length=1000)
+    async def load():
+        db = get_database()
+        # 查询默认运动类型和用户自定义的运动类型
+        return await db["sports"].find(
+            {"$or": [{"created_by": "all"}, {"created_by": current_user}]},
+            {"sport_type": 1, "sport_name": 1, "describe": 1, "METs": 1,"image_url":1, "_id": 0}
+        ).to_list(length=1000)
 
-    return sports
+    return await catalog_cache.get_or_load(catalog_cache.SPORTS_NAMESPACE, current_user, load)
 
 # 记录运动
 async def log_sports_record(log_request,current_user):
@@ -189,19 +198,116 @@ async def log_sports_record(log_request,current_user):
     calories_burned = await calculate_calories_burned(
         mets, user_weight, log_request.duration_time
     )
+    created_at = await day_boundary_service.normalize_input(current_user, log_request.created_at)
     SportLog=SportsLogInDB(
         created_by=current_user,
         sport_name=log_request.sport_name,
         sport_type=sport["sport_type"],
-        created_at=log_request.created_at,
+        created_at=created_at,
         duration_time=log_request.duration_time,
         calories_burned=calories_burned
     )
     record_dict=SportLog.model_dump()# 转为字典
     result = await db["sports_log"].insert_one(record_dict)
     record_dict["record_id"] = result.inserted_id
+    await day_boundary_service.publish_changes(invalidation_bus.SPORTS_LOG, current_user, [created_at])
     return record_dict
 
+# 批量记录运动
+async def log_sports_records_batch(records, current_user):
+    """
+    批量记录运动（手环同步、历史数据补录）
+
+    一次 $in 查询解析所有运动类型的 METs，用户体重只读取一次，
+    统一计算卡路里后通过单次 insert_many 写入。单条记录失败不影响其他记录。
+
+    Args:
+        records: LogSportsRequest 列表
+        current_user: 用户邮箱
+
+    Returns:
+        与 records 一一对应的处理结果列表
+
+    Raises:
+        HTTPException: 用户未设置体重时返回 422
+    """
+    db = get_database()
+    results = [{"index": index, "success": False} for index in range(len(records))]
+
+    sport_names = {record.sport_name for record in records if record.sport_name}
+    sports = await db["sports"].find(
+        {
+            "sport_name": {"$in": list(sport_names)},
+            "$or": [{"created_by": "all"}, {"created_by": current_user}],
+        },
+        {"sport_name": 1, "sport_type": 1, "METs": 1, "_id": 0},
+    ).to_list(length=None)
+    sports_by_name = {sport["sport_name"]: sport for sport in sports}
+
+    valid = []
+    for index, record in enumerate(records):
+        if not record.sport_name or not record.duration_time or not record.created_at:
+            results[index]["message"] = "运动类型、创建时间和运动时长不能为空"
+        elif record.sport_name not in sports_by_name:
+            results[index]["message"] = "运动类型未找到"
+        elif not sports_by_name[record.sport_name].get("METs"):
+            results[index]["message"] = "运动类型缺少 METs 数据"
+        else:
+            valid.append(index)
+
+    if not valid:
+        return results
+
+    # 卡路里消耗：METs × 体重(kg) × 时间(小时)
+    user_weight = await get_user_weight(current_user)
+    # 未设置体重时与单条记录接口一致，整批返回 422
+    if not user_weight:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="用户体重、运动类型和运动时长不能为空"
+        )
+    calories = [
+        sports_by_name[records[index].sport_name]["METs"] * user_weight * records[index].duration_time / 60
+        for index in valid
+    ]
+    tz_name = await day_boundary_service.get_user_timezone(current_user)
+
+    docs = [
+        SportsLogInDB(
+            created_by=current_user,
+            sport_name=records[index].sport_name,
+            sport_type=sports_by_name[records[index].sport_name]["sport_type"],
+            created_at=day_boundary_service.input_to_utc(records[index].created_at, tz_name),
+            duration_time=records[index].duration_time,
+            calories_burned=calories_burned,
+        ).model_dump()
+        for index, calories_burned in zip(valid, calories)
+    ]
+
+    failed_positions = {}
+    try:
+        await db["sports_log"].insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            failed_positions[error["index"]] = error.get("errmsg", "写入失败")
+
+    written_dates = []
+    for position, (index, doc) in enumerate(zip(valid, docs)):
+        if position in failed_positions:
+            results[index]["message"] = failed_positions[position]
+            continue
+        # insert_many 会为每个文档写入 _id
+        results[index].update(
+            success=True,
+            record_id=str(doc["_id"]),
+            calories_burned=doc["calories_burned"],
+        )
+        written_dates.append(doc["created_at"])
+
+    if written_dates:
+        await day_boundary_service.publish_changes(invalidation_bus.SPORTS_LOG, current_user, written_dates)
+    return results
+
 # 更新运动记录
 async def update_sports_record(update_request,current_user):
     db = get_database()
@@ -229,7 +335,7 @@ async def update_sports_record(update_request,current_user):
         update_data["sport_name"] = update_request.new_sport_name
         update_data["sport_type"] = sport["sport_type"]
     if update_request.created_at is not None:
-        update_data["created_at"] = update_request.created_at
+        update_data["created_at"] = await day_boundary_service.normalize_input(current_user, update_request.created_at)
     if update_request.duration_time is not None:
         update_data["duration_time"] = update_request.duration_time
 
@@ -251,6 +357,11 @@ async def update_sports_record(update_request,current_user):
         {"$set": update_data},
         return_document=True  # 返回更新后的文档
     )
+    await day_boundary_service.publish_changes(
+        invalidation_bus.SPORTS_LOG,
+        current_user,
+        [record.get("created_at"), update_data.get("created_at")],
+    )
     return result
 
 # 删除运动记录
@@ -260,13 +371,17 @@ async def delete_sports_record(record_id: str, current_user: str):
     """
     db = get_database()
     # 查找并删除用户的运动记录
-    result = await db["sports_log"].delete_one({
-        "_id": ObjectId(record_id),
-        "created_by": current_user
-    })
+    deleted = await db["sports_log"].find_one_and_delete(
+        {"_id": ObjectId(record_id), "created_by": current_user},
+        projection={"created_at": 1},
+    )
+    if deleted:
+        await day_boundary_service.publish_changes(
+            invalidation_bus.SPORTS_LOG, current_user, [deleted.get("created_at")]
+        )
     
     # 返回删除是否成功（删除了至少一条记录）
-    return result.deleted_count > 0
+    return deleted is not None
     
 # 根据开始和结束时间检索运动记录
 async def search_sports_record(search_request,current_user):
@@ -274,15 +389,12 @@ async def search_sports_record(search_request,current_user):
     query = {
         "created_by": current_user
     }
-    if search_request.start_date:
-        start_datetime = datetime.combine(search_request.start_date, datetime.min.time())
-        query["created_at"] = {"$gte": start_datetime}
-    if search_request.end_date:
-        end_datetime = datetime.combine(search_request.end_date, datetime.max.time())
-        if "created_at" in query:
-            query["created_at"]["$lte"] = end_datetime
-        else:
-            query["created_at"] = {"$lte": end_datetime}
+    # 日期范围筛选（按用户本地日期）
+    if search_request.start_date or search_request.end_date:
+        tz_name = await day_boundary_service.get_user_timezone(current_user)
+        query["created_at"] = day_boundary_service.time_range_filter(
+            search_request.start_date, search_request.end_date, tz_name
+        )
     if search_request.sport_name:
         query["sport_name"] = search_request.sport_name
 
@@ -310,15 +422,27 @@ async def generate_sports_report(email: str):
     - 总消耗卡路里
     - 最常进行的运动类型
     - 按运动类型统计的详情
+    （按用户和统计区间缓存，区间内运动记录变更时失效）
     """
-    from datetime import datetime, timedelta
-    # 计算上一周的日期范围
-    today = datetime.now().date()
+    from datetime import timedelta
+    # 计算上一周的日期范围（用户本地日期）
+    today = day_boundary_service.local_today(await day_boundary_service.get_user_timezone(email))
     # 找到上周一
     last_day = today - timedelta(days=1)
     # 上周日
     last_7day = last_day - timedelta(days=6)
-    
+
+    return await dashboard_cache.get_or_load(
+        email,
+        dashboard_cache.SPORTS_REPORT,
+        last_7day,
+        last_day,
+        lambda: _build_sports_report(email, last_7day, last_day),
+    )
+
+
+async def _build_sports_report(email: str, last_7day, last_day):
+    """统计 [last_7day, last_day] 区间内的运动记录"""
     # 获取用户上一周的运动记录
     from app.schemas.sports import SearchSportRecordsRequest
     search_request = SearchSportRecordsRequest(
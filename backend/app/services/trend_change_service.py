@@ -0,0 +1,126 @@
+"""
+趋势数据变更日志服务层
+
+订阅 invalidation_bus 中饮食、运动、体重记录的变更，在 trend_changes 集合中按 (用户, 本地日期)
+记录最后一次变更时间（changed_at）。时间序列趋势接口据此只重新计算 since 之后有变更的分组。
+- 删除记录同样会留下变更标记，客户端能感知某个分组被清空
+- 变更标记在后台写入，接口返回的水位线会向前回退 SINCE_OVERLAP_SECONDS，覆盖写入延迟
+- 变更集合与进程无关，多 worker 部署下同样有效
+"""
+import asyncio
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Optional, Set
+
+from pymongo import UpdateOne
+
+from app.database import get_database
+from app.utils import invalidation_bus
+
+COLLECTION = "trend_changes"
+
+# 影响时间序列趋势的主题
+TOPICS = (
+    invalidation_bus.FOOD_RECORDS,
+    invalidation_bus.SPORTS_LOG,
+    invalidation_bus.WEIGHT_RECORDS,
+)
+
+# 返回给客户端的水位线相对查询时间的回退量（秒）：重叠区间内的分组会被重复返回，但不会遗漏
+SINCE_OVERLAP_SECONDS = 60
+
+# 正在写入的变更标记（保持引用，避免任务被回收）
+_pending: Set[asyncio.Task] = set()
+
+
+async def record_changes(user_email: str, dates: Optional[Iterable[date]]) -> None:
+    """
+    记录用户在指定日期的数据变更
+
+    Args:
+        user_email: 用户邮箱
+        dates: 受影响的日期；None 表示全部日期（day 字段记为 None）
+    """
+    try:
+        db = get_database()
+        now = datetime.utcnow()
+        days = [None] if dates is None else [datetime.combine(day, time.min) for day in dates]
+        if not days:
+            return
+        operations = [
+            UpdateOne(
+                {"user_email": user_email, "day": day},
+                {"$max": {"changed_at": now}},
+                upsert=True,
+            )
+            for day in days
+        ]
+        await db[COLLECTION].bulk_write(operations, ordered=False)
+    except Exception as e:
+        print(f"⚠️  记录趋势变更失败: {e}")
+
+
+async def get_changed_days(
+    user_email: str,
+    since: datetime,
+    start_date: date,
+    end_date: date
+) -> Optional[Set[date]]:
+    """
+    获取 since 之后有变更的日期
+
+    Args:
+        user_email: 用户邮箱
+        since: 变更时间下限（UTC，不含）
+        start_date: 开始日期
+        end_date: 结束日期
+
+    Returns:
+        范围内有变更的日期集合；存在"全部日期"变更标记时返回 None
+    """
+    db = get_database()
+    query = {
+        "user_email": user_email,
+        "changed_at": {"$gt": since},
+        "$or": [
+            {"day": None},
+            {
+                "day": {
+                    "$gte": datetime.combine(start_date, time.min),
+                    "$lte": datetime.combine(end_date, time.min),
+                }
+            },
+        ],
+    }
+    changed_days: Set[date] = set()
+    async for change in db[COLLECTION].find(query, {"_id": 0, "day": 1}):
+        if change.get("day") is None:
+            return None
+        changed_days.add(change["day"].date())
+    return changed_days
+
+
+def next_watermark(started_at: datetime) -> datetime:
+    """
+    根据查询开始时间计算返回给客户端的水位线
+
+    Args:
+        started_at: 查询开始时间（UTC）
+
+    Returns:
+        下次请求应携带的 since
+    """
+    return started_at - timedelta(seconds=SINCE_OVERLAP_SECONDS)
+
+
+def _handle_change(user_email: str, dates: Optional[Set[date]]) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(record_changes(user_email, dates))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+for _topic in TOPICS:
+    invalidation_bus.subscribe(_topic, _handle_change)
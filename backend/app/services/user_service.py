@@ -1,5 +1,7 @@
-from typing import Optional
-from datetime import datetime, date
+import asyncio
+import copy
+from typing import Iterable, Optional
+from datetime import datetime, date, timezone
 from app.database import get_database
 from app.models.user import UserInDB, ActivityLevel, HealthGoalType
 from app.schemas.user import (
@@ -14,13 +16,60 @@ from app.services.calculation_service import (
     calculate_daily_calorie_goal,
     calculate_age,
 )
+from app.utils import invalidation_bus
+from app.utils.request_scope import get_request_cache
+
+# 请求级缓存命名空间：用户邮箱 -> 查询用户文档的 Task
+USERS_SCOPE = "users"
 
 
 async def get_user_by_email(email: str) -> Optional[dict]:
     """根据邮箱获取用户"""
-    db = get_database()
-    user = await db.users.find_one({"email": email})
-    return user
+    return await load_user(email)
+
+
+async def load_user(email: str, projection: Optional[Iterable[str]] = None) -> Optional[dict]:
+    """
+    获取用户文档（同一请求内只查询一次数据库）
+
+    在请求上下文中首次调用时查询完整的用户文档并缓存到请求结束，之后（包括并发的）调用
+    直接复用该结果；不在请求上下文中时直接按投影查询。
+
+    Args:
+        email: 用户邮箱
+        projection: 需要的字段列表，为 None 时返回完整文档
+
+    Returns:
+        用户文档副本（调用方可以安全修改），不存在时返回 None
+    """
+    cache = get_request_cache(USERS_SCOPE)
+    if cache is None:
+        db = get_database()
+        fields = {field: 1 for field in projection} if projection is not None else None
+        return await db.users.find_one({"email": email}, fields)
+
+    task = cache.get(email)
+    if task is None:
+        task = cache[email] = asyncio.ensure_future(get_database().users.find_one({"email": email}))
+    try:
+        user = await asyncio.shield(task)
+    except Exception:
+        if cache.get(email) is task:
+            del cache[email]
+        raise
+
+    if user is None:
+        return None
+    if projection is not None:
+        return {key: copy.deepcopy(user[key]) for key in ("_id", *projection) if key in user}
+    return copy.deepcopy(user)
+
+
+def forget_user(email: str) -> None:
+    """用户文档被修改后，丢弃当前请求内缓存的旧文档"""
+    cache = get_request_cache(USERS_SCOPE)
+    if cache is not None:
+        cache.pop(email, None)
 
 
 async def create_user(email: str, username: str, hashed_password: str) -> dict:
@@ -82,6 +131,8 @@ async def update_body_data(email: str, body_data: BodyDataRequest) -> Optional[d
         {"$set": update_data},
         return_document=True,
     )
+    forget_user(email)
+    invalidation_bus.publish(invalidation_bus.USER_PROFILE, email)
 
     # 自动同步：如果体重发生变化，创建体重记录
     if body_data.weight != old_weight and body_data.weight is not None:
@@ -93,7 +144,7 @@ async def update_body_data(email: str, body_data: BodyDataRequest) -> Optional[d
                 user_email=email,
                 record_data=WeightRecordCreateRequest(
                     weight=body_data.weight,
-                    recorded_at=datetime.utcnow(),
+                    recorded_at=datetime.now(timezone.utc),
                     notes="通过个人资料更新"
                 )
             )
@@ -130,6 +181,8 @@ async def update_activity_level(
         {"$set": update_data},
         return_document=True,
     )
+    forget_user(email)
+    invalidation_bus.publish(invalidation_bus.USER_PROFILE, email)
 
     return result
 
@@ -164,6 +217,8 @@ async def update_health_goal(
         {"$set": update_data},
         return_document=True,
     )
+    forget_user(email)
+    invalidation_bus.publish(invalidation_bus.USER_PROFILE, email)
 
     return result
 
@@ -277,6 +332,12 @@ async def update_user_profile(
         {"$set": update_data},
         return_document=True,
     )
+    forget_user(email)
+    invalidation_bus.publish(invalidation_bus.USER_PROFILE, email)
+    if "timezone" in update_data and update_data["timezone"] != user.get("timezone"):
+        # 日边界改变后，所有按天统计的结果都需要重新计算
+        for topic in (invalidation_bus.FOOD_RECORDS, invalidation_bus.SPORTS_LOG, invalidation_bus.WEIGHT_RECORDS):
+            invalidation_bus.publish(topic, email)
 
     # 自动同步：如果体重发生变化，创建体重记录
     if new_weight is not None and new_weight != old_weight:
@@ -288,7 +349,7 @@ async def update_user_profile(
                 user_email=email,
                 record_data=WeightRecordCreateRequest(
                     weight=new_weight,
-                    recorded_at=datetime.utcnow(),
+                    recorded_at=datetime.now(timezone.utc),
                     notes="通过个人资料更新"
                 )
             )
@@ -307,5 +368,6 @@ async def update_password(email: str, new_hashed_password: str) -> bool:
         {"email": email},
         {"$set": {"hashed_password": new_hashed_password, "updated_at": datetime.utcnow()}},
     )
+    forget_user(email)
 
     return result.modified_count > 0
@@ -2,9 +2,12 @@
 可视化报告服务层
 提供数据分析和可视化相关的业务逻辑
 """
-from typing import List, Dict, Any
-from datetime import date, datetime
+from typing import List, Dict, Any, Optional
+from datetime import date, datetime, timedelta
 from app.database import get_database
+from app.services import day_boundary_service, trend_change_service
+from app.services.user_service import load_user
+from app.utils import dashboard_cache
 from app.schemas.visualization import (
     DailyCalorieSummary,
     NutritionRatio,
@@ -16,13 +19,20 @@ from app.schemas.visualization import (
     HealthReportExportResponse,
 )
 
+# 趋势分组格式（与 MongoDB $dateToString 一致；%U 为以周日开始的周数）
+TREND_DATE_FORMATS = {
+    "day": "%Y-%m-%d",
+    "week": "%Y-W%U",
+    "month": "%Y-%m",
+}
+
 
 async def get_daily_calorie_summary(
     user_email: str,
     target_date: date
 ) -> DailyCalorieSummary:
     """
-    获取每日卡路里摘要
+    获取每日卡路里摘要（按用户和日期缓存，记录或卡路里目标变更时失效）
 
     Args:
         user_email: 用户邮箱
@@ -31,27 +41,41 @@ async def get_daily_calorie_summary(
     Returns:
         DailyCalorieSummary: 每日卡路里摘要
     """
+    return await dashboard_cache.get_or_load(
+        user_email,
+        dashboard_cache.CALORIE_SUMMARY,
+        target_date,
+        target_date,
+        lambda: _compute_daily_calorie_summary(user_email, target_date),
+    )
+
+
+async def _compute_daily_calorie_summary(
+    user_email: str,
+    target_date: date
+) -> DailyCalorieSummary:
+    """聚合某日的摄入与消耗卡路里"""
     db = get_database()
 
     date_str = target_date.isoformat()
 
     # 获取用户的每日卡路里目标
-    user_doc = await db.users.find_one({"email": user_email})
+    user_doc = await load_user(user_email, ("daily_calorie_goal",))
     if not user_doc:
         raise ValueError("用户不存在")
 
     daily_goal = user_doc.get("daily_calorie_goal") or 2000.0  # 默认2000，处理None情况
 
-    # 计算日期范围（当天0点到23:59:59）
-    start_datetime = datetime.combine(target_date, datetime.min.time())
-    end_datetime = datetime.combine(target_date, datetime.max.time())
+    # 计算日期范围（用户本地日期当天 0 点到次日 0 点）
+    tz_name = await day_boundary_service.get_user_timezone(user_email)
+    start_datetime, end_datetime = day_boundary_service.day_window(target_date, target_date, tz_name)
 
     # 聚合饮食记录的卡路里摄入
     food_pipeline = [
         {
             "$match": {
                 "user_email": user_email,
-                "recorded_at": {"$gte": start_datetime, "$lte": end_datetime}
+                "recorded_at": {"$gte": start_datetime, "$lt": end_datetime}
             }
         },
         {
@@ -70,7 +94,7 @@ async def get_daily_calorie_summary(
         {
             "$match": {
                 "created_by": user_email,
-                "created_at": {"$gte": start_datetime, "$lte": end_datetime}
+                "created_at": {"$gte": start_datetime, "$lt": end_datetime}
             }
         },
         {
@@ -81,7 +105,7 @@ async def get_daily_calorie_summary(
         }
     ]
 
-    sports_result = await db.sports_records.aggregate(sports_pipeline).to_list(length=1)
+    sports_result = await db.sports_log.aggregate(sports_pipeline).to_list(length=1)
     total_burned = sports_result[0]["total_burned"] if sports_result else 0.0
 
     # 计算净卡路里和百分比
@@ -121,16 +145,16 @@ async def get_nutrition_analysis(
     if start_date > end_date:
         raise ValueError("开始日期不能晚于结束日期")
 
-    # 计算日期时间范围
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
+    # 计算日期时间范围（用户本地日期）
+    tz_name = await day_boundary_service.get_user_timezone(user_email)
+    start_datetime, end_datetime = day_boundary_service.day_window(start_date, end_date, tz_name)
 
     # 聚合宏量营养素数据
     macro_pipeline = [
         {
             "$match": {
                 "user_email": user_email,
-                "recorded_at": {"$gte": start_datetime, "$lte": end_datetime}
+                "recorded_at": {"$gte": start_datetime, "$lt": end_datetime}
             }
         },
         {
@@ -175,7 +199,7 @@ async def get_nutrition_analysis(
         protein_ratio = carbs_ratio = fat_ratio = 0
 
     # 获取用户信息计算推荐量
-    user_doc = await db.users.find_one({"email": user_email})
+    user_doc = await load_user(user_email, ("weight",))
     weight = user_doc.get("weight") or 70  # 默认70kg，处理None情况
 
     # 推荐量（简化版）
@@ -214,7 +238,7 @@ async def get_nutrition_analysis(
         {
             "$match": {
                 "user_email": user_email,
-                "recorded_at": {"$gte": start_datetime, "$lte": end_datetime}
+                "recorded_at": {"$gte": start_datetime, "$lt": end_datetime}
             }
         },
         {
@@ -270,20 +294,97 @@ async def get_nutrition_analysis(
     )
 
 
+def _bucket_key(day: date, view_type: str) -> str:
+    """按视图类型计算日期所在分组（与聚合中 $dateToString 的格式一致）"""
+    return day.strftime(TREND_DATE_FORMATS[view_type])
+
+
+def _changed_bucket_ranges(
+    changed_days: set,
+    start_date: date,
+    end_date: date,
+    view_type: str,
+    tz_name: str
+) -> tuple[List[str], List[tuple[datetime, datetime]]]:
+    """
+    计算有变更的分组及其在查询范围内覆盖的时间段（左闭右开的 UTC 时间窗口）
+
+    周/月视图下某一天有变更时，需要重新聚合该天所在的整个分组。
+
+    Returns:
+        (按时间排序的分组列表, 合并后的连续时间段列表)
+    """
+    changed_buckets = {_bucket_key(day, view_type) for day in changed_days}
+    ordered_buckets: List[str] = []
+    ranges: List[tuple[datetime, datetime]] = []
+    range_start = None
+    day = start_date
+    while day <= end_date:
+        bucket = _bucket_key(day, view_type)
+        if bucket in changed_buckets:
+            if not ordered_buckets or ordered_buckets[-1] != bucket:
+                ordered_buckets.append(bucket)
+            if range_start is None:
+                range_start = day
+        elif range_start is not None:
+            ranges.append((range_start, day - timedelta(days=1)))
+            range_start = None
+        day += timedelta(days=1)
+    if range_start is not None:
+        ranges.append((range_start, end_date))
+
+    return ordered_buckets, [
+        day_boundary_service.day_window(first, last, tz_name)
+        for first, last in ranges
+    ]
+
+
+def _trend_pipeline(
+    owner_filter: Dict[str, Any],
+    date_field: str,
+    ranges: List[tuple[datetime, datetime]],
+    date_format: str,
+    tz_name: str,
+    accumulator: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """构建按用户本地时间分组的趋势聚合管道（ranges 为需要聚合的时间段）"""
+    match = dict(owner_filter)
+    if len(ranges) == 1:
+        match[date_field] = {"$gte": ranges[0][0], "$lt": ranges[0][1]}
+    else:
+        match["$or"] = [{date_field: {"$gte": first, "$lt": last}} for first, last in ranges]
+
+    return [
+        {"$match": match},
+        {
+            "$group": {
+                "_id": day_boundary_service.date_to_string(date_field, date_format, tz_name),
+                "value": accumulator
+            }
+        },
+        {"$sort": {"_id": 1}}
+    ]
+
+
 async def get_time_series_trend(
     user_email: str,
     start_date: date,
     end_date: date,
-    view_type: str = "day"
+    view_type: str = "day",
+    since: Optional[datetime] = None
 ) -> TimeSeriesTrendResponse:
     """
     获取时间序列趋势分析
 
+    传入 since 时只返回 since 之后底层记录有变更的分组（changed_buckets），
+    客户端用返回的分组替换本地数据；出现在 changed_buckets 中但不在趋势列表里的分组表示已无数据。
+
     Args:
         user_email: 用户邮箱
         start_date: 开始日期
         end_date: 结束日期
         view_type: 视图类型 (day, week, month)
+        since: 上次请求返回的水位线（UTC，可选）
 
     Returns:
         TimeSeriesTrendResponse: 时间序列趋势数据
@@ -293,115 +394,55 @@ async def get_time_series_trend(
     if start_date > end_date:
         raise ValueError("开始日期不能晚于结束日期")
 
-    if view_type not in ["day", "week", "month"]:
+    if view_type not in TREND_DATE_FORMATS:
         raise ValueError("视图类型必须是 day, week 或 month")
 
-    # 计算日期时间范围
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
-
-    # 根据视图类型设置分组格式
-    if view_type == "day":
-        date_format = "%Y-%m-%d"
-    elif view_type == "week":
-        date_format = "%Y-W%U"  # 年-周数
-    else:  # month
-        date_format = "%Y-%m"
-
-    # 聚合饮食摄入趋势
-    intake_pipeline = [
-        {
-            "$match": {
-                "user_email": user_email,
-                "recorded_at": {"$gte": start_datetime, "$lte": end_datetime}
-            }
-        },
-        {
-            "$group": {
-                "_id": {
-                    "$dateToString": {
-                        "format": date_format,
-                        "date": "$recorded_at"
-                    }
-                },
-                "total_intake": {"$sum": "$nutrition_data.calories"}
-            }
-        },
-        {
-            "$sort": {"_id": 1}
-        }
-    ]
-
-    intake_result = await db.food_records.aggregate(intake_pipeline).to_list(length=None)
-    intake_trend = [
-        TimeSeriesDataPoint(date=item["_id"], value=round(item["total_intake"], 2))
-        for item in intake_result
-    ]
-
-    # 聚合运动消耗趋势
-    burned_pipeline = [
-        {
-            "$match": {
-                "created_by": user_email,
-                "created_at": {"$gte": start_datetime, "$lte": end_datetime}
-            }
-        },
-        {
-            "$group": {
-                "_id": {
-                    "$dateToString": {
-                        "format": date_format,
-                        "date": "$created_at"
-                    }
-                },
-                "total_burned": {"$sum": "$calories_burned"}
-            }
-        },
-        {
-            "$sort": {"_id": 1}
+    started_at = datetime.utcnow()
+    date_format = TREND_DATE_FORMATS[view_type]
+
+    # 计算需要聚合的时间段（按用户本地日期）
+    tz_name = await day_boundary_service.get_user_timezone(user_email)
+    changed_buckets = None
+    ranges = [day_boundary_service.day_window(start_date, end_date, tz_name)]
+    if since is not None:
+        changed_days = await trend_change_service.get_changed_days(user_email, since, start_date, end_date)
+        if changed_days is not None:
+            changed_buckets, ranges = _changed_bucket_ranges(
+                changed_days, start_date, end_date, view_type, tz_name
+            )
+
+    trends: Dict[str, List[TimeSeriesDataPoint]] = {"intake": [], "burned": [], "weight": []}
+    if ranges:
+        # 饮食摄入、运动消耗、体重（历史体重记录表）趋势
+        pipelines = {
+            "intake": (db.food_records, _trend_pipeline(
+                {"user_email": user_email}, "recorded_at", ranges, date_format, tz_name,
+                {"$sum": "$nutrition_data.calories"},
+            )),
+            "burned": (db.sports_log, _trend_pipeline(
+                {"created_by": user_email}, "created_at", ranges, date_format, tz_name,
+                {"$sum": "$calories_burned"},
+            )),
+            "weight": (db.weight_records, _trend_pipeline(
+                {"user_email": user_email}, "recorded_at", ranges, date_format, tz_name,
+                {"$avg": "$weight"},
+            )),
         }
-    ]
-
-    burned_result = await db.sports_records.aggregate(burned_pipeline).to_list(length=None)
-    burned_trend = [
-        TimeSeriesDataPoint(date=item["_id"], value=round(item["total_burned"], 2))
-        for item in burned_result
-    ]
-
-    # 体重趋势（从历史体重记录表获取）
-    weight_pipeline = [
-        {
-            "$match": {
-                "user_email": user_email,
-                "recorded_at": {"$gte": start_datetime, "$lte": end_datetime}
-            }
-        },
-        {
-            "$group": {
-                "_id": {
-                    "$dateToString": {
-                        "format": date_format,
-                        "date": "$recorded_at"
-                    }
-                },
-                "avg_weight": {"$avg": "$weight"}
-            }
-        },
-        {"$sort": {"_id": 1}}
-    ]
-
-    weight_result = await db.weight_records.aggregate(weight_pipeline).to_list(length=None)
-    weight_trend = [
-        TimeSeriesDataPoint(date=item["_id"], value=round(item["avg_weight"], 2))
-        for item in weight_result
-    ]
+        for name, (collection, pipeline) in pipelines.items():
+            result = await collection.aggregate(pipeline).to_list(length=None)
+            trends[name] = [
+                TimeSeriesDataPoint(date=item["_id"], value=round(item["value"], 2))
+                for item in result
+            ]
 
     return TimeSeriesTrendResponse(
         view_type=view_type,
         date_range={"start_date": start_date.isoformat(), "end_date": end_date.isoformat()},
-        intake_trend=intake_trend,
-        burned_trend=burned_trend,
-        weight_trend=weight_trend
+        intake_trend=trends["intake"],
+        burned_trend=trends["burned"],
+        weight_trend=trends["weight"],
+        changed_buckets=changed_buckets,
+        watermark=trend_change_service.next_watermark(started_at)
     )
 
 
@@ -427,7 +468,7 @@ async def export_health_report(
         raise ValueError("开始日期不能晚于结束日期")
 
     # 获取用户信息
-    user_doc = await db.users.find_one({"email": user_email})
+    user_doc = await load_user(user_email)
     if not user_doc:
         raise ValueError("用户不存在")
 
@@ -464,18 +505,18 @@ async def export_health_report(
     )
 
     # 计算总体摘要
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
+    tz_name = await day_boundary_service.get_user_timezone(user_email)
+    start_datetime, end_datetime = day_boundary_service.day_window(start_date, end_date, tz_name)
 
     # 统计总记录数
     total_food_records = await db.food_records.count_documents({
         "user_email": user_email,
-        "recorded_at": {"$gte": start_datetime, "$lte": end_datetime}
+        "recorded_at": {"$gte": start_datetime, "$lt": end_datetime}
     })
 
-    total_sports_records = await db.sports_records.count_documents({
+    total_sports_records = await db.sports_log.count_documents({
         "created_by": user_email,
-        "created_at": {"$gte": start_datetime, "$lte": end_datetime}
+        "created_at": {"$gte": start_datetime, "$lt": end_datetime}
     })
 
     # 计算总摄入和总消耗
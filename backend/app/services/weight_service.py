@@ -2,82 +2,126 @@ from typing import Optional, List
 from datetime import datetime, date
 from bson import ObjectId
 from app.database import get_database
+from app.models.user import PAL_COEFFICIENTS, Gender, HealthGoalType
 from app.models.weight import WeightRecordInDB
 from app.schemas.weight import WeightRecordCreateRequest, WeightRecordUpdateRequest
+from app.services.calculation_service import (
+    bmr_expression,
+    tdee_expression,
+    daily_calorie_goal_expression,
+)
+from app.services import day_boundary_service
+from app.utils import invalidation_bus
 
 
 async def create_weight_record(
     user_email: str,
     record_data: WeightRecordCreateRequest
 ) -> dict:
-    """创建体重记录"""
+    """
+    创建体重记录
+
+    写入记录后通过一次条件管道更新同步用户体重：只有当记录时间不早于用户当前体重的记录时间
+    （weight_recorded_at）时才更新 weight，并在同一次写入中重新计算 BMR/TDEE/每日卡路里目标。
+    并发写入多条记录时，最终保留的一定是记录时间最新的体重。
+    """
     db = get_database()
+    recorded_at = await day_boundary_service.normalize_input(user_email, record_data.recorded_at)
 
     weight_record = WeightRecordInDB(
         user_email=user_email,
         weight=record_data.weight,
-        recorded_at=record_data.recorded_at,
+        recorded_at=recorded_at,
         notes=record_data.notes
     )
 
-    result = await db.weight_records.insert_one(weight_record.dict())
-
-    created_record = await db.weight_records.find_one({"_id": result.inserted_id})
-    created_record["_id"] = str(created_record["_id"])
+    created_record = weight_record.dict()
+    result = await db.weight_records.insert_one(created_record)
+    created_record["_id"] = str(result.inserted_id)
+    await day_boundary_service.publish_changes(
+        invalidation_bus.WEIGHT_RECORDS, user_email, [recorded_at]
+    )
 
-    # 自动同步：如果这是最新的体重记录，更新用户的当前体重
-    latest_record = await db.weight_records.find_one(
-        {"user_email": user_email},
-        sort=[("recorded_at", -1)]
+    # 自动同步：如果这是最新的体重记录，更新用户的当前体重及派生指标
+    sync_result = await db.users.update_one(
+        {
+            "email": user_email,
+            "$or": [
+                {"weight_recorded_at": {"$exists": False}},
+                {"weight_recorded_at": None},
+                {"weight_recorded_at": {"$lte": recorded_at}},
+            ],
+        },
+        _weight_sync_pipeline(record_data.weight, recorded_at),
     )
 
-    if latest_record and latest_record["_id"] == result.inserted_id:
-        # 这是最新的记录，更新用户体重
-        await db.users.update_one(
-            {"email": user_email},
-            {
-                "$set": {
-                    "weight": record_data.weight,
-                    "updated_at": datetime.utcnow()
-                }
-            }
-        )
+    if sync_result.matched_count:
+        from app.services.user_service import forget_user
 
-        # 重新计算 BMR 和 TDEE（如果用户已完成基本数据填写）
-        user = await db.users.find_one({"email": user_email})
-        if user and user.get("height") and user.get("age") and user.get("gender"):
-            from app.services.user_service import calculate_bmr, calculate_tdee, calculate_daily_calorie_goal
-
-            bmr = calculate_bmr(
-                weight=record_data.weight,
-                height=user["height"],
-                age=user["age"],
-                gender=user["gender"]
-            )
-
-            update_data = {"bmr": bmr}
-
-            # 如果有活动水平，计算 TDEE
-            if user.get("activity_level"):
-                tdee = calculate_tdee(bmr, user["activity_level"])
-                update_data["tdee"] = tdee
-
-                # 如果有健康目标，计算每日卡路里目标
-                if user.get("health_goal_type"):
-                    daily_calorie_goal = calculate_daily_calorie_goal(
-                        tdee=tdee,
-                        health_goal_type=user["health_goal_type"]
-                    )
-                    update_data["daily_calorie_goal"] = daily_calorie_goal
-
-            await db.users.update_one(
-                {"email": user_email},
-                {"$set": update_data}
-            )
+        forget_user(user_email)
+        # 用户体重和卡路里目标已同步更新
+        invalidation_bus.publish(invalidation_bus.USER_PROFILE, user_email)
 
     return created_record
 
 
+def _weight_sync_pipeline(weight: float, recorded_at: datetime) -> list:
+    """
+    同步用户体重的管道更新：设置体重后重新计算 BMR/TDEE/每日卡路里目标
+
+    与原先的逐步计算规则一致：身高、年龄、性别齐全时才重新计算 BMR，
+    有活动水平时才重新计算 TDEE，有健康目标时才重新计算每日卡路里目标。
+    """
+    profile_complete = {
+        "$and": [
+            {"$gt": ["$height", 0]},
+            {"$gt": ["$age", 0]},
+            {"$in": ["$gender", [gender.value for gender in Gender]]},
+        ]
+    }
+    has_activity_level = {"$in": ["$activity_level", [level.value for level in PAL_COEFFICIENTS]]}
+    has_health_goal = {"$in": ["$health_goal_type", [goal.value for goal in HealthGoalType]]}
+
+    return [
+        {"$set": {
+            "weight": weight,
+            "weight_recorded_at": recorded_at,
+            "updated_at": datetime.utcnow(),
+        }},
+        {"$set": {
+            "bmr": {"$cond": [profile_complete, bmr_expression("$weight"), "$bmr"]},
+        }},
+        {"$set": {
+            "tdee": {"$cond": [
+                {"$and": [profile_complete, has_activity_level]}, tdee_expression("$bmr"), "$tdee"
+            ]},
+        }},
+        {"$set": {
+            "daily_calorie_goal": {"$cond": [
+                {"$and": [profile_complete, has_activity_level, has_health_goal]},
+                daily_calorie_goal_expression("$tdee"),
+                "$daily_calorie_goal",
+            ]},
+        }},
+    ]
+
+
+async def _build_records_query(
+    user_email: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> dict:
+    """构建按用户和记录日期范围（用户本地日期）筛选的查询条件"""
+    query = {"user_email": user_email}
+
+    # 日期范围筛选
+    if start_date or end_date:
+        tz_name = await day_boundary_service.get_user_timezone(user_email)
+        query["recorded_at"] = day_boundary_service.time_range_filter(start_date, end_date, tz_name)
+
+    return query
+
+
 async def get_weight_records(
     user_email: str,
     start_date: Optional[date] = None,
@@ -87,18 +131,7 @@ async def get_weight_records(
     """获取体重记录列表"""
     db = get_database()
 
-    # 构建查询条件
-    query = {"user_email": user_email}
-
-    # 日期范围筛选
-    if start_date or end_date:
-        query["recorded_at"] = {}
-        if start_date:
-            start_datetime = datetime.combine(start_date, datetime.min.time())
-            query["recorded_at"]["$gte"] = start_datetime
-        if end_date:
-            end_datetime = datetime.combine(end_date, datetime.max.time())
-            query["recorded_at"]["$lte"] = end_datetime
+    query = await _build_records_query(user_email, start_date, end_date)
 
     # 查询记录
     total = await db.weight_records.count_documents(query)
@@ -111,6 +144,88 @@ async def get_weight_records(
     return records, total
 
 
+SECONDS_PER_DAY = 86400.0
+
+
+async def get_weight_series(
+    user_email: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    points: int = 200,
+    window_days: int = 7
+) -> dict:
+    """
+    获取降采样后的体重曲线
+
+    只投影 recorded_at / weight 两个字段读取范围内全部记录，在 NumPy 中计算：
+    - 按时间窗口（window_days 天）的滑动平均（基于全部原始点）
+    - 最小二乘趋势斜率（公斤/周）
+    - LTTB 降采样到 points 个点，每个保留点附带其滑动平均值
+
+    Args:
+        user_email: 用户邮箱
+        start_date: 开始日期（可选）
+        end_date: 结束日期（可选）
+        points: 目标点数
+        window_days: 滑动平均窗口（天）
+
+    Returns:
+        {"total", "downsampled", "window_days", "trend", "points"}
+    """
+    # NumPy 较重，按需导入（启动后由 main.OPTIONAL_MODULES 在后台预热）
+    import numpy as np
+    from app.utils.series import linear_slope, lttb_indices, trailing_mean
+
+    db = get_database()
+    query = await _build_records_query(user_email, start_date, end_date)
+    cursor = db.weight_records.find(
+        query, {"_id": 0, "recorded_at": 1, "weight": 1}
+    ).sort("recorded_at", 1)
+
+    recorded_at: List[datetime] = []
+    weights: List[float] = []
+    async for record in cursor:
+        recorded_at.append(record["recorded_at"])
+        weights.append(record["weight"])
+
+    total = len(weights)
+    result = {
+        "total": total,
+        "downsampled": False,
+        "window_days": window_days,
+        "trend": None,
+        "points": [],
+    }
+    if total == 0:
+        return result
+
+    # 以天为单位的横坐标（相对第一条记录），避免大数值影响拟合精度
+    timestamps = np.array(recorded_at, dtype="datetime64[ms]").astype(np.int64) / 1000.0
+    days = (timestamps - timestamps[0]) / SECONDS_PER_DAY
+    values = np.array(weights, dtype=float)
+
+    moving_average = trailing_mean(days, values, float(window_days))
+    slope, _ = linear_slope(days, values)
+    result["trend"] = {
+        "slope_per_week": round(slope * 7, 3),
+        "start_weight": round(float(values[0]), 2),
+        "end_weight": round(float(values[-1]), 2),
+        "change": round(float(values[-1] - values[0]), 2),
+    }
+
+    indices = lttb_indices(days, values, points)
+    result["downsampled"] = len(indices) < total
+    result["points"] = [
+        {
+            "recorded_at": recorded_at[i],
+            "weight": weights[i],
+            "moving_average": round(float(moving_average[i]), 2),
+        }
+        for i in indices.tolist()
+    ]
+    return result
+
+
 async def get_weight_record_by_id(record_id: str, user_email: str) -> Optional[dict]:
     """根据ID获取体重记录"""
     db = get_database()
@@ -144,16 +259,26 @@ async def update_weight_record(
 
     if not update_fields:
         return await get_weight_record_by_id(record_id, user_email)
+    if "recorded_at" in update_fields:
+        update_fields["recorded_at"] = await day_boundary_service.normalize_input(
+            user_email, update_fields["recorded_at"]
+        )
 
     try:
-        result = await db.weight_records.find_one_and_update(
+        previous = await db.weight_records.find_one_and_update(
             {"_id": ObjectId(record_id), "user_email": user_email},
             {"$set": update_fields},
-            return_document=True
+            return_document=False
+        )
+        if not previous:
+            return None
+
+        result = {**previous, **update_fields, "_id": str(previous["_id"])}
+        await day_boundary_service.publish_changes(
+            invalidation_bus.WEIGHT_RECORDS,
+            user_email,
+            [previous.get("recorded_at"), update_fields.get("recorded_at")],
         )
-
-        if result:
-            result["_id"] = str(result["_id"])
 
         return result
     except Exception:
@@ -165,11 +290,15 @@ async def delete_weight_record(record_id: str, user_email: str) -> bool:
     db = get_database()
 
     try:
-        result = await db.weight_records.delete_one({
-            "_id": ObjectId(record_id),
-            "user_email": user_email
-        })
-
-        return result.deleted_count > 0
+        deleted = await db.weight_records.find_one_and_delete(
+            {"_id": ObjectId(record_id), "user_email": user_email},
+            projection={"recorded_at": 1},
+        )
     except Exception:
         return False
+    if not deleted:
+        return False
+    await day_boundary_service.publish_changes(
+        invalidation_bus.WEIGHT_RECORDS, user_email, [deleted.get("recorded_at")]
+    )
+    return True
@@ -0,0 +1,148 @@
+"""
+读多写少的目录类数据缓存（运动类型列表、食谱分类、食物详情、食谱详情）
+
+- 进程内缓存，按 (namespace, key) 存储服务层查询结果
+- 由对应的创建/更新/删除服务函数显式调用 invalidate() 失效
+- CATALOG_CACHE_TTL_SECONDS 作为兜底：多 worker 部署时其他进程的写入最多延迟一个 TTL 可见
+- etag_json_response() 为响应生成强 ETag，并对 If-None-Match 命中的请求返回 304
+"""
+import copy
+import hashlib
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.utils import metrics
+
+# 缓存命名空间
+SPORTS_NAMESPACE = "available_sports"  # key: 用户邮箱
+RECIPE_CATEGORIES_NAMESPACE = "recipe_categories"  # key: 用户邮箱（未登录为 None）
+FOOD_NAMESPACE = "food_detail"  # key: 食物ID
+RECIPE_NAMESPACE = "recipe_detail"  # key: 食谱ID
+
+# (namespace, key) -> (过期时间戳, 值)
+_cache: Dict[Tuple[str, Any], Tuple[float, Any]] = {}
+
+# 每次失效递增（按命名空间；clear() 递增 _clear_generation）。
+# 加载期间发生过失效时不写入缓存，避免把变更前读到的结果缓存下来
+_generations: Dict[str, int] = {}
+_clear_generation = 0
+
+
+def _generation(namespace: str) -> Tuple[int, int]:
+    return _clear_generation, _generations.get(namespace, 0)
+
+
+async def get_or_load(namespace: str, key: Any, loader: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    读取缓存，未命中时调用 loader 加载并写入缓存（None 结果不缓存；加载期间该命名空间被失效时也不缓存）
+
+    Args:
+        namespace: 缓存命名空间
+        key: 命名空间内的键
+        loader: 未命中时执行的异步加载函数
+
+    Returns:
+        缓存值的副本（调用方可以安全修改）
+    """
+    if not settings.CATALOG_CACHE_ENABLED:
+        return await loader()
+
+    cache_key = (namespace, key)
+    entry = _cache.get(cache_key)
+    if entry and entry[0] > time.monotonic():
+        metrics.cache_requests_total.inc(namespace, "hit")
+        return copy.deepcopy(entry[1])
+
+    metrics.cache_requests_total.inc(namespace, "miss")
+    generation = _generation(namespace)
+    value = await loader()
+    if value is not None and generation == _generation(namespace):
+        if len(_cache) >= settings.CATALOG_CACHE_MAX_ENTRIES:
+            _evict()
+        _cache[cache_key] = (time.monotonic() + settings.CATALOG_CACHE_TTL_SECONDS, copy.deepcopy(value))
+    return value
+
+
+def invalidate(namespace: str, key: Any = None) -> None:
+    """
+    失效缓存
+
+    Args:
+        namespace: 缓存命名空间
+        key: 要失效的键，为 None 时失效整个命名空间
+    """
+    _generations[namespace] = _generations.get(namespace, 0) + 1
+    if key is not None:
+        _cache.pop((namespace, key), None)
+        return
+    for cache_key in [cache_key for cache_key in _cache if cache_key[0] == namespace]:
+        del _cache[cache_key]
+
+
+def clear() -> None:
+    """清空全部缓存（如后台初始化写入公共数据后）"""
+    global _clear_generation
+    _clear_generation += 1
+    _cache.clear()
+
+
+def _evict() -> None:
+    """容量已满时先清理过期条目，仍然不足则丢弃最早写入的一半"""
+    now = time.monotonic()
+    for cache_key in [cache_key for cache_key, (expires_at, _) in _cache.items() if expires_at <= now]:
+        del _cache[cache_key]
+    if len(_cache) >= settings.CATALOG_CACHE_MAX_ENTRIES:
+        for cache_key in list(_cache)[: len(_cache) // 2 or 1]:
+            del _cache[cache_key]
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """各命名空间当前缓存条目数"""
+    stats: Dict[str, int] = {}
+    for namespace, _ in _cache:
+        stats[namespace] = stats.get(namespace, 0) + 1
+    return stats
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # If-None-Match 使用弱比较，忽略 W/ 前缀
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def etag_json_response(request: Request, content: Any) -> Response:
+    """
+    生成带强 ETag 的 JSON 响应，If-None-Match 命中时返回 304
+
+    ETag 为响应体字节的 SHA-256 摘要，响应内容任何变化都会产生新的 ETag。
+
+    Args:
+        request: 当前请求
+        content: 响应内容（Pydantic 模型、dict、list 等）
+
+    Returns:
+        200 JSONResponse 或 304 Response
+    """
+    response = JSONResponse(content=jsonable_encoder(content))
+    etag = f'"{hashlib.sha256(response.body).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return response
@@ -0,0 +1,161 @@
+"""
+首页看板接口的按用户缓存（每日卡路里摘要、每日营养摘要、运动报告）
+
+- 条目按用户分组，每个条目记录其覆盖的日期范围
+- 通过 invalidation_bus 订阅记录变更：只失效覆盖了受影响日期、且依赖该数据的条目
+- 用户数超过 DASHBOARD_CACHE_MAX_USERS 时按最近最少使用淘汰整个用户
+- 进程内缓存，DASHBOARD_CACHE_TTL_SECONDS 作为多 worker 部署时的兜底过期时间
+"""
+import copy
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from app.config import settings
+from app.utils import invalidation_bus, metrics
+
+METRIC_NAME = "dashboard"
+
+# 缓存类型
+CALORIE_SUMMARY = "daily_calorie_summary"
+DAILY_NUTRITION = "daily_nutrition"
+SPORTS_REPORT = "sports_report"
+
+# 各主题变更会影响的缓存类型
+TOPIC_DEPENDENCIES: Dict[str, Set[str]] = {
+    invalidation_bus.FOOD_RECORDS: {CALORIE_SUMMARY, DAILY_NUTRITION},
+    invalidation_bus.SPORTS_LOG: {CALORIE_SUMMARY, SPORTS_REPORT},
+    # 体重记录和用户资料会改变每日卡路里目标
+    invalidation_bus.WEIGHT_RECORDS: {CALORIE_SUMMARY},
+    invalidation_bus.USER_PROFILE: {CALORIE_SUMMARY},
+}
+
+# 单个用户最多缓存的条目数（超出时丢弃最早写入的条目）
+MAX_ENTRIES_PER_USER = 64
+
+# 用户邮箱 -> {(类型, 开始日期, 结束日期): (过期时间戳, 值)}，按最近使用排序
+_cache: "OrderedDict[str, Dict[Tuple[str, date, date], Tuple[float, Any]]]" = OrderedDict()
+
+# 每次失效递增；加载期间发生过失效时不写入缓存，避免把变更前读到的结果缓存下来
+_generation = 0
+
+_stats: Dict[str, int] = {
+    "hits": 0,
+    "misses": 0,
+    "invalidations": 0,
+    "evicted_users": 0,
+}
+
+
+async def get_or_load(
+    user_email: str,
+    kind: str,
+    start_date: date,
+    end_date: date,
+    loader: Callable[[], Awaitable[Any]],
+) -> Any:
+    """
+    读取看板缓存，未命中时调用 loader 加载并写入缓存
+
+    Args:
+        user_email: 用户邮箱
+        kind: 缓存类型
+        start_date: 结果覆盖的开始日期
+        end_date: 结果覆盖的结束日期
+        loader: 未命中时执行的异步加载函数
+
+    Returns:
+        缓存值的副本（调用方可以安全修改）
+    """
+    if not settings.DASHBOARD_CACHE_ENABLED:
+        return await loader()
+
+    key = (kind, start_date, end_date)
+    entries = _cache.get(user_email)
+    if entries is not None:
+        _cache.move_to_end(user_email)
+        entry = entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            _stats["hits"] += 1
+            metrics.cache_requests_total.inc(METRIC_NAME, "hit")
+            return copy.deepcopy(entry[1])
+
+    _stats["misses"] += 1
+    metrics.cache_requests_total.inc(METRIC_NAME, "miss")
+    generation = _generation
+    value = await loader()
+    if generation == _generation:
+        _store(user_email, key, value)
+    return value
+
+
+def _store(user_email: str, key: Tuple[str, date, date], value: Any) -> None:
+    entries = _cache.get(user_email)
+    if entries is None:
+        entries = _cache[user_email] = {}
+        while len(_cache) > settings.DASHBOARD_CACHE_MAX_USERS:
+            _cache.popitem(last=False)
+            _stats["evicted_users"] += 1
+    _cache.move_to_end(user_email)
+
+    entries.pop(key, None)
+    if len(entries) >= MAX_ENTRIES_PER_USER:
+        del entries[next(iter(entries))]
+    entries[key] = (time.monotonic() + settings.DASHBOARD_CACHE_TTL_SECONDS, copy.deepcopy(value))
+
+
+def invalidate(user_email: str, kinds: Optional[Set[str]] = None, dates: Optional[Set[date]] = None) -> None:
+    """
+    失效用户的看板缓存
+
+    Args:
+        user_email: 用户邮箱
+        kinds: 要失效的缓存类型，None 表示全部类型
+        dates: 受影响的日期，None 表示全部日期
+    """
+    global _generation
+    _generation += 1
+
+    entries = _cache.get(user_email)
+    if not entries:
+        return
+
+    for key in list(entries):
+        kind, start_date, end_date = key
+        if kinds is not None and kind not in kinds:
+            continue
+        if dates is not None and not any(start_date <= day <= end_date for day in dates):
+            continue
+        del entries[key]
+        _stats["invalidations"] += 1
+
+    if not entries:
+        del _cache[user_email]
+
+
+def clear() -> None:
+    """清空全部看板缓存"""
+    _cache.clear()
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """看板缓存统计"""
+    total = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "hit_rate": round(_stats["hits"] / total, 4) if total else 0.0,
+        "users": len(_cache),
+        "entries": sum(len(entries) for entries in _cache.values()),
+    }
+
+
+def _make_handler(kinds: Set[str]) -> invalidation_bus.Handler:
+    def handler(user_email: str, dates: Optional[Set[date]]) -> None:
+        invalidate(user_email, kinds, dates)
+
+    return handler
+
+
+for _topic, _kinds in TOPIC_DEPENDENCIES.items():
+    invalidation_bus.subscribe(_topic, _make_handler(_kinds))
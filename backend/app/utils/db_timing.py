@@ -0,0 +1,144 @@
+"""
+数据库耗时统计模块
+
+通过 pymongo 命令监听器统计每个 HTTP 请求内执行的 MongoDB 命令数量与耗时：
+- 请求级统计保存在 contextvar 中（Motor 在线程池执行命令时会复制当前上下文）
+- 响应时通过 Server-Timing 头返回，例如 `Server-Timing: db;dur=12.34;desc="5 queries"`
+- 同时累计进程级汇总数据，供监控接口读取
+"""
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from pymongo import monitoring
+
+from app.utils import metrics
+
+
+class RequestDBStats:
+    """单个请求内的数据库命令统计"""
+
+    __slots__ = ("count", "duration_ms", "_lock")
+
+    def __init__(self):
+        self.count = 0
+        self.duration_ms = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, duration_ms: float):
+        with self._lock:
+            self.count += 1
+            self.duration_ms += duration_ms
+
+
+_request_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("request_db_stats", default=None)
+
+# 进程级汇总统计
+_stats_lock = threading.Lock()
+_aggregate_stats: Dict[str, Any] = {
+    "requests": 0,
+    "commands": 0,
+    "failed_commands": 0,
+    "duration_ms_total": 0.0,
+    "by_command": {},
+}
+
+
+def _record_command(command_name: str, duration_ms: float, failed: bool):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.add(duration_ms)
+
+    metrics.db_commands_total.inc(command_name, "error" if failed else "success")
+    metrics.db_command_duration_seconds.observe(duration_ms / 1000, command_name)
+
+    with _stats_lock:
+        _aggregate_stats["commands"] += 1
+        _aggregate_stats["duration_ms_total"] += duration_ms
+        if failed:
+            _aggregate_stats["failed_commands"] += 1
+        by_command = _aggregate_stats["by_command"].setdefault(
+            command_name, {"count": 0, "duration_ms_total": 0.0}
+        )
+        by_command["count"] += 1
+        by_command["duration_ms_total"] += duration_ms
+
+
+class DBCommandListener(monitoring.CommandListener):
+    """pymongo 命令监听器，将命令耗时归属到当前请求"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        _record_command(event.command_name, event.duration_micros / 1000, failed=False)
+
+    def failed(self, event):
+        _record_command(event.command_name, event.duration_micros / 1000, failed=True)
+
+
+class DBTimingMiddleware:
+    """
+    ASGI 中间件：为每个 HTTP 请求开启数据库统计，并在响应头中添加 Server-Timing
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDBStats()
+        token = _request_stats.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", format_server_timing(stats).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            with _stats_lock:
+                _aggregate_stats["requests"] += 1
+
+
+def format_server_timing(stats: RequestDBStats) -> str:
+    """生成 Server-Timing 头的值"""
+    return f'db;dur={stats.duration_ms:.2f};desc="{stats.count} queries"'
+
+
+def get_current_request_stats() -> Optional[RequestDBStats]:
+    """获取当前请求的数据库统计（不在请求上下文中时返回 None）"""
+    return _request_stats.get()
+
+
+def get_db_timing_stats() -> Dict[str, Any]:
+    """获取进程级数据库耗时汇总"""
+    with _stats_lock:
+        requests = _aggregate_stats["requests"]
+        commands = _aggregate_stats["commands"]
+        duration_total = _aggregate_stats["duration_ms_total"]
+        by_command = {
+            name: {
+                "count": item["count"],
+                "avg_ms": round(item["duration_ms_total"] / item["count"], 2) if item["count"] else 0.0,
+            }
+            for name, item in _aggregate_stats["by_command"].items()
+        }
+        failed = _aggregate_stats["failed_commands"]
+
+    return {
+        "requests": requests,
+        "commands": commands,
+        "failed_commands": failed,
+        "duration_ms_total": round(duration_total, 2),
+        "avg_commands_per_request": round(commands / requests, 2) if requests else 0.0,
+        "avg_db_ms_per_request": round(duration_total / requests, 2) if requests else 0.0,
+        "by_command": by_command,
+    }
@@ -1,8 +1,10 @@
 import aiosmtplib
 import random
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from app.config import settings
+from app.utils import metrics
 
 
 async def send_email(to_email: str, subject: str, body: str) -> bool:
@@ -16,14 +18,20 @@ async def send_email(to_email: str, subject: str, body: str) -> bool:
         message.attach(MIMEText(body, "html"))
 
         # 1. 发送到真实邮箱（Postfix）
-        await aiosmtplib.send(
-            message,
-            hostname=settings.SMTP_HOST,
-            port=settings.SMTP_PORT,
-            username=settings.SMTP_USER or None,
-            password=settings.SMTP_PASSWORD or None,
-            start_tls=False,  # Postfix 内网通信无需 TLS
-        )
+        started = time.perf_counter()
+        try:
+            await aiosmtplib.send(
+                message,
+                hostname=settings.SMTP_HOST,
+                port=settings.SMTP_PORT,
+                username=settings.SMTP_USER or None,
+                password=settings.SMTP_PASSWORD or None,
+                start_tls=False,  # Postfix 内网通信无需 TLS
+            )
+        except Exception:
+            metrics.observe_external_call("smtp", started, success=False)
+            raise
+        metrics.observe_external_call("smtp", started, success=True)
 
         # 2. 同时发送一份副本到 MailHog 归档（用于调试查看）
         try:
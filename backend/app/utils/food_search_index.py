@@ -0,0 +1,287 @@
+"""
+本地食物搜索索引（进程内）
+
+对食物名称和品牌建立倒排索引，索引项为汉字单字 + 相邻双字，同时索引名称的拼音全拼和首字母：
+- "jidan" / "jd" 都能找到"鸡蛋"；同音错字（"西红柿炒鸡但"）通过拼音匹配
+- 编辑距离容错（"西红柿炒鸡丹"、"jidna"）：拼错的查询仍与目标共享大部分双字索引项，
+  只对 n-gram 候选中 BM25 得分较高的结果计算编辑距离，不需要遍历全部名称
+- BM25 相关性打分，叠加完全/前缀/包含/容错匹配加分，再按用户自建、个人和全站记录次数加权
+
+索引只保存检索需要的字段，支持单条增删改（upsert / remove），由 food_search_service 维护。
+拼音依赖 pypinyin（按需导入），未安装时只索引名称和品牌本身。
+"""
+import math
+import re
+import unicodedata
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 匹配加分（与归一化到 0-1 的 BM25 分数相加）
+EXACT_BONUS = 3.0
+PREFIX_BONUS = 2.0
+CONTAINS_BONUS = 1.5
+FUZZY_BONUS = 1.5  # 乘以 (1 - 编辑距离 / 查询长度)
+PINYIN_FACTOR = 0.8  # 中文查询通过拼音（同音字）命中时的加分折扣
+
+# 排序加权：用户自建食物、个人记录次数、全站记录次数（log1p 平滑）
+OWNER_BOOST = 1.5
+POPULARITY_WEIGHT = 0.3
+GLOBAL_POPULARITY_WEIGHT = 0.1
+
+# 没有任何匹配加分的结果，BM25 至少达到最高分的该比例才返回
+MIN_RELATIVE_BM25 = 0.5
+# BM25 达到最高分的该比例的候选才计算编辑距离
+FUZZY_MIN_RELATIVE_BM25 = 0.3
+# 超过该比例的食物都含有的索引项对排序几乎没有贡献，查询时跳过（查询只含此类索引项时除外）
+MAX_GRAM_DOC_RATIO = 0.25
+
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize(text: Optional[str]) -> str:
+    """全角转半角、转小写，并去掉空白和标点"""
+    if not text:
+        return ""
+    return _SEPARATORS.sub("", unicodedata.normalize("NFKC", text).lower())
+
+
+def _is_han(char: str) -> bool:
+    return "\u4e00" <= char <= "\u9fff" or "\u3400" <= char <= "\u4dbf"
+
+
+@lru_cache(maxsize=65536)
+def pinyin_keys(text: str) -> Tuple[str, str]:
+    """
+    文本的拼音全拼和首字母
+
+    Args:
+        text: 已归一化的文本
+
+    Returns:
+        (全拼, 首字母)，如 "鸡蛋" -> ("jidan", "jd")；不含汉字或未安装 pypinyin 时为 ("", "")
+    """
+    if not any(_is_han(char) for char in text):
+        return "", ""
+    try:
+        from pypinyin import lazy_pinyin
+    except ImportError:
+        return "", ""
+    syllables = [syllable for syllable in lazy_pinyin(text) if syllable]
+    return "".join(syllables), "".join(syllable[0] for syllable in syllables)
+
+
+def _grams(text: str) -> List[str]:
+    """汉字单字 + 相邻双字（单个字母区分度太低，不作为索引项）"""
+    return [char for char in text if _is_han(char)] + [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+def levenshtein(a: str, b: str) -> int:
+    """编辑距离"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        previous = current
+    return previous[-1]
+
+
+def max_edit_distance(query: str) -> int:
+    """查询允许的编辑距离：2 个字符以内不容错，5 个以内容错 1 个，更长容错 2 个"""
+    if len(query) <= 2:
+        return 0
+    return 1 if len(query) <= 5 else 2
+
+
+class SearchHit(NamedTuple):
+    food_id: str
+    score: float
+    strong: bool  # 是否有完全/前缀/包含/容错匹配（否则仅为 n-gram 部分重合）
+
+
+class _IndexedFood:
+    __slots__ = ("name", "brand", "pinyin", "initials", "owner", "recency", "grams", "length")
+
+    def __init__(self, name, brand, pinyin, initials, owner, recency, grams):
+        self.name = name
+        self.brand = brand
+        self.pinyin = pinyin
+        self.initials = initials
+        self.owner = owner
+        self.recency = recency
+        self.grams = grams
+        self.length = sum(grams.values())
+
+
+class FoodSearchIndex:
+    """食物搜索索引（非线程安全，由调用方在事件循环中串行修改）"""
+
+    def __init__(self):
+        self._foods: Dict[str, _IndexedFood] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._foods)
+
+    def upsert(self, food_id: str, name: Optional[str], brand: Optional[str], owner: Optional[str], created_at=None) -> None:
+        """
+        添加或更新食物
+
+        Args:
+            food_id: 食物ID
+            name: 名称
+            brand: 品牌
+            owner: 创建者（"all" 或用户邮箱）
+            created_at: 创建时间（同分时新的在前）
+        """
+        self.remove(food_id)
+        name_key, brand_key = normalize(name), normalize(brand)
+        if not name_key and not brand_key:
+            return
+        pinyin, initials = pinyin_keys(name_key)
+
+        grams: Dict[str, int] = {}
+        for field in (name_key, brand_key, pinyin, initials):
+            for gram in _grams(field):
+                grams[gram] = grams.get(gram, 0) + 1
+        for gram, count in grams.items():
+            self._postings.setdefault(gram, {})[food_id] = count
+
+        recency = created_at.timestamp() if isinstance(created_at, datetime) else 0.0
+        food = self._foods[food_id] = _IndexedFood(name_key, brand_key, pinyin, initials, owner, recency, grams)
+        self._total_length += food.length
+
+    def remove(self, food_id: str) -> None:
+        """移除食物（不存在时忽略）"""
+        food = self._foods.pop(food_id, None)
+        if food is None:
+            return
+        for gram in food.grams:
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.pop(food_id, None)
+                if not postings:
+                    del self._postings[gram]
+        self._total_length -= food.length
+
+    def search(
+        self,
+        keyword: str,
+        owners: Iterable[str],
+        preferred_owner: Optional[str] = None,
+        log_counts: Optional[Mapping[str, float]] = None,
+        global_counts: Optional[Mapping[str, float]] = None,
+        limit: int = 20
+    ) -> List[SearchHit]:
+        """
+        搜索食物
+
+        Args:
+            keyword: 关键词（中文、拼音全拼或首字母）
+            owners: 可见的创建者（如 ["all", 用户邮箱]）
+            preferred_owner: 优先的创建者（用户自建食物加权）
+            log_counts: 食物ID -> 用户的记录次数（常吃食物加权）
+            global_counts: 食物ID -> 全站记录次数（热门食物加权，权重低于用户自己的记录）
+            limit: 返回数量
+
+        Returns:
+            按得分从高到低排列的结果
+        """
+        query = normalize(keyword)
+        if not query or not self._foods:
+            return []
+        owners = set(owners)
+        log_counts = log_counts or {}
+        global_counts = global_counts or {}
+        query_pinyin = pinyin_keys(query)[0] if any(_is_han(char) for char in query) else ""
+
+        bm25 = self._bm25(set(_grams(query)) | set(_grams(query_pinyin)), owners)
+        top_bm25 = max(bm25.values(), default=0.0)
+        hits = []
+        for food_id, raw_score in bm25.items():
+            food = self._foods[food_id]
+            relative = raw_score / top_bm25
+            bonus = self._match_bonus(query, query_pinyin, food)
+            if bonus < FUZZY_BONUS and relative >= FUZZY_MIN_RELATIVE_BM25:
+                bonus = max(bonus, FUZZY_BONUS * self._closeness(query, query_pinyin, food))
+            if bonus == 0.0 and relative < MIN_RELATIVE_BM25:
+                continue
+            score = relative + bonus
+            if preferred_owner and food.owner == preferred_owner:
+                score *= OWNER_BOOST
+            score *= 1.0 + POPULARITY_WEIGHT * math.log1p(log_counts.get(food_id, 0))
+            score *= 1.0 + GLOBAL_POPULARITY_WEIGHT * math.log1p(global_counts.get(food_id, 0))
+            hits.append(SearchHit(food_id, score, bonus > 0.0))
+
+        # 同分时新创建的在前
+        hits.sort(key=lambda hit: (hit.score, self._foods[hit.food_id].recency), reverse=True)
+        return hits[:limit]
+
+    def _bm25(self, grams: Set[str], owners: Set[str]) -> Dict[str, float]:
+        total = len(self._foods)
+        average_length = self._total_length / total
+        postings_list = [self._postings[gram] for gram in grams if gram in self._postings]
+        selective = [postings for postings in postings_list if len(postings) <= total * MAX_GRAM_DOC_RATIO]
+        if not selective and postings_list:
+            selective = [min(postings_list, key=len)]
+
+        scores: Dict[str, float] = {}
+        for postings in selective:
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for food_id, tf in postings.items():
+                food = self._foods[food_id]
+                if food.owner not in owners:
+                    continue
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * food.length / average_length)
+                scores[food_id] = scores.get(food_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+        return scores
+
+    @staticmethod
+    def _closeness(query: str, query_pinyin: str, food: _IndexedFood) -> float:
+        """容错匹配的接近程度（1 - 编辑距离 / 查询长度），超出允许的编辑距离时为 0"""
+        best = 0.0
+        pairs = [(query, food.name, 1.0), (query, food.pinyin, 1.0)]
+        if query_pinyin:
+            pairs.append((query_pinyin, food.pinyin, PINYIN_FACTOR))
+        for text, key, factor in pairs:
+            max_distance = max_edit_distance(text)
+            if not key or max_distance == 0 or abs(len(key) - len(text)) > max_distance:
+                continue
+            distance = levenshtein(text, key)
+            if distance <= max_distance:
+                best = max(best, (1.0 - distance / len(text)) * factor)
+        return best
+
+    @staticmethod
+    def _match_bonus(query: str, query_pinyin: str, food: _IndexedFood) -> float:
+        best = 0.0
+        candidates = [(query, food.name, 1.0), (query, food.brand, 1.0), (query, food.pinyin, 1.0)]
+        if len(query) >= 2:
+            candidates.append((query, food.initials, 1.0))
+        if query_pinyin:
+            candidates.append((query_pinyin, food.pinyin, PINYIN_FACTOR))
+        for text, key, factor in candidates:
+            if not key:
+                continue
+            if key == text:
+                bonus = EXACT_BONUS
+            elif key.startswith(text):
+                bonus = PREFIX_BONUS
+            elif text in key:
+                bonus = CONTAINS_BONUS
+            else:
+                continue
+            best = max(best, bonus * factor)
+        return best
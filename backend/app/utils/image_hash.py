@@ -0,0 +1,72 @@
+"""
+图片感知哈希工具模块
+
+使用差值哈希（dHash）为图片生成 64 位指纹，用于识别"同一餐被重复拍照"的近似重复图片。
+相比 MD5 等内容哈希，感知哈希对缩放、轻微裁剪、压缩和亮度变化不敏感。
+"""
+from pathlib import Path
+from typing import List, Union
+
+from PIL import Image
+
+# dHash 尺寸：缩放到 (HASH_SIZE + 1) x HASH_SIZE，相邻像素比较得到 HASH_SIZE * HASH_SIZE 位
+HASH_SIZE = 8
+HASH_BITS = HASH_SIZE * HASH_SIZE
+
+# 分段数量：64 位哈希切成 8 段，每段 8 位
+# 根据抽屉原理，汉明距离 <= HASH_BANDS - 1 的两个哈希至少有一段完全相同，可用于索引预筛选
+HASH_BANDS = 8
+BAND_BITS = HASH_BITS // HASH_BANDS
+
+
+def compute_dhash(image_path: Union[str, Path]) -> int:
+    """
+    计算图片的差值哈希（dHash）
+
+    Args:
+        image_path: 图片路径
+
+    Returns:
+        64 位整数哈希值
+    """
+    with Image.open(image_path) as image:
+        gray = image.convert("L").resize(
+            (HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS
+        )
+        pixels = list(gray.getdata())
+
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (1 if pixels[offset + col] > pixels[offset + col + 1] else 0)
+    return value
+
+
+def hamming_distance(hash_a: int, hash_b: int) -> int:
+    """计算两个哈希值之间的汉明距离"""
+    return bin(hash_a ^ hash_b).count("1")
+
+
+def hash_to_hex(value: int) -> str:
+    """将哈希值转换为定长 16 位十六进制字符串（便于存储和排查）"""
+    return f"{value:0{HASH_BITS // 4}x}"
+
+
+def hex_to_hash(value: str) -> int:
+    """将十六进制字符串还原为哈希值"""
+    return int(value, 16)
+
+
+def hash_bands(value: int) -> List[str]:
+    """
+    将哈希值切分为带位置前缀的分段键，如 ["0:a3", "1:0f", ...]
+
+    位置前缀保证不同位置的相同字节不会误匹配。
+    """
+    mask = (1 << BAND_BITS) - 1
+    bands = []
+    for index in range(HASH_BANDS):
+        shift = HASH_BITS - BAND_BITS * (index + 1)
+        bands.append(f"{index}:{(value >> shift) & mask:02x}")
+    return bands
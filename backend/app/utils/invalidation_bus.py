@@ -0,0 +1,58 @@
+"""
+用户数据变更通知（进程内失效总线）
+
+记录类数据（饮食记录、食谱记录、运动记录、体重记录）和用户资料在写入后调用 publish()，
+各类缓存通过 subscribe() 注册处理函数，按用户和受影响的日期失效自己的条目。
+处理函数为同步函数，在写操作所在的协程中直接执行；单个处理函数出错不影响写操作和其他订阅者。
+"""
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+# 主题
+FOOD_RECORDS = "food_records"  # 饮食记录（包括食谱记录生成的批次记录）
+SPORTS_LOG = "sports_log"  # 运动记录
+WEIGHT_RECORDS = "weight_records"  # 体重记录（可能同步更新用户体重和卡路里目标）
+USER_PROFILE = "user_profile"  # 用户资料（身体数据、活动水平、健康目标）
+
+# 处理函数签名: handler(user_email, dates)，dates 为 None 表示影响该用户的全部日期
+Handler = Callable[[str, Optional[Set[date]]], None]
+
+_subscribers: Dict[str, List[Handler]] = {}
+
+
+def subscribe(topic: str, handler: Handler) -> None:
+    """
+    订阅主题
+
+    Args:
+        topic: 主题名
+        handler: 处理函数
+    """
+    handlers = _subscribers.setdefault(topic, [])
+    if handler not in handlers:
+        handlers.append(handler)
+
+
+def publish(topic: str, user_email: str, dates: Optional[Iterable[object]] = None) -> None:
+    """
+    发布变更通知
+
+    Args:
+        topic: 主题名
+        user_email: 数据所属用户邮箱
+        dates: 受影响的日期（date/datetime，None 值会被忽略）；不传表示影响全部日期
+    """
+    affected: Optional[Set[date]] = None
+    if dates is not None:
+        affected = set()
+        for value in dates:
+            if isinstance(value, datetime):
+                affected.add(value.date())
+            elif isinstance(value, date):
+                affected.add(value)
+
+    for handler in list(_subscribers.get(topic, ())):
+        try:
+            handler(user_email, affected)
+        except Exception as e:
+            print(f"⚠️  缓存失效处理失败（{topic}）: {e}")
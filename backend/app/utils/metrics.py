@@ -0,0 +1,219 @@
+"""
+轻量级 Prometheus 指标模块
+
+不依赖 prometheus_client，按 Prometheus 文本格式（0.0.4）输出：
+- Counter / Histogram 两种指标，标签组合首次出现时分配一次存储，之后只做原地累加
+- 直方图桶边界在定义时固定（预分配），observe 只做一次二分查找
+- MetricsMiddleware 按路由模块（auth / food / recipe ...）统计请求耗时
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# 默认耗时桶（秒）
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 外部 API / 大模型耗时桶（秒）
+EXTERNAL_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+_registry: List["_Metric"] = []
+_registry_lock = threading.Lock()
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    """固定桶边界的直方图"""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 每个标签组合：[各桶计数..., +Inf 计数, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = [0.0] * (len(self.buckets) + 2)
+                self._series[labelvalues] = series
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            items = [(labelvalues, list(series)) for labelvalues, series in self._series.items()]
+        for labelvalues, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.labelnames, labelvalues, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            labels = _format_labels(self.labelnames, labelvalues, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            plain = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{plain} {series[-1]}")
+            lines.append(f"{self.name}_count{plain} {cumulative}")
+        return lines
+
+
+def render_metrics() -> str:
+    """以 Prometheus 文本格式输出所有指标"""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines: List[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ========== 指标定义 ==========
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "HTTP 请求耗时（按路由模块）",
+    ("router", "method", "status"),
+)
+db_commands_total = Counter(
+    "mongodb_commands_total",
+    "MongoDB 命令数量",
+    ("command", "outcome"),
+)
+db_command_duration_seconds = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB 命令耗时",
+    ("command",),
+)
+external_request_duration_seconds = Histogram(
+    "external_request_duration_seconds",
+    "外部服务调用耗时（boohee / qwen / smtp）",
+    ("service", "outcome"),
+    buckets=EXTERNAL_LATENCY_BUCKETS,
+)
+cache_requests_total = Counter(
+    "cache_requests_total",
+    "缓存查询次数",
+    ("cache", "result"),
+)
+boohee_account_switches_total = Counter(
+    "boohee_account_switches_total",
+    "薄荷API账号切换次数",
+)
+llm_tokens_total = Counter(
+    "llm_tokens_total",
+    "大模型消耗的 token 数量",
+    ("model", "type"),
+)
+
+
+def observe_external_call(service: str, started: float, success: bool):
+    """记录一次外部服务调用耗时（started 为 time.perf_counter() 起始值）"""
+    external_request_duration_seconds.observe(
+        time.perf_counter() - started,
+        service,
+        "success" if success else "error",
+    )
+
+
+def _router_label(scope) -> str:
+    """根据路由端点所在模块得到路由名称，如 app.routers.food -> food"""
+    endpoint = scope.get("endpoint")
+    module = getattr(endpoint, "__module__", "") or ""
+    if module.startswith("app.routers."):
+        return module.rsplit(".", 1)[-1]
+    if endpoint is not None:
+        return "app"
+    # 未匹配到路由（404）或静态文件
+    return "static" if scope.get("path", "").startswith("/static") else "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI 中间件：按路由模块记录请求耗时直方图"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_holder = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_request_duration_seconds.observe(
+                time.perf_counter() - started,
+                _router_label(scope),
+                scope["method"],
+                f"{status_holder[0] // 100}xx",
+            )
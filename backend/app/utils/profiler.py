@@ -0,0 +1,158 @@
+"""
+慢请求采样分析模块（默认关闭）
+
+开启 PROFILER_ENABLED 后，ProfilerMiddleware 会在有请求处理时启动一个后台采样线程，
+按 PROFILER_INTERVAL_MS 周期采集事件循环线程的调用栈。请求结束时满足以下任一条件，
+就把该请求时间窗口内的采样汇总为 collapsed stacks 文件，写入 PROFILER_OUTPUT_DIR：
+- 耗时超过 PROFILER_THRESHOLD_MS
+- 请求头 X-Profile 与 PROFILER_TOKEN 一致（管理员手动触发）
+
+collapsed stacks（每行 "帧1;帧2;...;帧N 次数"）可直接用 flamegraph.pl 或 speedscope 打开。
+注意：事件循环是单线程的，并发请求在同一时间窗口内的采样会互相混入，分析时应结合路径判断。
+
+关闭时中间件不会被注册，对请求路径没有任何开销。
+"""
+import asyncio
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, List, Optional, Tuple
+
+from app.config import settings
+
+PROFILE_HEADER = b"x-profile"
+# 采样缓冲区上限（按 5ms 间隔约可覆盖 5 分钟）
+MAX_SAMPLES = 60000
+# 单个调用栈最多保留的帧数
+MAX_STACK_DEPTH = 128
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def _collapse_stack(frame) -> str:
+    """将调用栈转换为 collapsed 格式：根帧在前，叶子帧在后"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class _StackSampler:
+    """周期采样指定线程调用栈的后台线程（仅在有活跃请求时运行）"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Deque[Tuple[float, str]] = deque(maxlen=MAX_SAMPLES)
+        self._target_thread_id: Optional[int] = None
+        self._active = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, thread_id: int):
+        with self._lock:
+            self._target_thread_id = thread_id
+            self._active += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def end(self):
+        with self._lock:
+            self._active = max(0, self._active - 1)
+
+    def collect(self, started: float, finished: float) -> Counter:
+        """汇总时间窗口内的采样"""
+        return Counter(stack for ts, stack in list(self.samples) if started <= ts <= finished)
+
+    def _run(self):
+        while True:
+            if self._active == 0:
+                self._wakeup.clear()
+                self._wakeup.wait()
+                continue
+            frame = sys._current_frames().get(self._target_thread_id)
+            if frame is not None:
+                self.samples.append((time.perf_counter(), _collapse_stack(frame)))
+            del frame
+            time.sleep(self.interval)
+
+
+_SAFE_PATH_RE = re.compile(r"[^A-Za-z0-9_-]+")
+
+
+def _output_dir() -> Path:
+    base = Path(settings.PROFILER_OUTPUT_DIR)
+    if not base.is_absolute():
+        base = Path(__file__).parent.parent.parent / base  # backend/
+    return base
+
+
+def _write_profile(method: str, path: str, duration_ms: float, stacks: Counter) -> Path:
+    """写入 collapsed stacks 文件，并按 PROFILER_RETENTION_COUNT 清理旧文件"""
+    output_dir = _output_dir()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    safe_path = _SAFE_PATH_RE.sub("_", path).strip("_")[:80] or "root"
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    file_path = output_dir / f"{timestamp}_{method}_{safe_path}_{int(duration_ms)}ms.folded"
+
+    lines = [f"{stack} {count}" for stack, count in stacks.most_common()]
+    file_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    # 至少保留刚写入的文件（PROFILER_RETENTION_COUNT <= 0 时按 1 处理）
+    keep = max(settings.PROFILER_RETENTION_COUNT, 1)
+    profiles: List[Path] = sorted(output_dir.glob("*.folded"))
+    for old in profiles[: max(len(profiles) - keep, 0)]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+    return file_path
+
+
+class ProfilerMiddleware:
+    """ASGI 中间件：对慢请求或带管理员请求头的请求保存采样结果"""
+
+    def __init__(self, app):
+        self.app = app
+        self.sampler = _StackSampler(settings.PROFILER_INTERVAL_MS / 1000)
+        self.token = settings.PROFILER_TOKEN.encode() if settings.PROFILER_TOKEN else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        forced = self.token is not None and any(
+            name == PROFILE_HEADER and value == self.token for name, value in scope.get("headers", [])
+        )
+
+        self.sampler.begin(threading.get_ident())
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            finished = time.perf_counter()
+            self.sampler.end()
+            duration_ms = (finished - started) * 1000
+            if forced or duration_ms >= settings.PROFILER_THRESHOLD_MS:
+                stacks = self.sampler.collect(started, finished)
+                if stacks:
+                    try:
+                        file_path = await asyncio.to_thread(
+                            _write_profile, scope["method"], scope["path"], duration_ms, stacks
+                        )
+                        print(f"🔍 慢请求采样已保存: {file_path}")
+                    except Exception as e:
+                        print(f"⚠️  保存请求采样失败: {e}")
@@ -9,10 +9,14 @@ Qwen 多模态模型调用封装
 from __future__ import annotations
 
 import os
+import time
 import base64
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
-from openai import OpenAI
+from app.utils import metrics
+
+if TYPE_CHECKING:  # pragma: no cover - 仅用于类型提示
+    from openai import OpenAI
 
 try:
     # 可选地从外部配置中读取 QWEN_API_KEY（如果存在）
@@ -47,6 +51,20 @@ def _get_api_key() -> str:
     return api_key
 
 
+def _create_client(api_key: str) -> "OpenAI":
+    """
+    创建百炼平台兼容 OpenAI 协议的客户端。
+
+    openai SDK 导入较慢，延迟到首次调用时导入，避免拖慢应用冷启动。
+    """
+    from openai import OpenAI
+
+    return OpenAI(
+        api_key=api_key,
+        base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
+    )
+
+
 def call_qwen_vl_with_url(
     image_url: Optional[str],
     prompt: str,
@@ -60,10 +78,7 @@ def call_qwen_vl_with_url(
     if api_key is None:
         api_key = _get_api_key()
 
-    client = OpenAI(
-        api_key=api_key,
-        base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
-    )
+    client = _create_client(api_key)
 
     # 构建 content 列表：如果有图片则包含图片，否则只包含文本
     content_list = []
@@ -71,15 +86,26 @@ def call_qwen_vl_with_url(
         content_list.append({"type": "image_url", "image_url": {"url": image_url}})
     content_list.append({"type": "text", "text": prompt})
 
-    completion = client.chat.completions.create(
-        model=model,
-        messages=[
-            {
-                "role": "user",
-                "content": content_list,
-            }
-        ],
-    )
+    started = time.perf_counter()
+    try:
+        completion = client.chat.completions.create(
+            model=model,
+            messages=[
+                {
+                    "role": "user",
+                    "content": content_list,
+                }
+            ],
+        )
+    except Exception:
+        metrics.observe_external_call("qwen", started, success=False)
+        raise
+    metrics.observe_external_call("qwen", started, success=True)
+
+    usage = getattr(completion, "usage", None)
+    if usage is not None:
+        metrics.llm_tokens_total.inc(model, "prompt", amount=getattr(usage, "prompt_tokens", 0) or 0)
+        metrics.llm_tokens_total.inc(model, "completion", amount=getattr(usage, "completion_tokens", 0) or 0)
 
     # 兼容字符串或分段内容
     content = completion.choices[0].message.content
@@ -0,0 +1,213 @@
+"""
+健康报告导出文件写入器
+
+导出任务按批次把记录行（dict）交给写入器，写入器逐批追加到磁盘文件，内存中不保留全部记录。
+写入器方法均为同步阻塞调用，由导出任务在线程中执行（asyncio.to_thread）。
+
+- csv: UTF-8 BOM 编码（Excel 可直接打开中文）
+- jsonl: 每行一个 JSON 对象
+- pdf: 表格形式的报告，需要安装 reportlab（按需导入）
+"""
+import csv
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# 导出行的列（顺序即 CSV 表头顺序）
+EXPORT_COLUMNS = (
+    "record_type",  # food / sports / weight
+    "time",
+    "name",
+    "meal_type",
+    "amount",
+    "unit",
+    "duration_minutes",
+    "calories",
+    "protein",
+    "carbohydrates",
+    "fat",
+    "weight",
+    "notes",
+)
+
+# 格式 -> 文件扩展名
+FILE_EXTENSIONS = {
+    "csv": ".csv",
+    "jsonl": ".jsonl",
+    "pdf": ".pdf",
+}
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "pdf": "application/pdf",
+}
+
+
+class CsvReportWriter:
+    """CSV 写入器"""
+
+    def __init__(self, path: Path, meta: Dict[str, Any]):
+        self._file = open(path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self, summary: Optional[Dict[str, Any]] = None) -> None:
+        self._file.close()
+
+
+class JsonLinesReportWriter:
+    """JSON Lines 写入器"""
+
+    def __init__(self, path: Path, meta: Dict[str, Any]):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        self._file.writelines(
+            json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows
+        )
+        self._file.flush()
+
+    def close(self, summary: Optional[Dict[str, Any]] = None) -> None:
+        self._file.close()
+
+
+class PdfReportWriter:
+    """PDF 写入器（逐页绘制表格，页尾附总体摘要）"""
+
+    # (列名, 表头, 列起始横坐标)
+    TABLE_COLUMNS = (
+        ("time", "时间", 40),
+        ("record_type", "类型", 130),
+        ("name", "名称", 175),
+        ("amount", "数量", 330),
+        ("calories", "卡路里", 390),
+        ("weight", "体重", 450),
+        ("notes", "备注", 495),
+    )
+    RECORD_TYPE_LABELS = {"food": "饮食", "sports": "运动", "weight": "体重"}
+    SUMMARY_LABELS = {
+        "food_records": "饮食记录数",
+        "sports_records": "运动记录数",
+        "weight_records": "体重记录数",
+        "total_intake_calories": "总摄入（千卡）",
+        "total_burned_calories": "总消耗（千卡）",
+    }
+    FONT_NAME = "STSong-Light"
+    FONT_SIZE = 9
+    LINE_HEIGHT = 14
+    MARGIN = 40
+
+    def __init__(self, path: Path, meta: Dict[str, Any]):
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+        from reportlab.pdfgen import canvas
+
+        pdfmetrics.registerFont(UnicodeCIDFont(self.FONT_NAME))
+        self._canvas = canvas.Canvas(str(path), pagesize=A4)
+        self._width, self._height = A4
+        self._page = 0
+
+        self._canvas.setTitle("健康数据报告")
+        self._y = self._height - self.MARGIN
+        self._canvas.setFont(self.FONT_NAME, 16)
+        self._canvas.drawString(self.MARGIN, self._y, "健康数据报告")
+        self._y -= 24
+        self._canvas.setFont(self.FONT_NAME, self.FONT_SIZE)
+        self._canvas.drawString(
+            self.MARGIN,
+            self._y,
+            f"用户：{meta.get('user_email', '')}    日期范围：{meta.get('start_date')} 至 {meta.get('end_date')}",
+        )
+        self._y -= self.LINE_HEIGHT * 2
+        self._draw_table_header()
+
+    def _draw_table_header(self) -> None:
+        self._page += 1
+        self._canvas.setFont(self.FONT_NAME, self.FONT_SIZE)
+        for _, title, x in self.TABLE_COLUMNS:
+            self._canvas.drawString(x, self._y, title)
+        self._canvas.drawRightString(self._width - self.MARGIN, self.MARGIN / 2, f"第 {self._page} 页")
+        self._y -= 4
+        self._canvas.line(self.MARGIN, self._y, self._width - self.MARGIN, self._y)
+        self._y -= self.LINE_HEIGHT
+
+    def _next_line(self) -> None:
+        self._y -= self.LINE_HEIGHT
+        if self._y < self.MARGIN:
+            self._canvas.showPage()
+            self._y = self._height - self.MARGIN
+            self._draw_table_header()
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            for column, _, x in self.TABLE_COLUMNS:
+                value = row.get(column)
+                if value is None:
+                    continue
+                if column == "record_type":
+                    value = self.RECORD_TYPE_LABELS.get(value, value)
+                elif column == "amount" and row.get("unit"):
+                    value = f"{value}{row['unit']}"
+                elif column == "amount" and row.get("duration_minutes") is not None:
+                    value = f"{row['duration_minutes']}分钟"
+                text = str(value)
+                self._canvas.drawString(x, self._y, text[:24] if column in ("name", "notes") else text)
+            self._next_line()
+
+    def close(self, summary: Optional[Dict[str, Any]] = None) -> None:
+        if summary:
+            self._next_line()
+            self._canvas.drawString(self.MARGIN, self._y, "总体摘要")
+            for key, value in summary.items():
+                self._next_line()
+                label = self.SUMMARY_LABELS.get(key, key)
+                self._canvas.drawString(self.MARGIN + 10, self._y, f"{label}：{value}")
+        self._canvas.save()
+
+
+WRITERS = {
+    "csv": CsvReportWriter,
+    "jsonl": JsonLinesReportWriter,
+    "pdf": PdfReportWriter,
+}
+
+
+def is_format_available(export_format: str) -> bool:
+    """
+    检查导出格式是否可用（PDF 需要安装 reportlab）
+
+    Args:
+        export_format: 导出格式
+
+    Returns:
+        是否可用
+    """
+    if export_format not in WRITERS:
+        return False
+    if export_format == "pdf":
+        try:
+            import reportlab  # noqa: F401
+        except ImportError:
+            return False
+    return True
+
+
+def open_writer(export_format: str, path: Path, meta: Dict[str, Any]):
+    """
+    创建指定格式的写入器
+
+    Args:
+        export_format: 导出格式（csv / jsonl / pdf）
+        path: 输出文件路径
+        meta: 报告元信息（user_email、start_date、end_date）
+
+    Returns:
+        写入器实例（write_rows / close）
+    """
+    return WRITERS[export_format](path, meta)
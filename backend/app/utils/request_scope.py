@@ -0,0 +1,45 @@
+"""
+请求级缓存作用域
+
+RequestScopeMiddleware 为每个 HTTP 请求创建一个独立的存储字典（保存在 contextvar 中），
+服务层可以通过 get_request_cache() 在同一请求内复用查询结果（如用户文档），请求结束即丢弃。
+不在请求上下文中（后台任务、脚本）时 get_request_cache() 返回 None，调用方应直接查询。
+"""
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+_request_store: ContextVar[Optional[Dict[str, Dict[Any, Any]]]] = ContextVar("request_scope_store", default=None)
+
+
+def get_request_cache(namespace: str) -> Optional[Dict[Any, Any]]:
+    """
+    获取当前请求内指定命名空间的缓存字典
+
+    Args:
+        namespace: 命名空间（如 "users"）
+
+    Returns:
+        缓存字典；不在请求上下文中时返回 None
+    """
+    store = _request_store.get()
+    if store is None:
+        return None
+    return store.setdefault(namespace, {})
+
+
+class RequestScopeMiddleware:
+    """ASGI 中间件：为每个 HTTP 请求开启请求级缓存作用域"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _request_store.set({})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_store.reset(token)
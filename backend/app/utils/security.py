@@ -1,5 +1,8 @@
+import hashlib
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
@@ -13,6 +16,10 @@ except Exception:
     import bcrypt
     pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12)
 
+# 已验证的 access token 声明缓存：token 的 SHA-256 -> (缓存失效时间戳, payload)
+# 失效时间不晚于 token 自身的 exp，过期 token 不会因缓存而继续有效
+_claims_cache: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
@@ -51,14 +58,46 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def decode_access_token(token: str) -> Optional[dict]:
-    """解码 JWT token"""
+    """解码 JWT token（验证通过的声明会缓存到 token 过期为止）"""
+    if settings.JWT_CLAIMS_CACHE_SIZE <= 0:
+        return _decode_token(token)
+
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    now = time.time()
+    entry = _claims_cache.get(key)
+    if entry is not None:
+        if entry[0] > now:
+            _claims_cache.move_to_end(key)
+            return dict(entry[1])
+        del _claims_cache[key]
+
+    payload = _decode_token(token)
+    if payload is None:
+        return None
+
+    expires_at = now + settings.JWT_CLAIMS_CACHE_TTL_SECONDS
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        expires_at = min(expires_at, float(exp))
+    if expires_at > now:
+        _claims_cache[key] = (expires_at, dict(payload))
+        while len(_claims_cache) > settings.JWT_CLAIMS_CACHE_SIZE:
+            _claims_cache.popitem(last=False)
+    return payload
+
+
+def _decode_token(token: str) -> Optional[dict]:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except JWTError:
         return None
 
 
+def clear_claims_cache() -> None:
+    """清空 token 声明缓存（如更换 SECRET_KEY 后）"""
+    _claims_cache.clear()
+
+
 def create_refresh_token(data: dict) -> str:
     """创建 JWT refresh token (长期有效)"""
     to_encode = data.copy()
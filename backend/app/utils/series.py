@@ -0,0 +1,95 @@
+"""
+时间序列工具（基于 NumPy）
+
+- lttb_indices: Largest-Triangle-Three-Buckets 降采样，保留曲线形状的同时减少点数
+- trailing_mean: 按时间窗口计算的滑动平均（窗口内点数不固定，适用于不规则采样）
+- linear_slope: 最小二乘线性趋势斜率
+"""
+from typing import Tuple
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    LTTB 降采样，返回保留点的下标（升序，始终包含首尾点）
+
+    Args:
+        x: 横坐标（升序）
+        y: 纵坐标
+        threshold: 目标点数
+
+    Returns:
+        保留点的下标数组；点数不超过目标或目标小于 3 时返回全部下标
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    # 除首尾点外，剩余点平均分到 threshold - 2 个桶中
+    every = (n - 2) / (threshold - 2)
+    selected = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, n)
+
+        # 下一个桶的平均点（最后一个桶的下一个点即末尾点）
+        if end < next_end:
+            avg_x = x[end:next_end].mean()
+            avg_y = y[end:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        # 选择与上一个已选点、下一个桶平均点构成三角形面积最大的点
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        areas = np.abs(
+            (x[selected] - avg_x) * (bucket_y - y[selected])
+            - (x[selected] - bucket_x) * (avg_y - y[selected])
+        )
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+
+    return indices
+
+
+def trailing_mean(x: np.ndarray, y: np.ndarray, window: float) -> np.ndarray:
+    """
+    按时间窗口的滑动平均：每个点取 (x - window, x] 范围内所有点的平均值
+
+    Args:
+        x: 横坐标（升序，与 window 单位一致）
+        y: 纵坐标
+        window: 窗口长度
+
+    Returns:
+        与 y 等长的平均值数组
+    """
+    if len(x) == 0:
+        return np.array([], dtype=float)
+    cumulative = np.concatenate(([0.0], np.cumsum(y, dtype=float)))
+    starts = np.searchsorted(x, x - window, side="right")
+    ends = np.arange(1, len(x) + 1)
+    return (cumulative[ends] - cumulative[starts]) / (ends - starts)
+
+
+def linear_slope(x: np.ndarray, y: np.ndarray) -> Tuple[float, float]:
+    """
+    最小二乘线性拟合
+
+    Args:
+        x: 横坐标
+        y: 纵坐标
+
+    Returns:
+        (斜率, 截距)；少于 2 个点或横坐标全部相同时斜率为 0
+    """
+    if len(x) < 2 or np.ptp(x) == 0:
+        return 0.0, float(y.mean()) if len(y) else 0.0
+    slope, intercept = np.polyfit(x, y, 1)
+    return float(slope), float(intercept)
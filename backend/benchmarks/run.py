@@ -0,0 +1,323 @@
+"""
+核心接口压测
+
+用法（在 backend/ 目录下执行，需要本地 MongoDB）:
+    python -m benchmarks.run                                  # 进程内（ASGI）压测
+    python -m benchmarks.run --mode http                      # 启动独立 uvicorn 进程，通过 HTTP 压测
+    python -m benchmarks.run --mode http --base-url http://127.0.0.1:8000   # 压测已运行的服务
+    python -m benchmarks.run --save-baseline                  # 将本次结果写入 benchmarks/baseline.json
+    python -m benchmarks.run --fail-threshold 20              # p95 比基线慢 20% 以上时以非 0 退出
+
+场景：饮食记录创建、每日营养摘要、食谱记录创建、食物搜索、可视化报告导出。
+每个场景输出 RPS、p50/p95/p99 延迟以及每个请求的数据库命令数（来自 Server-Timing 响应头）。
+默认使用独立数据库 for_health_bench，薄荷API / Qwen / SMTP 调用均替换为本地桩。
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).parent.parent
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+DEFAULT_DATABASE = "for_health_bench"
+SERVER_TIMING_RE = re.compile(r'desc="(\d+) queries"')
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="For Health 核心接口压测")
+    parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess", help="压测方式")
+    parser.add_argument("--base-url", default=None, help="HTTP 模式下压测已运行的服务（不指定则自动启动）")
+    parser.add_argument("--port", type=int, default=8766, help="HTTP 模式自动启动服务使用的端口")
+    parser.add_argument("--database", default=DEFAULT_DATABASE, help="压测使用的数据库名")
+    parser.add_argument("--users", type=int, default=10, help="压测用户数量")
+    parser.add_argument("--months", type=int, default=3, help="每个用户的历史数据月数")
+    parser.add_argument("--seed", type=int, default=42, help="随机数种子")
+    parser.add_argument("--skip-seed", action="store_true", help="跳过播种，复用已有压测数据")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发客户端数")
+    parser.add_argument("--requests", type=int, default=400, help="每个场景的请求数")
+    parser.add_argument("--scenarios", default="", help="仅运行指定场景（逗号分隔）")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="基线文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为基线")
+    parser.add_argument("--fail-threshold", type=float, default=None, help="p95 相对基线的最大允许退化百分比")
+    parser.add_argument("--output", default=None, help="将本次结果写入指定 JSON 文件")
+    return parser.parse_args()
+
+
+# ========== 场景定义 ==========
+def _build_scenarios(seeded) -> Dict[str, Callable[[int], Dict[str, Any]]]:
+    """场景名 -> (请求序号 -> 请求参数)"""
+    users = seeded.users
+    today = date.today()
+
+    def user_for(i: int) -> str:
+        return users[i % len(users)]
+
+    def food_record_create(i: int):
+        return {
+            "user": user_for(i),
+            "method": "POST",
+            "url": "/api/food/record",
+            "json": {
+                "food_id": seeded.food_ids[i % len(seeded.food_ids)],
+                "serving_amount": 1.0,
+                "recorded_at": datetime.utcnow().isoformat(),
+                "meal_type": "午餐",
+            },
+        }
+
+    def daily_summary(i: int):
+        target = today - timedelta(days=i % 30)
+        return {"user": user_for(i), "method": "GET", "url": f"/api/food/record/daily/{target.isoformat()}"}
+
+    def recipe_record_create(i: int):
+        user = user_for(i)
+        return {
+            "user": user,
+            "method": "POST",
+            "url": "/api/recipe/record",
+            "json": {
+                "recipe_id": seeded.recipe_ids[user],
+                "scale": 1.0,
+                "recorded_at": datetime.utcnow().isoformat(),
+                "meal_type": "午餐",
+            },
+        }
+
+    keywords = ["米", "鸡", "蛋", "奶", "面", "鱼", "果", "菜"]
+
+    def food_search(i: int):
+        return {
+            "user": user_for(i),
+            "method": "GET",
+            "url": "/api/food/search",
+            "params": {"keyword": keywords[i % len(keywords)], "simplified": "true"},
+        }
+
+    def visualization_export(i: int):
+        return {
+            "user": user_for(i),
+            "method": "GET",
+            "url": "/api/visualization/export-report",
+            "params": {"start_date": (today - timedelta(days=30)).isoformat(), "end_date": today.isoformat()},
+        }
+
+    return {
+        "food_record_create": food_record_create,
+        "daily_summary": daily_summary,
+        "recipe_record_create": recipe_record_create,
+        "food_search": food_search,
+        "visualization_export": visualization_export,
+    }
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def _run_scenario(client, tokens: Dict[str, str], build_request, total: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    db_ops: List[int] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            spec = build_request(i)
+            headers = {"Authorization": f"Bearer {tokens[spec['user']]}"}
+            started = time.perf_counter()
+            try:
+                response = await client.request(
+                    spec["method"],
+                    spec["url"],
+                    json=spec.get("json"),
+                    params=spec.get("params"),
+                    headers=headers,
+                )
+            except Exception:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+            match = SERVER_TIMING_RE.search(response.headers.get("server-timing", ""))
+            if match:
+                db_ops.append(int(match.group(1)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        "db_ops_per_request": round(statistics.fmean(db_ops), 2) if db_ops else None,
+    }
+
+
+def _start_server(port: int, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.serve", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def _wait_ready(client, timeout: float = 60.0):
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            response = await client.get("/ready")
+            if response.status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"压测服务 {timeout} 秒内未就绪")
+
+
+def _compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: Optional[float]) -> bool:
+    """打印与基线的差异，返回是否存在超过阈值的退化"""
+    regressed = False
+    print("\n与基线对比（p95 / RPS）:")
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            print(f"  - {name}: 基线中无此场景")
+            continue
+        p95_delta = (current["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100 if base["p95_ms"] else 0.0
+        rps_delta = (current["rps"] - base["rps"]) / base["rps"] * 100 if base["rps"] else 0.0
+        flag = ""
+        if threshold is not None and p95_delta > threshold:
+            flag = "  ⚠️ 退化"
+            regressed = True
+        print(f"  - {name}: p95 {base['p95_ms']} -> {current['p95_ms']} ms ({p95_delta:+.1f}%), "
+              f"RPS {base['rps']} -> {current['rps']} ({rps_delta:+.1f}%){flag}")
+    return regressed
+
+
+async def main_async(args) -> int:
+    # 必须在导入 app 之前设置，确保使用独立的压测数据库
+    os.environ["DATABASE_NAME"] = args.database
+    os.environ.setdefault("WARM_UP_OPTIONAL_MODULES", "False")
+
+    import httpx
+    from app import database
+    from app.utils.security import create_access_token
+    from benchmarks.seed import seed
+    from benchmarks.stubs import stub_external_services
+
+    await database.connect_to_mongo()
+    if database.database is None:
+        print("❌ 无法连接 MongoDB，压测需要本地数据库")
+        return 1
+    await database.ensure_indexes()
+
+    db = database.get_database()
+    if args.skip_seed:
+        from benchmarks.seed import SeedResult, bench_email
+
+        users = [bench_email(i) for i in range(args.users)]
+        recipes = await db.recipes.find({"created_by": {"$in": users}}).to_list(length=None)
+        foods = await db.foods.find({"created_by": "all"}).limit(50).to_list(length=50)
+        seeded = SeedResult(
+            users=users,
+            food_ids=[str(food["_id"]) for food in foods],
+            recipe_ids={recipe["created_by"]: str(recipe["_id"]) for recipe in recipes},
+        )
+    else:
+        print(f"🌱 播种压测数据: {args.users} 个用户 x {args.months} 个月 ...")
+        seeded = await seed(db, users=args.users, months=args.months, random_seed=args.seed)
+        print(f"   {seeded.counts}")
+
+    tokens = {email: create_access_token({"sub": email}) for email in seeded.users}
+    scenarios = _build_scenarios(seeded)
+    if args.scenarios:
+        wanted = {name.strip() for name in args.scenarios.split(",")}
+        scenarios = {name: fn for name, fn in scenarios.items() if name in wanted}
+
+    server = None
+    results: Dict[str, Any] = {
+        "measured_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "mode": args.mode,
+        "config": {
+            "users": args.users,
+            "months": args.months,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+        },
+        "scenarios": {},
+    }
+
+    try:
+        if args.mode == "inprocess":
+            from app.main import app
+
+            with stub_external_services():
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60.0) as client:
+                    for name, build_request in scenarios.items():
+                        results["scenarios"][name] = await _run_scenario(
+                            client, tokens, build_request, args.requests, args.concurrency
+                        )
+                        print(f"✅ {name}: {results['scenarios'][name]}")
+        else:
+            base_url = args.base_url
+            if base_url is None:
+                server = _start_server(args.port, dict(os.environ))
+                base_url = f"http://127.0.0.1:{args.port}"
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+                await _wait_ready(client)
+                for name, build_request in scenarios.items():
+                    results["scenarios"][name] = await _run_scenario(
+                        client, tokens, build_request, args.requests, args.concurrency
+                    )
+                    print(f"✅ {name}: {results['scenarios'][name]}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        await database.close_mongo_connection()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    regressed = False
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists():
+        regressed = _compare(results, json.loads(baseline_path.read_text(encoding="utf-8")), args.fail_threshold)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(results, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"\n✅ 基线已保存到 {baseline_path}")
+
+    return 1 if regressed else 0
+
+
+def main():
+    """主函数"""
+    args = _parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+压测数据播种
+
+向本地 MongoDB 写入合成数据：若干压测用户，以及每个用户 N 个月的
+food_records / sports_log / weight_records，另外为每个用户创建一个食谱。
+所有写入均使用 insert_many 批量完成，随机数种子固定以保证结果可复现。
+"""
+import random
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from app.models.food import FoodInDB, FoodRecordInDB, NutritionData
+from app.models.recipe import RecipeFoodItem, RecipeInDB
+from app.models.sports import SportsLogInDB
+from app.models.user import ActivityLevel, Gender, UserInDB
+from app.models.weight import WeightRecordInDB
+from app.utils.security import get_password_hash
+
+BENCH_EMAIL_DOMAIN = "bench.example.com"
+BENCH_PASSWORD = "bench1234"
+MEAL_TYPES = ("早餐", "午餐", "晚餐", "加餐")
+
+# 基础食物（若数据库中没有公共食物时使用）
+BASE_FOODS = [
+    ("米饭", "主食", 116, 2.6, 25.9, 0.3),
+    ("鸡胸肉", "肉类", 133, 24.6, 0.6, 3.0),
+    ("西兰花", "蔬菜", 36, 4.1, 4.3, 0.6),
+    ("鸡蛋", "蛋类", 144, 13.3, 2.8, 8.8),
+    ("牛奶", "乳制品", 54, 3.0, 3.4, 3.2),
+    ("苹果", "水果", 52, 0.3, 13.5, 0.2),
+    ("全麦面包", "主食", 254, 12.3, 43.1, 3.6),
+    ("三文鱼", "水产", 139, 17.2, 0.0, 7.8),
+]
+
+SPORTS = [
+    ("跑步", "慢跑 8km/h", 8.3),
+    ("走路", "快走 5km/h", 3.8),
+    ("骑行", "骑行 16km/h", 6.0),
+    ("游泳", "自由泳", 7.0),
+]
+
+
+@dataclass
+class SeedResult:
+    """播种结果"""
+
+    users: List[str] = field(default_factory=list)
+    food_ids: List[str] = field(default_factory=list)
+    recipe_ids: Dict[str, str] = field(default_factory=dict)
+    counts: Dict[str, int] = field(default_factory=dict)
+
+
+def bench_email(index: int) -> str:
+    return f"bench_user_{index}@{BENCH_EMAIL_DOMAIN}"
+
+
+async def clear_bench_data(db) -> None:
+    """删除之前播种的压测数据（按压测用户邮箱域名识别）"""
+    pattern = {"$regex": f"@{re.escape(BENCH_EMAIL_DOMAIN)}$"}
+    await db.users.delete_many({"email": pattern})
+    await db.food_records.delete_many({"user_email": pattern})
+    await db.sports_log.delete_many({"created_by": pattern})
+    await db.weight_records.delete_many({"user_email": pattern})
+    await db.recipes.delete_many({"created_by": pattern})
+
+
+async def _ensure_foods(db) -> List[dict]:
+    foods = await db.foods.find({"created_by": "all"}).limit(50).to_list(length=50)
+    if foods:
+        return foods
+
+    docs = []
+    for name, category, calories, protein, carbohydrates, fat in BASE_FOODS:
+        docs.append(
+            FoodInDB(
+                name=name,
+                category=category,
+                serving_size=100,
+                serving_unit="克",
+                nutrition_per_serving=NutritionData(
+                    calories=calories, protein=protein, carbohydrates=carbohydrates, fat=fat
+                ),
+                source="local",
+                created_by="all",
+            ).dict()
+        )
+    await db.foods.insert_many(docs)
+    return docs
+
+
+async def seed(db, users: int = 10, months: int = 3, random_seed: int = 42, clear: bool = True) -> SeedResult:
+    """
+    播种压测数据
+
+    Args:
+        db: Motor 数据库实例
+        users: 压测用户数量
+        months: 每个用户的历史数据月数（按 30 天/月计算）
+        random_seed: 随机数种子
+        clear: 播种前是否清理已有压测数据
+
+    Returns:
+        SeedResult
+    """
+    rng = random.Random(random_seed)
+    if clear:
+        await clear_bench_data(db)
+
+    foods = await _ensure_foods(db)
+    result = SeedResult(food_ids=[str(food["_id"]) for food in foods])
+
+    hashed_password = get_password_hash(BENCH_PASSWORD)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    days = months * 30
+
+    user_docs, food_records, sports_logs, weight_records, recipes = [], [], [], [], []
+    for index in range(users):
+        email = bench_email(index)
+        result.users.append(email)
+        user_docs.append(
+            UserInDB(
+                email=email,
+                username=f"bench_{index}",
+                hashed_password=hashed_password,
+                height=rng.uniform(155, 190),
+                weight=rng.uniform(50, 95),
+                age=rng.randint(18, 60),
+                gender=rng.choice([Gender.MALE, Gender.FEMALE]),
+                activity_level=ActivityLevel.MODERATELY_ACTIVE,
+                bmr=1600.0,
+                tdee=2400.0,
+                daily_calorie_goal=2000.0,
+            ).dict()
+        )
+
+        weight = rng.uniform(55, 95)
+        for day in range(days):
+            day_start = today - timedelta(days=day)
+            for meal_index in range(rng.randint(3, 5)):
+                food = rng.choice(foods)
+                amount = round(rng.uniform(0.5, 2.5), 2)
+                nutrition = food["nutrition_per_serving"]
+                food_records.append(
+                    FoodRecordInDB(
+                        user_email=email,
+                        food_name=food["name"],
+                        serving_amount=amount,
+                        serving_size=food.get("serving_size") or 100,
+                        serving_unit=food.get("serving_unit") or "克",
+                        nutrition_data=NutritionData(
+                            calories=round(nutrition["calories"] * amount, 2),
+                            protein=round(nutrition["protein"] * amount, 2),
+                            carbohydrates=round(nutrition["carbohydrates"] * amount, 2),
+                            fat=round(nutrition["fat"] * amount, 2),
+                        ),
+                        recorded_at=day_start + timedelta(hours=7 + meal_index * 4, minutes=rng.randint(0, 59)),
+                        meal_type=MEAL_TYPES[min(meal_index, len(MEAL_TYPES) - 1)],
+                        food_id=str(food["_id"]),
+                    ).dict()
+                )
+            if rng.random() < 0.6:
+                sport_type, sport_name, mets = rng.choice(SPORTS)
+                duration = rng.randint(15, 90)
+                sports_logs.append(
+                    SportsLogInDB(
+                        created_by=email,
+                        sport_type=sport_type,
+                        sport_name=sport_name,
+                        created_at=day_start + timedelta(hours=18, minutes=rng.randint(0, 59)),
+                        duration_time=duration,
+                        calories_burned=round(mets * weight * duration / 60, 2),
+                    ).dict()
+                )
+            if day % 2 == 0:
+                weight = max(40.0, weight + rng.uniform(-0.4, 0.35))
+                weight_records.append(
+                    WeightRecordInDB(
+                        user_email=email,
+                        weight=round(weight, 1),
+                        recorded_at=day_start + timedelta(hours=7),
+                    ).dict()
+                )
+
+        recipe_foods = rng.sample(foods, k=min(3, len(foods)))
+        items = [
+            RecipeFoodItem(
+                food_id=str(food["_id"]),
+                food_name=food["name"],
+                serving_amount=1,
+                serving_size=food.get("serving_size") or 100,
+                serving_unit=food.get("serving_unit") or "克",
+                nutrition=NutritionData(**{
+                    key: food["nutrition_per_serving"][key]
+                    for key in ("calories", "protein", "carbohydrates", "fat")
+                }),
+            )
+            for food in recipe_foods
+        ]
+        recipes.append(
+            RecipeInDB(
+                name=f"压测食谱_{index}",
+                category="午餐",
+                foods=items,
+                total_nutrition=NutritionData(
+                    calories=sum(item.nutrition.calories for item in items),
+                    protein=sum(item.nutrition.protein for item in items),
+                    carbohydrates=sum(item.nutrition.carbohydrates for item in items),
+                    fat=sum(item.nutrition.fat for item in items),
+                ),
+                created_by=email,
+            ).dict()
+        )
+
+    await db.users.insert_many(user_docs)
+    for collection, docs in (
+        ("food_records", food_records),
+        ("sports_log", sports_logs),
+        ("weight_records", weight_records),
+    ):
+        if docs:
+            await db[collection].insert_many(docs, ordered=False)
+    recipe_result = await db.recipes.insert_many(recipes)
+    result.recipe_ids = {
+        email: str(recipe_id) for email, recipe_id in zip(result.users, recipe_result.inserted_ids)
+    }
+
+    result.counts = {
+        "users": len(user_docs),
+        "food_records": len(food_records),
+        "sports_log": len(sports_logs),
+        "weight_records": len(weight_records),
+        "recipes": len(recipes),
+    }
+    return result
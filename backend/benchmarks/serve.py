@@ -0,0 +1,27 @@
+"""
+压测用服务进程：替换外部服务调用后启动 uvicorn
+
+由 benchmarks.run 在 HTTP 模式下自动启动，也可以手动运行:
+    DATABASE_NAME=for_health_bench python -m benchmarks.serve --port 8766
+"""
+import argparse
+
+import uvicorn
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="启动替换了外部服务的压测服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    from app.main import app
+    from benchmarks.stubs import install_stubs
+
+    install_stubs()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
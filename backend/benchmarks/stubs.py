@@ -0,0 +1,78 @@
+"""
+外部服务本地桩
+
+压测时替换薄荷API、Qwen 大模型和 SMTP 调用，避免外部网络延迟与配额干扰测量结果。
+"""
+import json
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple
+
+CANNED_LLM_RESPONSE = json.dumps(
+    {
+        "recognized_foods": [
+            {
+                "food_name": "米饭",
+                "serving_size": 150,
+                "serving_unit": "克",
+                "confidence": 0.9,
+                "category": "主食",
+                "nutrition_per_serving": {"calories": 174, "protein": 3.9, "carbohydrates": 38.9, "fat": 0.5},
+            }
+        ]
+    },
+    ensure_ascii=False,
+)
+
+
+async def _search_foods(keyword: str, page: int = 1, include_full_nutrition: bool = True) -> Dict[str, Any]:
+    return {"page": page, "total_pages": 0, "foods": []}
+
+
+async def _return_none(*args, **kwargs):
+    return None
+
+
+async def _return_true(*args, **kwargs):
+    return True
+
+
+def _call_llm(*args, **kwargs) -> str:
+    return CANNED_LLM_RESPONSE
+
+
+def _stub_targets() -> List[Tuple[Any, str, Any]]:
+    from app.services import ai_assistant_service, auth_service, external_api_service
+    from app.utils import email, qwen_vl_client
+
+    return [
+        (external_api_service, "search_foods", _search_foods),
+        (external_api_service, "get_food_by_boohee_id", _return_none),
+        (external_api_service, "query_food_by_barcode", _return_none),
+        (qwen_vl_client, "call_qwen_vl_with_url", _call_llm),
+        (qwen_vl_client, "call_qwen_vl_with_local_file", _call_llm),
+        (ai_assistant_service, "call_qwen_vl_with_url", _call_llm),
+        (ai_assistant_service, "call_qwen_vl_with_local_file", _call_llm),
+        (email, "send_email", _return_true),
+        (auth_service, "send_password_reset_email", _return_true),
+        (auth_service, "send_registration_verification_email", _return_true),
+    ]
+
+
+def install_stubs() -> None:
+    """永久替换外部服务调用（用于独立的压测服务进程）"""
+    for module, name, replacement in _stub_targets():
+        setattr(module, name, replacement)
+
+
+@contextmanager
+def stub_external_services():
+    """在上下文内替换外部服务调用，退出时恢复"""
+    targets = _stub_targets()
+    originals = [(module, name, getattr(module, name)) for module, name, _ in targets]
+    try:
+        for module, name, replacement in targets:
+            setattr(module, name, replacement)
+        yield
+    finally:
+        for module, name, original in originals:
+            setattr(module, name, original)
@@ -0,0 +1,148 @@
+"""
+应用冷启动耗时基准脚本
+
+测量两项指标：
+1. python -X importtime 下 `import app.main` 的总导入耗时，以及耗时最高的直接导入模块
+2. 从启动 uvicorn 进程到 /health 首次返回 200 的耗时（time-to-first-200）
+
+用法（在 backend/ 目录下执行）:
+    python scripts/benchmark_startup.py            # 运行 3 轮并打印结果
+    python scripts/benchmark_startup.py --save     # 同时将结果追加到 scripts/startup_benchmark.jsonl
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).parent.parent
+RESULTS_PATH = Path(__file__).parent / "startup_benchmark.jsonl"
+
+# 关注的较重依赖：应在首次使用时才导入，不应出现在 app.main 的导入链中
+HEAVY_MODULES = ("cv2", "pyzbar", "numpy", "openai")
+
+
+def measure_import_time():
+    """
+    使用 -X importtime 测量导入 app.main 的耗时
+
+    Returns:
+        (总耗时毫秒, app.main 直接导入的模块耗时列表[(模块名, 毫秒)], 已导入的重依赖列表)
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 app.main 失败:\n{proc.stderr[-2000:]}")
+
+    total_ms = 0.0
+    top_level = []
+    imported = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        module = name.strip()
+        imported.add(module.split(".")[0])
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and module == "app.main":
+            total_ms = int(cumulative_us) / 1000
+        elif depth == 1:
+            # app.main 直接触发的导入
+            top_level.append((module, int(cumulative_us) / 1000))
+
+    top_level.sort(key=lambda item: item[1], reverse=True)
+    heavy = [module for module in HEAVY_MODULES if module in imported]
+    return total_ms, top_level, heavy
+
+
+def measure_time_to_first_200(port: int, timeout: float = 30.0) -> float:
+    """
+    启动 uvicorn 并轮询 /health，返回首次 200 的耗时（毫秒）
+    """
+    env = dict(os.environ, WARM_UP_OPTIONAL_MODULES="False")
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/health"
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError("uvicorn 进程提前退出")
+            try:
+                if httpx.get(url, timeout=0.5).status_code == 200:
+                    return (time.perf_counter() - started) * 1000
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.02)
+        raise RuntimeError(f"{timeout} 秒内 /health 未返回 200")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="测量应用冷启动耗时")
+    parser.add_argument("--rounds", type=int, default=3, help="测量轮数（取中位数）")
+    parser.add_argument("--port", type=int, default=8765, help="time-to-first-200 使用的端口")
+    parser.add_argument("--save", action="store_true", help="将结果追加到 startup_benchmark.jsonl")
+    parser.add_argument("--note", default="", help="随结果保存的备注（如测量环境）")
+    args = parser.parse_args()
+
+    import_times = []
+    first_200_times = []
+    top_level = []
+    heavy = []
+    for _ in range(args.rounds):
+        total_ms, top_level, heavy = measure_import_time()
+        import_times.append(total_ms)
+        first_200_times.append(measure_time_to_first_200(args.port))
+
+    result = {
+        "measured_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "rounds": args.rounds,
+        "import_app_main_ms": round(statistics.median(import_times), 1),
+        "time_to_first_200_ms": round(statistics.median(first_200_times), 1),
+        "heavy_modules_imported": heavy,
+        "top_imports_ms": {name: round(ms, 1) for name, ms in top_level[:10]},
+        "note": args.note,
+    }
+
+    print("=" * 60)
+    print("For Health - 冷启动基准")
+    print("=" * 60)
+    print(f"import app.main:      {result['import_app_main_ms']} ms")
+    print(f"time-to-first-200:    {result['time_to_first_200_ms']} ms")
+    print(f"启动时导入的重依赖:   {', '.join(heavy) if heavy else '无'}")
+    print("耗时最高的直接导入:")
+    for name, ms in result["top_imports_ms"].items():
+        print(f"  - {name}: {ms} ms")
+
+    if args.save:
+        with open(RESULTS_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+        print(f"\n✅ 结果已追加到 {RESULTS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
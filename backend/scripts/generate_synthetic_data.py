@@ -0,0 +1,435 @@
+"""
+合成数据生成脚本
+按生产数据形态批量生成用户、饮食记录（含食谱批次）、体重曲线和运动记录，
+用于验证索引、汇总统计和分页在大数据量下的表现。
+
+同样的 --seed 与规模参数总是生成完全相同的数据（每个用户使用独立的随机数序列），
+写入通过 insert_many 分批并行执行，并周期性输出写入吞吐。
+
+用法（在 backend/ 目录下执行）:
+    python scripts/generate_synthetic_data.py --users 2000 --years 2
+    python scripts/generate_synthetic_data.py --users 5000 --years 3 --batch-size 5000 --parallel 8
+    python scripts/generate_synthetic_data.py --clear-only          # 仅删除之前生成的合成数据
+
+警告: 请勿在生产数据库上运行！
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# 添加项目根目录到路径，以便导入应用模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.food import FoodRecordInDB, NutritionData
+from app.models.recipe import RecipeFoodItem, RecipeInDB
+from app.models.sports import SportsLogInDB
+from app.models.user import ActivityLevel, Gender, HealthGoalType, UserInDB
+from app.models.weight import WeightRecordInDB
+from app.utils.security import get_password_hash
+
+# 加载环境变量
+load_dotenv(".env")
+
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "for_health")
+
+SYNTHETIC_EMAIL_DOMAIN = "synthetic.example.com"
+SYNTHETIC_PASSWORD = "synthetic1234"
+SYNTHETIC_TAG = "synthetic"
+DATASET_DIR = Path(__file__).parent.parent / "app" / "db_init"
+
+MEAL_SLOTS = [
+    # (餐次, 开始小时, 出现概率)
+    ("早餐", 7, 0.85),
+    ("午餐", 12, 0.95),
+    ("晚餐", 18, 0.9),
+    ("加餐", 15, 0.35),
+]
+# 正餐使用食谱记录（同一批次多条记录）的概率
+RECIPE_MEAL_PROBABILITY = 0.2
+
+
+class ThroughputStats:
+    """写入吞吐统计"""
+
+    def __init__(self, report_interval: float = 2.0):
+        self.started = time.perf_counter()
+        self.report_interval = report_interval
+        self.last_report = self.started
+        self.counts: Dict[str, int] = {}
+
+    def add(self, collection: str, count: int):
+        self.counts[collection] = self.counts.get(collection, 0) + count
+        now = time.perf_counter()
+        if now - self.last_report >= self.report_interval:
+            self.last_report = now
+            self.report()
+
+    def report(self, final: bool = False):
+        elapsed = time.perf_counter() - self.started
+        total = sum(self.counts.values())
+        detail = ", ".join(f"{name}: {count}" for name, count in sorted(self.counts.items()))
+        prefix = "✅ 完成" if final else "⏳ 进行中"
+        print(f"{prefix} {elapsed:7.1f}s | 共 {total} 条 | {total / elapsed if elapsed else 0:,.0f} 条/秒 | {detail}")
+
+
+class BatchWriter:
+    """
+    按集合缓冲文档，满批后并行 insert_many（并发数受信号量限制）
+
+    写入失败的批次会记录下来：之后再提交批次或 flush() 时抛出，不会被静默丢弃。
+    """
+
+    def __init__(self, db, batch_size: int, parallel: int, stats: ThroughputStats):
+        self.db = db
+        self.batch_size = batch_size
+        self.semaphore = asyncio.Semaphore(parallel)
+        self.stats = stats
+        self.buffers: Dict[str, List[dict]] = {}
+        self.tasks: set = set()
+        self.errors: List[tuple] = []  # (集合名, 异常)
+
+    async def add(self, collection: str, doc: dict):
+        buffer = self.buffers.setdefault(collection, [])
+        buffer.append(doc)
+        if len(buffer) >= self.batch_size:
+            self.buffers[collection] = []
+            await self._schedule(collection, buffer)
+
+    async def _schedule(self, collection: str, docs: List[dict]):
+        self._raise_errors()
+        await self.semaphore.acquire()
+        task = asyncio.create_task(self._write(collection, docs))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _write(self, collection: str, docs: List[dict]):
+        try:
+            await self.db[collection].insert_many(docs, ordered=False)
+            self.stats.add(collection, len(docs))
+        except Exception as e:
+            self.errors.append((collection, e))
+        finally:
+            self.semaphore.release()
+
+    async def flush(self):
+        for collection, docs in list(self.buffers.items()):
+            if docs:
+                self.buffers[collection] = []
+                await self._schedule(collection, docs)
+        if self.tasks:
+            await asyncio.gather(*list(self.tasks))
+        self._raise_errors()
+
+    def _raise_errors(self):
+        if not self.errors:
+            return
+        collection, error = self.errors[0]
+        raise RuntimeError(f"{len(self.errors)} 个批次写入失败（首个失败: {collection}）: {error}") from error
+
+
+def seeded_object_id(rng: random.Random, at: Optional[datetime] = None) -> str:
+    """
+    由随机数序列生成 ObjectId（同样的种子总是得到同样的ID）
+
+    Args:
+        rng: 随机数序列
+        at: ObjectId 中的时间戳，默认使用随机时间戳
+
+    Returns:
+        ObjectId 字符串
+    """
+    timestamp = int(at.replace(tzinfo=timezone.utc).timestamp()) if at else rng.getrandbits(31)
+    return str(ObjectId(timestamp.to_bytes(4, "big") + rng.getrandbits(64).to_bytes(8, "big")))
+
+
+def synthetic_email(index: int) -> str:
+    return f"synthetic_{index}@{SYNTHETIC_EMAIL_DOMAIN}"
+
+
+async def clear_synthetic_data(db):
+    """删除之前生成的合成数据"""
+    pattern = {"$regex": f"@{re.escape(SYNTHETIC_EMAIL_DOMAIN)}$"}
+    for collection, field in (
+        ("users", "email"),
+        ("food_records", "user_email"),
+        ("weight_records", "user_email"),
+        ("sports_log", "created_by"),
+    ):
+        result = await db[collection].delete_many({field: pattern})
+        print(f"  🗑  {collection}: 删除了 {result.deleted_count} 条记录")
+    result = await db.recipes.delete_many({"tags": SYNTHETIC_TAG})
+    print(f"  🗑  recipes: 删除了 {result.deleted_count} 条记录")
+
+
+async def load_foods(db) -> List[Dict[str, Any]]:
+    """优先使用数据库中的公共食物，没有时使用初始化数据集"""
+    foods = await db.foods.find({"created_by": "all"}).to_list(length=None)
+    if foods:
+        for food in foods:
+            food["_id"] = str(food["_id"])
+        return foods
+    with open(DATASET_DIR / "initial_foods_dataset.json", "r", encoding="utf-8") as f:
+        return json.load(f).get("foods", [])
+
+
+async def load_sports(db) -> List[Dict[str, Any]]:
+    """所有已初始化的运动类型（没有时使用初始化数据集）"""
+    sports = await db.sports.find({"created_by": "all"}).to_list(length=None)
+    if sports:
+        return sports
+    with open(DATASET_DIR / "initial_sports_dataset.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _scaled_nutrition(nutrition: Dict[str, Any], factor: float) -> NutritionData:
+    return NutritionData(
+        calories=round((nutrition.get("calories") or 0) * factor, 2),
+        protein=round((nutrition.get("protein") or 0) * factor, 2),
+        carbohydrates=round((nutrition.get("carbohydrates") or 0) * factor, 2),
+        fat=round((nutrition.get("fat") or 0) * factor, 2),
+        fiber=round(nutrition["fiber"] * factor, 2) if nutrition.get("fiber") is not None else None,
+        sugar=round(nutrition["sugar"] * factor, 2) if nutrition.get("sugar") is not None else None,
+        sodium=round(nutrition["sodium"] * factor, 2) if nutrition.get("sodium") is not None else None,
+    )
+
+
+def build_recipes(foods: List[Dict[str, Any]], count: int, rng: random.Random) -> List[dict]:
+    """生成合成食谱（公共可见，带 synthetic 标签便于清理）"""
+    recipes = []
+    for index in range(count):
+        items = []
+        for food in rng.sample(foods, k=min(len(foods), rng.randint(2, 4))):
+            amount = round(rng.uniform(0.5, 2.0), 1)
+            items.append(
+                RecipeFoodItem(
+                    food_id=str(food.get("_id") or seeded_object_id(rng)),
+                    food_name=food["name"],
+                    serving_amount=amount,
+                    serving_size=float(food.get("serving_size") or 100),
+                    serving_unit=food.get("serving_unit") or "克",
+                    nutrition=_scaled_nutrition(food.get("nutrition_per_serving") or {}, amount),
+                )
+            )
+        recipes.append(
+            RecipeInDB(
+                name=f"合成食谱_{index}",
+                category=rng.choice(["早餐", "午餐", "晚餐"]),
+                foods=items,
+                total_nutrition=NutritionData(
+                    calories=round(sum(item.nutrition.calories for item in items), 2),
+                    protein=round(sum(item.nutrition.protein for item in items), 2),
+                    carbohydrates=round(sum(item.nutrition.carbohydrates for item in items), 2),
+                    fat=round(sum(item.nutrition.fat for item in items), 2),
+                ),
+                tags=[SYNTHETIC_TAG],
+                created_by="all",
+            ).dict()
+        )
+    return recipes
+
+
+async def generate_user(
+    index: int,
+    args,
+    writer: BatchWriter,
+    foods: List[Dict[str, Any]],
+    recipes: List[dict],
+    sports: List[Dict[str, Any]],
+    hashed_password: str,
+    end_date: datetime,
+):
+    """生成单个用户的全部数据（每个用户独立的随机数序列，保证结果可复现）"""
+    rng = random.Random(f"{args.seed}:{index}")
+    email = synthetic_email(index)
+    days = int(args.years * 365)
+
+    gender = rng.choice([Gender.MALE, Gender.FEMALE])
+    height = rng.gauss(172 if gender == Gender.MALE else 160, 7)
+    start_weight = max(40.0, rng.gauss(75 if gender == Gender.MALE else 60, 12))
+    goal = rng.choice(list(HealthGoalType))
+    # 体重曲线：按目标的长期趋势 + 周期波动 + 日常噪声
+    trend_per_day = {"lose_weight": -0.02, "gain_weight": 0.015}.get(goal.value, 0.0) * rng.uniform(0.3, 1.2)
+    activity_days = rng.uniform(0.2, 0.8)
+    logging_rate = rng.uniform(0.6, 1.0)
+    user_recipes = rng.sample(recipes, k=min(len(recipes), 5)) if recipes else []
+
+    await writer.add(
+        "users",
+        UserInDB(
+            email=email,
+            username=f"synthetic_{index}",
+            hashed_password=hashed_password,
+            height=round(height, 1),
+            weight=round(start_weight, 1),
+            age=rng.randint(18, 65),
+            gender=gender,
+            activity_level=rng.choice(list(ActivityLevel)),
+            health_goal_type=goal,
+            daily_calorie_goal=float(rng.choice([1500, 1800, 2000, 2200, 2500])),
+            created_at=end_date - timedelta(days=days),
+        ).dict(),
+    )
+
+    weight = start_weight
+    for day in range(days):
+        day_start = end_date - timedelta(days=days - day)
+        if rng.random() > logging_rate:
+            continue
+
+        for meal_type, hour, probability in MEAL_SLOTS:
+            if rng.random() > probability:
+                continue
+            recorded_at = day_start + timedelta(hours=hour, minutes=rng.randint(0, 90))
+            if user_recipes and meal_type != "加餐" and rng.random() < RECIPE_MEAL_PROBABILITY:
+                recipe = rng.choice(user_recipes)
+                batch_id = seeded_object_id(rng, recorded_at)
+                scale = rng.choice([0.5, 1.0, 1.0, 1.5])
+                for item in recipe["foods"]:
+                    await writer.add(
+                        "food_records",
+                        FoodRecordInDB(
+                            user_email=email,
+                            food_name=item["food_name"],
+                            serving_amount=round(item["serving_amount"] * scale, 2),
+                            serving_size=item["serving_size"],
+                            serving_unit=item["serving_unit"],
+                            nutrition_data=_scaled_nutrition(item["nutrition"], scale),
+                            recorded_at=recorded_at,
+                            meal_type=meal_type,
+                            notes=f"[来自食谱: {recipe['name']}]",
+                            food_id=item["food_id"],
+                            recipe_record_batch_id=batch_id,
+                            created_at=recorded_at,
+                        ).dict(),
+                    )
+                continue
+
+            for _ in range(rng.randint(1, 3)):
+                food = rng.choice(foods)
+                amount = round(rng.uniform(0.5, 2.5), 2)
+                await writer.add(
+                    "food_records",
+                    FoodRecordInDB(
+                        user_email=email,
+                        food_name=food["name"],
+                        serving_amount=amount,
+                        serving_size=float(food.get("serving_size") or 100),
+                        serving_unit=food.get("serving_unit") or "克",
+                        nutrition_data=_scaled_nutrition(food.get("nutrition_per_serving") or {}, amount),
+                        recorded_at=recorded_at,
+                        meal_type=meal_type,
+                        food_id=str(food["_id"]) if food.get("_id") else None,
+                        created_at=recorded_at,
+                    ).dict(),
+                )
+
+        if sports and rng.random() < activity_days:
+            sport = rng.choice(sports)
+            duration = rng.randint(15, 90)
+            await writer.add(
+                "sports_log",
+                SportsLogInDB(
+                    created_by=email,
+                    sport_type=sport["sport_type"],
+                    sport_name=sport["sport_name"],
+                    created_at=day_start + timedelta(hours=rng.choice([6, 7, 18, 19, 20]), minutes=rng.randint(0, 59)),
+                    duration_time=duration,
+                    calories_burned=round(float(sport["METs"]) * weight * duration / 60, 2),
+                ).dict(),
+            )
+
+        weight = max(35.0, weight + trend_per_day + rng.gauss(0, 0.15))
+        if rng.random() < 0.4:
+            await writer.add(
+                "weight_records",
+                WeightRecordInDB(
+                    user_email=email,
+                    weight=round(weight + 0.4 * (day % 7 in (5, 6)) + rng.gauss(0, 0.2), 1),
+                    recorded_at=day_start + timedelta(hours=7, minutes=rng.randint(0, 30)),
+                    created_at=day_start + timedelta(hours=7, minutes=30),
+                ).dict(),
+            )
+
+
+async def generate(args):
+    """生成合成数据"""
+    client = AsyncIOMotorClient(MONGODB_URL, serverSelectionTimeoutMS=5000)
+    try:
+        await client.admin.command("ping")
+        db = client[args.database]
+        print(f"✅ 已连接到 MongoDB: {args.database}")
+
+        if args.clear or args.clear_only:
+            print("\n🗑  清理之前生成的合成数据...")
+            await clear_synthetic_data(db)
+            if args.clear_only:
+                return
+
+        rng = random.Random(args.seed)
+        foods = await load_foods(db)
+        sports = await load_sports(db)
+        recipes = build_recipes(foods, args.recipes, rng) if args.recipes else []
+        if recipes:
+            result = await db.recipes.insert_many(recipes)
+            for recipe, recipe_id in zip(recipes, result.inserted_ids):
+                recipe["_id"] = recipe_id
+
+        print(f"\n📋 食物 {len(foods)} 种, 运动 {len(sports)} 种, 合成食谱 {len(recipes)} 个")
+        print(f"🚀 生成 {args.users} 个用户 x {args.years} 年数据 "
+              f"(batch={args.batch_size}, parallel={args.parallel}, seed={args.seed})\n")
+
+        stats = ThroughputStats()
+        writer = BatchWriter(db, args.batch_size, args.parallel, stats)
+        hashed_password = get_password_hash(SYNTHETIC_PASSWORD)
+        end_date = datetime.strptime(args.end_date, "%Y-%m-%d") if args.end_date else \
+            datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        for index in range(args.start_index, args.start_index + args.users):
+            await generate_user(index, args, writer, foods, recipes, sports, hashed_password, end_date)
+        await writer.flush()
+        stats.report(final=True)
+    except Exception as e:
+        print(f"\n❌ 错误: {e}")
+        raise
+    finally:
+        client.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    parser = argparse.ArgumentParser(description="For Health - 合成数据生成工具")
+    parser.add_argument("--users", type=int, default=1000, help="用户数量")
+    parser.add_argument("--years", type=float, default=1.0, help="每个用户的历史数据年数")
+    parser.add_argument("--recipes", type=int, default=50, help="合成食谱数量（0 表示不生成食谱批次）")
+    parser.add_argument("--seed", type=int, default=42, help="随机数种子")
+    parser.add_argument("--start-index", type=int, default=0, help="用户起始编号（用于分多次追加生成）")
+    parser.add_argument("--end-date", default=None, help="数据截止日期 YYYY-MM-DD（默认今天，固定后结果完全可复现）")
+    parser.add_argument("--batch-size", type=int, default=2000, help="每次 insert_many 的文档数")
+    parser.add_argument("--parallel", type=int, default=4, help="并行写入的批次数")
+    parser.add_argument("--database", default=DATABASE_NAME, help="目标数据库名")
+    parser.add_argument("--clear", action="store_true", help="生成前删除之前生成的合成数据")
+    parser.add_argument("--clear-only", action="store_true", help="仅删除之前生成的合成数据")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("For Health - 合成数据生成工具")
+    print("=" * 60)
+    asyncio.run(generate(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+测试共用的 fixture
+
+fake_db：内存中的假数据库，供不需要连接 MongoDB 的服务层单元测试使用。
+集合按名称（db["foods"] 或 db.foods）自动创建，每个集合记录收到的调用，
+查询结果通过 find_results / aggregate_results 预先设置，insert_many 可通过 insert_many_error 模拟写入失败。
+"""
+from typing import Any, Dict, List, Optional
+
+import pytest
+from bson import ObjectId
+
+
+class FakeCursor:
+    """固定结果的游标（sort / limit 不改变结果）"""
+
+    def __init__(self, documents: List[dict]):
+        self.documents = list(documents)
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def limit(self, *args, **kwargs):
+        return self
+
+    async def to_list(self, length=None):
+        return list(self.documents)
+
+    def __aiter__(self):
+        self._iterator = iter(self.documents)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    """记录调用的假集合"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.find_results: List[dict] = []
+        self.aggregate_results: List[dict] = []
+        self.insert_many_error: Optional[Exception] = None
+        self.calls: List[tuple] = []  # (方法名, 参数)
+
+    def find(self, *args, **kwargs):
+        self.calls.append(("find", args))
+        return FakeCursor(self.find_results)
+
+    def aggregate(self, pipeline, **kwargs):
+        self.calls.append(("aggregate", pipeline))
+        return FakeCursor(self.aggregate_results)
+
+    async def insert_many(self, documents, ordered=True):
+        self.calls.append(("insert_many", documents))
+        # 与 pymongo 一致：发送前为每个文档写入 _id
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+        if self.insert_many_error is not None:
+            raise self.insert_many_error
+
+    def methods(self) -> List[str]:
+        """按顺序返回收到的调用方法名"""
+        return [method for method, _ in self.calls]
+
+
+class FakeDatabase:
+    """按名称创建集合的假数据库"""
+
+    def __init__(self):
+        self.collections: Dict[str, FakeCollection] = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(name)
+        return self.collections[name]
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def round_trips(self) -> int:
+        """所有集合收到的调用总数"""
+        return sum(len(collection.calls) for collection in self.collections.values())
+
+
+@pytest.fixture
+def fake_db() -> FakeDatabase:
+    """内存中的假数据库（需要在被测模块上 monkeypatch get_database）"""
+    return FakeDatabase()
@@ -312,3 +312,50 @@ async def test_ai_photo_recognize_endpoint_invalid_meal_type(auth_client: AsyncC
     assert "餐次类型" in result["detail"] or "meal_type" in result["detail"].lower(), "错误消息应该提到餐次类型"
 
 
+
+
+@pytest.mark.asyncio
+async def test_ai_photo_recognize_cache_hit_on_repeated_image(auth_client: AsyncClient):
+    """
+    测试：重复上传同一张图片时命中识别缓存
+
+    步骤：
+    1. 上传 image2.jpg 识别一次（确保缓存中有记录）
+    2. 记录缓存统计后再次上传同一张图片
+    3. 断言：命中次数增加，且两次识别出的食物名称一致
+    """
+    test_image_path = Path(__file__).parent / "test_picture" / "image2.jpg"
+
+    if not test_image_path.exists():
+        pytest.skip(f"测试图片不存在: {test_image_path}")
+
+    stats_response = await auth_client.get("/api/ai/food/recognize/cache-stats")
+    assert stats_response.status_code == 200, f"获取缓存统计失败: {stats_response.text}"
+    if not stats_response.json()["enabled"]:
+        pytest.skip("识别缓存未启用")
+
+    with open(test_image_path, "rb") as f:
+        first = await auth_client.post(
+            "/api/ai/food/recognize",
+            files={"file": ("image2.jpg", f, "image/jpeg")},
+        )
+    assert first.status_code == 200, f"识别接口失败: {first.text}"
+    if not first.json()["success"]:
+        pytest.skip("首次识别未识别到食物，结果不会被缓存")
+
+    hits_before = (await auth_client.get("/api/ai/food/recognize/cache-stats")).json()["hits"]
+
+    with open(test_image_path, "rb") as f:
+        second = await auth_client.post(
+            "/api/ai/food/recognize",
+            files={"file": ("image2.jpg", f, "image/jpeg")},
+        )
+    assert second.status_code == 200, f"识别接口失败: {second.text}"
+
+    stats = (await auth_client.get("/api/ai/food/recognize/cache-stats")).json()
+    assert stats["hits"] == hits_before + 1
+    assert 0 <= stats["hit_rate"] <= 1
+
+    first_names = [item["food_name"] for item in first.json()["processed_foods"]]
+    second_names = [item["food_name"] for item in second.json()["processed_foods"]]
+    assert first_names == second_names
@@ -182,6 +182,25 @@ async def test_search_food_by_name(auth_client):
         assert "foods" in data
 
 
+@pytest.mark.asyncio
+async def test_search_food_by_pinyin(auth_client, sample_food_data):
+    """测试本地搜索支持拼音和首字母（新建的食物立即可被搜索到）"""
+    sample_food_data["name"] = "测试拼音搜索鸡蛋"
+    form_data = convert_food_data_to_form(sample_food_data)
+    create_response = await auth_client.post("/api/food/", data=form_data)
+    if create_response.status_code != 201:
+        pytest.skip("无法创建测试食物")
+    food_id = create_response.json().get("id")
+
+    try:
+        for keyword in ("ceshipinyinsousuojidan", "cspyssjd"):
+            response = await auth_client.get(f"/api/food/search-id?keyword={keyword}&limit=5")
+            assert response.status_code == 200
+            assert response.json()["foods"][0]["food_id"] == food_id
+    finally:
+        await auth_client.delete(f"/api/food/{food_id}")
+
+
 @pytest.mark.asyncio
 async def test_get_food(auth_client, sample_food_data):
     """测试获取食物详情"""
@@ -211,6 +230,39 @@ async def test_get_food(auth_client, sample_food_data):
         await auth_client.delete(f"/api/food/{food_id}")
 
 
+@pytest.mark.asyncio
+async def test_get_food_etag(auth_client, sample_food_data):
+    """测试食物详情 ETag：未变化时返回 304，更新后 ETag 改变"""
+    form_data = convert_food_data_to_form(sample_food_data)
+    create_response = await auth_client.post("/api/food/", data=form_data)
+    if create_response.status_code != 201:
+        pytest.skip("无法创建测试食物")
+
+    food_id = create_response.json().get("id")
+
+    response = await auth_client.get(f"/api/food/{food_id}")
+    assert response.status_code == 200
+    etag = response.headers.get("etag")
+    assert etag
+
+    # 携带 If-None-Match 再次请求，内容未变化应返回 304
+    not_modified = await auth_client.get(f"/api/food/{food_id}", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers.get("etag") == etag
+
+    # 更新后缓存失效，应返回新内容和新的 ETag（分类改为与创建时不同的值）
+    assert response.json()["category"] != "蔬菜"
+    update_response = await auth_client.put(f"/api/food/{food_id}", json={"category": "蔬菜"})
+    assert update_response.status_code == 200
+    modified = await auth_client.get(f"/api/food/{food_id}", headers={"If-None-Match": etag})
+    assert modified.status_code == 200
+    assert modified.json()["category"] == "蔬菜"
+    assert modified.headers.get("etag") != etag
+
+    # 清理
+    await auth_client.delete(f"/api/food/{food_id}")
+
+
 @pytest.mark.asyncio
 async def test_update_food(auth_client, sample_food_data):
     """测试更新食物"""
@@ -401,6 +453,134 @@ async def test_get_daily_nutrition(auth_client):
         assert "records" in data
 
 
+@pytest.mark.asyncio
+async def test_daily_nutrition_reflects_record_changes(auth_client, sample_food_data):
+    """测试每日营养摘要缓存：新增和删除记录后立即反映到摘要中"""
+    target_date = "2024-01-16"
+
+    form_data = convert_food_data_to_form(sample_food_data)
+    food_response = await auth_client.post("/api/food/", data=form_data)
+    if food_response.status_code != 201:
+        pytest.skip("无法创建测试食物")
+    food_id = food_response.json().get("id")
+
+    # 先请求一次，使摘要进入缓存
+    before = await auth_client.get(f"/api/food/record/daily/{target_date}")
+    assert before.status_code == 200
+    meal_count = before.json()["meal_count"]
+
+    record_response = await auth_client.post("/api/food/record", json={
+        "food_id": food_id,
+        "serving_amount": 1,
+        "recorded_at": f"{target_date}T12:00:00",
+        "meal_type": "午餐",
+    })
+    assert record_response.status_code == 201
+    record_id = record_response.json().get("id")
+
+    after_create = await auth_client.get(f"/api/food/record/daily/{target_date}")
+    assert after_create.json()["meal_count"] == meal_count + 1
+
+    await auth_client.delete(f"/api/food/record/{record_id}")
+    after_delete = await auth_client.get(f"/api/food/record/daily/{target_date}")
+    assert after_delete.json()["meal_count"] == meal_count
+
+    # 清理
+    await auth_client.delete(f"/api/food/{food_id}")
+
+
+@pytest.mark.asyncio
+async def test_quick_log_items(auth_client, sample_food_data):
+    """测试快速记录列表：记录后的食物带份量出现在最前面，重复记录不产生重复条目"""
+    form_data = convert_food_data_to_form(sample_food_data)
+    food_response = await auth_client.post("/api/food/", data=form_data)
+    if food_response.status_code != 201:
+        pytest.skip("无法创建测试食物")
+    food_id = food_response.json().get("id")
+
+    record_ids = []
+    for serving_amount in (1, 2.5):
+        record_response = await auth_client.post("/api/food/record", json={
+            "food_id": food_id,
+            "serving_amount": serving_amount,
+            "recorded_at": "2024-01-17T08:00:00",
+            "meal_type": "早餐",
+        })
+        assert record_response.status_code == 201
+        record_ids.append(record_response.json().get("id"))
+
+    response = await auth_client.get("/api/food/quick?limit=10")
+    assert response.status_code == 200
+    data = response.json()
+    latest = data["recent"][0]
+    assert latest["kind"] == "food" and latest["item_id"] == food_id
+    assert latest["serving_amount"] == 2.5
+    assert latest["meal_type"] == "早餐"
+    assert latest["count"] >= 2
+    assert [item["item_id"] for item in data["recent"]].count(food_id) == 1
+
+    # 清理
+    for record_id in record_ids:
+        await auth_client.delete(f"/api/food/record/{record_id}")
+    await auth_client.delete(f"/api/food/{food_id}")
+
+
+@pytest.mark.asyncio
+async def test_copy_meal_food_records(auth_client, sample_food_data):
+    """测试复制一餐：副本保留份量和时刻、换到目标日期，并反映到目标日期的营养摘要"""
+    source_date, target_date = "2024-01-18", "2024-01-19"
+
+    form_data = convert_food_data_to_form(sample_food_data)
+    food_response = await auth_client.post("/api/food/", data=form_data)
+    if food_response.status_code != 201:
+        pytest.skip("无法创建测试食物")
+    food_id = food_response.json().get("id")
+
+    record_response = await auth_client.post("/api/food/record", json={
+        "food_id": food_id,
+        "serving_amount": 2,
+        "recorded_at": f"{source_date}T07:30:00",
+        "meal_type": "早餐",
+    })
+    assert record_response.status_code == 201
+    source_record = record_response.json()
+
+    before = await auth_client.get(f"/api/food/record/daily/{target_date}")
+    meal_count = before.json()["meal_count"]
+
+    copy_response = await auth_client.post("/api/food/record/copy-meal", json={
+        "source_date": source_date,
+        "target_date": target_date,
+        "meal_type": "早餐",
+        "target_meal_type": "加餐",
+    })
+    assert copy_response.status_code == 201
+    copies = [record for record in copy_response.json()["records"] if record["food_id"] == food_id]
+    assert len(copies) == 1
+    copy = copies[0]
+    assert copy["id"] != source_record["id"]
+    assert copy["serving_amount"] == 2
+    assert copy["meal_type"] == "加餐"
+    assert copy["nutrition_data"] == source_record["nutrition_data"]
+
+    after = await auth_client.get(f"/api/food/record/daily/{target_date}")
+    assert after.json()["meal_count"] == meal_count + len(copy_response.json()["records"])
+
+    # 来源餐次没有记录时返回 404
+    missing = await auth_client.post("/api/food/record/copy-meal", json={
+        "source_date": "1999-01-01",
+        "target_date": target_date,
+        "meal_type": "早餐",
+    })
+    assert missing.status_code == 404
+
+    # 清理
+    for record in copy_response.json()["records"]:
+        await auth_client.delete(f"/api/food/record/{record['id']}")
+    await auth_client.delete(f"/api/food/record/{source_record['id']}")
+    await auth_client.delete(f"/api/food/{food_id}")
+
+
 @pytest.mark.asyncio
 async def test_update_food_record(auth_client, sample_food_data):
     """测试更新食物记录"""
@@ -576,3 +756,150 @@ async def test_create_food_unauthorized():
         response = await client.post("/api/food/", data=form_data)
         # 未认证应该返回 401 或 403
         assert response.status_code in expected_error["status_code_range"]
+
+
+@pytest.mark.asyncio
+async def test_create_foods_bulk_keeps_partially_inserted_foods(monkeypatch, fake_db):
+    """测试批量创建食物部分写入失败时，返回并索引已成功写入的食物"""
+    from pymongo.errors import BulkWriteError
+    from app.models.food import NutritionData
+    from app.schemas.food import FoodCreateRequest
+    from app.services import food_service
+
+    fake_db.foods.insert_many_error = BulkWriteError(
+        {"writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate key"}]}
+    )
+    indexed = []
+    monkeypatch.setattr(food_service, "get_database", lambda: fake_db)
+    monkeypatch.setattr(food_service.food_search_service, "index_food", indexed.append)
+
+    nutrition = NutritionData(calories=100, protein=1, carbohydrates=1, fat=1)
+    created = await food_service.create_foods_bulk(
+        [FoodCreateRequest(name=name, serving_size=100, nutrition_per_serving=nutrition) for name in ("苹果", "香蕉", "梨")],
+        creator_email="bulk@example.com",
+    )
+
+    assert [food["name"] for food in created] == ["苹果", "梨"]
+    assert all(isinstance(food["_id"], str) for food in created)
+    assert [food["name"] for food in indexed] == ["苹果", "梨"]
+
+
+def test_food_search_index_pinyin_typos_and_ranking():
+    """测试本地食物搜索索引：拼音/首字母/错别字匹配，用户自建和常记录的食物排在前面"""
+    pytest.importorskip("pypinyin")
+    from app.utils.food_search_index import FoodSearchIndex
+
+    index = FoodSearchIndex()
+    index.upsert("egg", "鸡蛋", None, "all")
+    index.upsert("tomato-egg", "西红柿炒鸡蛋", None, "all")
+    index.upsert("rice", "米饭", None, "all")
+    index.upsert("cola", "可口可乐", "Coca-Cola", "all")
+    index.upsert("my-egg", "鸡蛋羹", None, "me@example.com")
+    index.upsert("other-egg", "鸡蛋饼", None, "other@example.com")
+    owners = ["all", "me@example.com"]
+
+    def ids(keyword, **kwargs):
+        return [hit.food_id for hit in index.search(keyword, owners, **kwargs)]
+
+    assert ids("jidan")[0] == "egg"
+    assert "egg" in ids("jd")
+    assert ids("西红柿炒鸡但")[0] == "tomato-egg"  # 同音错字
+    assert ids("西红柿炒鸡丹")[0] == "tomato-egg"  # 非同音错字，编辑距离容错
+    assert ids("coca") == ["cola"]
+    assert "other-egg" not in ids("鸡蛋")  # 其他用户的私有食物不可见
+
+    assert ids("鸡蛋", preferred_owner="me@example.com")[0] == "my-egg"
+    assert ids("鸡蛋") == ["egg", "my-egg", "tomato-egg"]
+    assert ids("鸡蛋", log_counts={"tomato-egg": 5}) == ["egg", "tomato-egg", "my-egg"]
+    # 全站热门的权重低于用户自己的记录
+    assert ids("鸡蛋", global_counts={"tomato-egg": 5}) == ["egg", "my-egg", "tomato-egg"]
+    assert ids("鸡蛋", global_counts={"tomato-egg": 100}) == ["egg", "tomato-egg", "my-egg"]
+
+    index.upsert("egg", "水煮蛋", None, "all")
+    assert "egg" not in ids("jidan")
+    index.remove("tomato-egg")
+    assert "tomato-egg" not in ids("西红柿")
+
+
+def test_popularity_score_decays_with_half_life():
+    """测试热度计数的时间衰减：一个半衰期前的一次记录计 0.5 次，较早的多次记录可被近期记录超过"""
+    from datetime import datetime, timedelta
+    from app.config import settings
+    from app.services import popularity_service
+
+    now = datetime(2026, 3, 1)
+    half_life = timedelta(days=settings.POPULARITY_HALF_LIFE_DAYS)
+    old_score = popularity_service._growth(now - half_life)
+    assert popularity_service.decayed_count(old_score, now) == pytest.approx(0.5)
+    assert popularity_service.decayed_count(popularity_service._growth(now), now) == pytest.approx(1.0)
+
+    # 三个半衰期前的 3 次记录（计 0.375 次）低于今天的 1 次记录，score 的大小顺序与衰减后次数一致
+    stale = 3 * popularity_service._growth(now - 3 * half_life)
+    fresh = popularity_service._growth(now)
+    assert stale < fresh
+    assert popularity_service.decayed_count(stale, now) == pytest.approx(0.375)
+
+    # 指数有上限：很久以后的增长倍数不会溢出
+    far_future = popularity_service.DECAY_EPOCH + 2000 * half_life
+    assert popularity_service._growth(far_future) == 2.0 ** popularity_service.MAX_GROWTH_EXPONENT
+
+    with pytest.raises(ValueError):
+        type(settings)(POPULARITY_HALF_LIFE_DAYS=0.01)
+
+
+@pytest.mark.asyncio
+async def test_catalog_cache_skips_store_after_concurrent_invalidate():
+    """测试目录缓存：加载期间发生失效时不缓存加载前读到的旧值"""
+    from app.utils import catalog_cache
+
+    namespace = "test_catalog_generation"
+    catalog_cache.invalidate(namespace)
+
+    async def stale_loader():
+        # 模拟加载期间另一个请求更新了数据并失效缓存
+        catalog_cache.invalidate(namespace, "key")
+        return "old"
+
+    async def fresh_loader():
+        return "new"
+
+    assert await catalog_cache.get_or_load(namespace, "key", stale_loader) == "old"
+    assert await catalog_cache.get_or_load(namespace, "key", fresh_loader) == "new"
+    assert await catalog_cache.get_or_load(namespace, "key", stale_loader) == "new"
+    catalog_cache.invalidate(namespace)
+
+
+@pytest.mark.asyncio
+async def test_match_local_foods_by_names_uses_fixed_round_trips(monkeypatch, fake_db):
+    """测试按名称批量匹配食物：名称数量不影响数据库往返次数，精确匹配优先，包含匹配中用户自建食物优先"""
+    from app.services import food_service
+
+    user = "match@example.com"
+    fake_db.foods.find_results = [
+        {"_id": "exact-public", "name": "米饭", "created_by": "all"},
+        {"_id": "other-user", "name": "鸡蛋", "created_by": "other@example.com"},
+    ]
+    fake_db.foods.aggregate_results = [{
+        "n0": [
+            {"_id": "all", "food": {"_id": "public-egg", "name": "煮鸡蛋", "created_by": "all"}},
+            {"_id": user, "food": {"_id": "own-egg", "name": "我的鸡蛋", "created_by": user}},
+        ],
+        "n1": [{"_id": "all", "food": {"_id": "public-milk", "name": "纯牛奶", "created_by": "all"}}],
+        "n2": [],
+    }]
+    monkeypatch.setattr(food_service, "get_database", lambda: fake_db)
+
+    matches, taken_names = await food_service.match_local_foods_by_names(
+        ["米饭", "鸡蛋", "牛奶", "不存在的食物", "米饭"], user
+    )
+
+    assert fake_db.round_trips() == 2
+    assert fake_db.foods.methods() == ["find", "aggregate"]
+    facets = fake_db.foods.calls[1][1][-1]["$facet"]
+    assert len(facets) == 3  # 只对没有精确匹配的名称做包含匹配
+    assert {name: food["food_id"] for name, food in matches.items()} == {
+        "米饭": "exact-public",
+        "鸡蛋": "own-egg",
+        "牛奶": "public-milk",
+    }
+    assert taken_names == {"米饭", "鸡蛋"}
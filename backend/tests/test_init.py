@@ -125,3 +125,57 @@ async def test_initialize_sports_talbe_success(auth_client, sport_data, expected
             break
     
     assert exist, f"运动类型 '{sport_data.get('sport_name')}' 不存在"
+
+
+# ================== 测试：记录时间换算为 UTC ==================
+@pytest_asyncio.fixture
+async def backfill_database():
+    """独立的换算测试库（测试结束时删除），无法连接 MongoDB 时跳过"""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from app import database as app_database
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL, serverSelectionTimeoutMS=1000)
+    try:
+        await client.admin.command("ping")
+    except Exception:
+        client.close()
+        pytest.skip("未连接到 MongoDB，跳过记录时间换算测试")
+
+    database_name = f"{settings.DATABASE_NAME}_local_time_backfill"
+    await client.drop_database(database_name)
+    previous_database = app_database.database
+    app_database.database = client[database_name]
+    try:
+        yield app_database.database
+    finally:
+        app_database.database = previous_database
+        await client.drop_database(database_name)
+        client.close()
+
+
+@pytest.mark.asyncio
+async def test_backfill_local_record_times_skips_server_utc_rows(backfill_database, monkeypatch):
+    """测试记录时间换算：客户端发送的本地时间换算为 UTC，服务端按 UTC 生成的时间保持不变"""
+    from datetime import datetime
+    from app.db_init.init_dataset import backfill_local_record_times
+
+    monkeypatch.setattr(settings, "LOCAL_TIME_BACKFILL_ENABLED", True)
+    db = backfill_database
+    email = "backfill@example.com"
+    now = datetime.utcnow().replace(microsecond=0)
+    await db.users.insert_one({"email": email, "timezone": "Asia/Shanghai"})
+    # 客户端按本地时间发送的记录
+    await db.weight_records.insert_one({"user_email": email, "weight": 70, "recorded_at": datetime(2025, 1, 1, 8), "notes": None})
+    # 修改个人资料时服务端写入的体重记录（时间与 _id 无关也按备注识别）
+    await db.weight_records.insert_one(
+        {"user_email": email, "weight": 71, "recorded_at": datetime(2025, 2, 1, 8), "notes": "通过个人资料更新"}
+    )
+    # 未传 created_at 时服务端生成的运动时间
+    await db.sports_log.insert_one({"created_by": email, "created_at": now})
+
+    await backfill_local_record_times()
+
+    weights = {record["weight"]: record["recorded_at"] for record in await db.weight_records.find().to_list(length=None)}
+    assert weights == {70: datetime(2025, 1, 1, 0), 71: datetime(2025, 2, 1, 8)}
+    assert (await db.sports_log.find_one({"created_by": email}))["created_at"] == now
+    assert (await db.users.find_one({"email": email}))["weight_recorded_at"] == datetime(2025, 2, 1, 8)
@@ -25,3 +25,109 @@ async def test_health_check():
         response = await client.get("/health")
         assert response.status_code == 200
         assert response.json()["status"] == "healthy"
+
+
+@pytest.mark.asyncio
+async def test_ready_check_reports_checks():
+    """测试就绪检查：未完成初始化时返回 503 并给出各项检查详情"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/ready")
+        assert response.status_code in (200, 503)
+        data = response.json()
+        assert data["status"] == ("ready" if response.status_code == 200 else "not_ready")
+        for key in ("database", "indexes", "initialization", "external_api"):
+            assert key in data["checks"]
+
+
+@pytest.mark.asyncio
+async def test_initialization_retries_failed_step(monkeypatch):
+    """测试后台初始化：某一步失败后从该步骤重试，不重复执行已完成的步骤，最终状态为完成"""
+    from app import main
+
+    calls = []
+
+    async def first():
+        calls.append("first")
+
+    async def flaky():
+        calls.append("flaky")
+        if calls.count("flaky") == 1:
+            raise RuntimeError("数据库暂时不可用")
+
+    monkeypatch.setattr(main, "INIT_STEPS", (("first", "first", first), ("flaky", "flaky", flaky)))
+    monkeypatch.setattr(main.settings, "INIT_RETRY_BASE_SECONDS", 0)
+    monkeypatch.setattr(main.settings, "WARM_UP_OPTIONAL_MODULES", False)
+    monkeypatch.setattr(main, "_init_state", dict(main._init_state))
+
+    await main.run_initialization()
+
+    assert calls == ["first", "flaky", "flaky"]
+    assert main._init_state["status"] == "completed"
+    assert main._init_state["attempts"] == 2
+    assert main._init_state["completed_steps"] == ["first", "flaky"]
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header_and_db_metrics():
+    """测试响应携带 Server-Timing 头，且数据库耗时汇总可查询"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/health")
+        assert response.status_code == 200
+        assert response.headers["server-timing"].startswith("db;dur=")
+
+        response = await client.get("/metrics/db")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["requests"] >= 1
+        assert "avg_db_ms_per_request" in data
+
+
+@pytest.mark.asyncio
+async def test_prometheus_metrics():
+    """测试 /metrics 输出 Prometheus 文本格式的按路由耗时直方图"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        await client.get("/health")
+        response = await client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert "# TYPE http_request_duration_seconds histogram" in body
+        assert 'http_request_duration_seconds_bucket{router="app",method="GET",status="2xx",le="+Inf"}' in body
+        assert "# TYPE boohee_account_switches_total counter" in body
+
+
+def test_access_token_claims_cache_respects_expiry():
+    """测试 token 声明缓存：重复解码命中缓存，过期后不再有效"""
+    import time
+    from datetime import timedelta
+    from app.utils import security
+
+    token = security.create_access_token({"sub": "cache@example.com"}, expires_delta=timedelta(seconds=1))
+    assert security.decode_access_token(token)["sub"] == "cache@example.com"
+    # 第二次解码来自缓存，修改返回值不影响缓存内容
+    payload = security.decode_access_token(token)
+    payload["sub"] = "changed"
+    assert security.decode_access_token(token)["sub"] == "cache@example.com"
+
+    time.sleep(2.1)
+    assert security.decode_access_token(token) is None
+
+    expired = security.create_access_token({"sub": "cache@example.com"}, expires_delta=timedelta(seconds=-1))
+    assert security.decode_access_token(expired) is None
+
+
+def test_profiler_retention_keeps_latest_profiles(monkeypatch, tmp_path):
+    """测试采样文件清理：只保留最新的 PROFILER_RETENTION_COUNT 个，配置为 0 时仍保留刚写入的文件"""
+    from collections import Counter
+    from app.utils import profiler
+
+    monkeypatch.setattr(profiler.settings, "PROFILER_OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(profiler.settings, "PROFILER_RETENTION_COUNT", 2)
+    for index in range(4):
+        latest = profiler._write_profile("GET", f"/api/test/{index}", 10.0, Counter({"main;handler": 1}))
+    assert sorted(tmp_path.glob("*.folded"))[-1] == latest
+    assert len(list(tmp_path.glob("*.folded"))) == 2
+
+    monkeypatch.setattr(profiler.settings, "PROFILER_RETENTION_COUNT", 0)
+    latest = profiler._write_profile("GET", "/api/test/last", 10.0, Counter({"main;handler": 1}))
+    assert list(tmp_path.glob("*.folded")) == [latest]
@@ -0,0 +1,466 @@
+"""
+查询计划回归测试
+
+在本地 mongod 的独立测试库中写入合成数据并按 app.database.INDEXES 建索引，然后调用
+food / recipe / sports / weight / visualization 服务层的读写函数，用命令监听器记录实际发出的
+每条查询（find、aggregate、count、distinct、findAndModify、update、delete），再对其筛选条件
+执行 explain("executionStats")：
+- 计划中出现 COLLSCAN（全表扫描）即失败
+- 检查文档数超过返回文档数的 MAX_DOCS_EXAMINED_RATIO 倍即失败
+
+聚合管道只检查开头的 $match（及紧随的 $sort / $limit），写命令检查其筛选条件，二者都以等价的
+find 执行 explain。无法连接 mongod 时整个模块跳过。
+"""
+# 将 backend 目录添加到 Python 路径
+import sys
+from pathlib import Path
+backend_path = str(Path(__file__).parent.parent.absolute())# 获取 backend 目录的绝对路径
+sys.path.insert(0, backend_path)
+
+import asyncio
+import copy
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient, monitoring
+
+from app import database as app_database
+from app.config import settings
+from app.schemas.sports import SearchSportRecordsRequest
+from app.schemas.weight import WeightRecordCreateRequest
+from app.services import (
+    food_search_service,
+    food_service,
+    popularity_service,
+    quick_log_service,
+    recipe_service,
+    sports_service,
+    trend_change_service,
+    visualization_service,
+    weight_service,
+)
+
+PLAN_DATABASE_NAME = f"{settings.DATABASE_NAME}_query_plans"
+
+# 检查文档数 / 返回文档数 的上限（返回 0 条时按 1 条计算）
+MAX_DOCS_EXAMINED_RATIO = 2
+
+# 有意读取整个集合的查询（通过查询注释识别）
+INTENTIONAL_SCAN_COMMENTS = (
+    food_search_service.BUILD_QUERY_COMMENT,  # 进程内食物搜索索引的全量构建
+)
+
+# 需要检查执行计划的命令
+EXPLAINED_COMMANDS = ("find", "aggregate", "count", "distinct", "findAndModify", "update", "delete")
+
+USER = "plan-user@example.com"
+OTHER_USERS = ("plan-other-1@example.com", "plan-other-2@example.com")
+SEED_DAYS = 60
+MEAL_TYPES = ("breakfast", "lunch", "dinner", "snack")
+RECIPE_CATEGORIES = ("早餐", "午餐", "晚餐", "甜点")
+
+
+class _CommandCapture(monitoring.CommandListener):
+    """记录发往测试库的命令"""
+
+    def __init__(self, database_name: str):
+        self.database_name = database_name
+        self.commands: List[Tuple[str, dict]] = []
+
+    def started(self, event):
+        if event.database_name == self.database_name and event.command_name in EXPLAINED_COMMANDS:
+            self.commands.append((event.command_name, copy.deepcopy(dict(event.command))))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def _seed(db) -> Dict[str, Any]:
+    """写入合成数据，返回场景中要用到的文档 ID"""
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    first_day = now - timedelta(days=SEED_DAYS)
+
+    foods = [
+        {
+            "name": f"公共食物{i}",
+            "category": RECIPE_CATEGORIES[i % len(RECIPE_CATEGORIES)],
+            "created_by": "all",
+            "created_at": first_day + timedelta(minutes=i),
+            "serving_size": 100.0,
+            "serving_unit": "克",
+            "nutrition_per_serving": {"calories": 100.0 + i, "protein": 5.0, "carbohydrates": 10.0, "fat": 3.0},
+            **({"barcode": f"6900000{i:05d}"} if i % 3 == 0 else {}),
+        }
+        for i in range(150)
+    ]
+    foods += [
+        {
+            "name": f"{email}-自建食物{i}",
+            "created_by": email,
+            "created_at": first_day + timedelta(hours=i),
+            "serving_size": 100.0,
+            "serving_unit": "克",
+            "nutrition_per_serving": {"calories": 200.0, "protein": 8.0, "carbohydrates": 20.0, "fat": 6.0},
+        }
+        for email in (USER, *OTHER_USERS)
+        for i in range(15)
+    ]
+    food_ids = db.foods.insert_many(foods).inserted_ids
+
+    db.recipes.insert_many([
+        {
+            "name": f"{owner}-食谱{i}",
+            "description": "合成数据",
+            "category": RECIPE_CATEGORIES[i % len(RECIPE_CATEGORIES)],
+            "tags": ["家常"],
+            "foods": [],
+            "created_by": owner,
+            "created_at": first_day + timedelta(hours=i),
+        }
+        for owner, count in (("all", 40), (USER, 8), *((email, 8) for email in OTHER_USERS))
+        for i in range(count)
+    ])
+
+    db.sports.insert_many([
+        {"sport_name": f"运动{i}", "sport_type": "有氧运动", "METs": 5.0 + i, "created_by": "all"}
+        for i in range(10)
+    ] + [
+        {"sport_name": f"{email}-自定义运动", "sport_type": "其他", "METs": 4.0, "created_by": email}
+        for email in (USER, *OTHER_USERS)
+    ])
+
+    db.users.insert_many([
+        {
+            "email": email,
+            "username": email.split("@")[0],
+            "weight": 70.0,
+            "height": 175.0,
+            "age": 30,
+            "gender": "male",
+            "daily_calorie_goal": 2000.0,
+            "timezone": settings.DEFAULT_TIMEZONE,
+        }
+        for email in (USER, *OTHER_USERS)
+    ])
+
+    food_records, sports_log, weight_records = [], [], []
+    for email in (USER, *OTHER_USERS):
+        for day in range(SEED_DAYS):
+            day_start = first_day + timedelta(days=day)
+            for index, meal_type in enumerate(MEAL_TYPES):
+                food_records.append({
+                    "user_email": email,
+                    "food_id": food_ids[(day + index) % 150],
+                    "food_name": f"公共食物{(day + index) % 150}",
+                    "serving_amount": 1.0,
+                    "serving_size": 100.0,
+                    "serving_unit": "克",
+                    "nutrition_data": {"calories": 300.0, "protein": 10.0, "carbohydrates": 40.0, "fat": 8.0},
+                    "recorded_at": day_start + timedelta(hours=index * 4),
+                    "meal_type": meal_type,
+                    "notes": None,
+                })
+            if day % 6 == 0:
+                # 每 6 天一次食谱记录：同一批次的两条食物记录
+                batch_id = f"{email}-batch-{day}"
+                for index in range(2):
+                    food_records.append({
+                        "user_email": email,
+                        "food_id": food_ids[index],
+                        "food_name": f"公共食物{index}",
+                        "serving_amount": 1.0,
+                        "nutrition_data": {"calories": 150.0, "protein": 6.0, "carbohydrates": 15.0, "fat": 4.0},
+                        "recorded_at": day_start + timedelta(hours=2),
+                        "meal_type": "lunch",
+                        "notes": "合成数据 [来自食谱: 番茄炒蛋]",
+                        "recipe_record_batch_id": batch_id,
+                    })
+            sports_log.append({
+                "created_by": email,
+                "sport_name": "运动0",
+                "sport_type": "有氧运动",
+                "duration_time": 30,
+                "calories_burned": 300.0,
+                "created_at": day_start + timedelta(hours=10),
+            })
+            weight_records.append({
+                "user_email": email,
+                "weight": 70.0 - day * 0.05,
+                "recorded_at": day_start + timedelta(hours=1),
+                "notes": None,
+                "created_at": day_start + timedelta(hours=1),
+            })
+    food_record_ids = db.food_records.insert_many(food_records).inserted_ids
+    sports_log_ids = db.sports_log.insert_many(sports_log).inserted_ids
+    weight_record_ids = db.weight_records.insert_many(weight_records).inserted_ids
+    db.popularity_counters.insert_many([
+        {
+            "kind": kind,
+            "scope": scope,
+            "item_id": str(food_id),
+            "score": float(i + 1),
+            "count": i + 1,
+            "name": f"热门条目{i}",
+            "last_logged_at": now,
+        }
+        for kind in (popularity_service.FOOD, popularity_service.RECIPE)
+        for scope in (popularity_service.GLOBAL_SCOPE, USER) + OTHER_USERS
+        for i, food_id in enumerate(food_ids)
+    ])
+
+    for collection, keys, options in app_database.INDEXES:
+        db[collection].create_index(keys, **options)
+
+    # 被测用户的数据排在各自列表最前面
+    return {
+        "food_id": str(food_ids[3]),
+        "barcode": foods[3]["barcode"],
+        "recipe_name_keyword": "食谱",
+        "food_record_id": str(food_record_ids[0]),
+        "batch_ids": [f"{USER}-batch-0", f"{USER}-batch-6"],
+        "sports_log_id": str(sports_log_ids[0]),
+        "weight_record_id": str(weight_record_ids[0]),
+        "start_date": (first_day + timedelta(days=SEED_DAYS - 30)).date(),
+        "end_date": now.date(),
+    }
+
+
+@pytest.fixture(scope="module")
+def plan_database():
+    """独立的查询计划测试库（模块结束时删除）"""
+    sync_client = MongoClient(settings.MONGODB_URL, serverSelectionTimeoutMS=1000)
+    try:
+        sync_client.admin.command("ping")
+    except Exception:
+        sync_client.close()
+        pytest.skip("未连接到 MongoDB，跳过查询计划测试")
+
+    sync_client.drop_database(PLAN_DATABASE_NAME)
+    db = sync_client[PLAN_DATABASE_NAME]
+    seed = _seed(db)
+    try:
+        yield db, seed
+    finally:
+        sync_client.drop_database(PLAN_DATABASE_NAME)
+        sync_client.close()
+
+
+async def _capture_commands(scenario, seed: Dict[str, Any]) -> List[Tuple[str, dict]]:
+    """把服务层切换到测试库运行场景，返回期间发出的查询命令"""
+    listener = _CommandCapture(PLAN_DATABASE_NAME)
+    client = AsyncIOMotorClient(settings.MONGODB_URL, event_listeners=[listener])
+    previous_database = app_database.database
+    app_database.database = client[PLAN_DATABASE_NAME]
+    try:
+        await scenario(seed)
+        # 等待后台写入的趋势变更标记，它们的查询同样需要检查
+        if trend_change_service._pending:
+            await asyncio.gather(*list(trend_change_service._pending))
+    finally:
+        app_database.database = previous_database
+        client.close()
+    return listener.commands
+
+
+def _find_equivalents(command_name: str, command: dict) -> List[Tuple[str, Optional[dict]]]:
+    """
+    把命令换算为等价的 find 参数（filter / sort / skip / limit）
+
+    Returns:
+        [(集合名, find 参数)]；聚合管道不以 $match 开头时 find 参数为 None
+    """
+    collection = command[command_name]
+    if command_name == "find":
+        return [(collection, {key: command[key] for key in ("filter", "sort", "skip", "limit") if key in command})]
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline") or []
+        if not pipeline or "$match" not in pipeline[0]:
+            return [(collection, None)]
+        spec = {"filter": pipeline[0]["$match"]}
+        for stage in pipeline[1:]:
+            if "$sort" in stage:
+                spec["sort"] = stage["$sort"]
+            elif "$limit" in stage:
+                spec["limit"] = stage["$limit"]
+            else:
+                break
+        return [(collection, spec)]
+    if command_name in ("count", "distinct"):
+        return [(collection, {"filter": command.get("query") or {}})]
+    if command_name == "findAndModify":
+        spec = {"filter": command.get("query") or {}}
+        if command.get("sort"):
+            spec["sort"] = command["sort"]
+        return [(collection, spec)]
+    if command_name == "update":
+        return [(collection, {"filter": update["q"]}) for update in command.get("updates", [])]
+    return [(collection, {"filter": delete["q"]}) for delete in command.get("deletes", [])]
+
+
+def _plan_stages(node) -> List[str]:
+    """递归收集执行计划中的所有 stage"""
+    stages = []
+    if isinstance(node, dict):
+        if isinstance(node.get("stage"), str):
+            stages.append(node["stage"])
+        for value in node.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(node, list):
+        for value in node:
+            stages.extend(_plan_stages(value))
+    return stages
+
+
+def _uses_regex(node) -> bool:
+    """
+    筛选条件是否包含 $regex
+
+    不以 ^ 开头、忽略大小写的正则无法转换为索引区间，只能在创建者等前缀条件命中的文档中逐个匹配，
+    这类关键词搜索由前缀条件和 limit 限定范围，不检查检查文档比例（仍然禁止 COLLSCAN）。
+    """
+    if isinstance(node, dict):
+        return "$regex" in node or any(_uses_regex(value) for value in node.values())
+    if isinstance(node, list):
+        return any(_uses_regex(value) for value in node)
+    return False
+
+
+def _check_plans(db, commands: List[Tuple[str, dict]]) -> List[str]:
+    """对捕获的命令执行 explain，返回不符合要求的查询说明"""
+    failures = []
+    for command_name, command in commands:
+        if command.get("comment") in INTENTIONAL_SCAN_COMMENTS:
+            continue
+        for collection, spec in _find_equivalents(command_name, command):
+            if spec is None:
+                failures.append(f"{collection} {command_name}: 聚合管道没有以 $match 开头，会扫描整个集合")
+                continue
+            explain = db.command({"explain": {"find": collection, **spec}, "verbosity": "executionStats"})
+            description = f"{collection} {command_name} {spec}"
+
+            stages = _plan_stages(explain["queryPlanner"]["winningPlan"])
+            if "COLLSCAN" in stages:
+                failures.append(f"{description}: 使用了 COLLSCAN")
+                continue
+
+            stats = explain["executionStats"]
+            examined, returned = stats["totalDocsExamined"], stats["nReturned"]
+            if not _uses_regex(spec["filter"]) and examined > MAX_DOCS_EXAMINED_RATIO * max(returned, 1):
+                failures.append(f"{description}: 检查 {examined} 个文档，只返回 {returned} 个")
+    return failures
+
+
+async def _food_scenario(seed):
+    await food_service.get_food_by_id(seed["food_id"])
+    await food_service.get_food_by_barcode(seed["barcode"])
+    await food_service.search_local_foods_only("公共食物1", USER, limit=20)
+    await food_service.search_local_foods_only(None, USER, limit=20)
+    await food_service.match_local_foods_by_names(["公共食物3", "不存在的食物"], USER)
+    await food_service.get_food_records(USER, limit=20)
+    await food_service.get_food_records(USER, seed["start_date"], seed["end_date"], limit=100)
+    await food_service.get_daily_nutrition_summary(USER, seed["end_date"])
+    await food_service.delete_food_record(seed["food_record_id"], USER)
+    await quick_log_service.record_item(USER, quick_log_service.FOOD, seed["food_id"], "公共食物3", serving_amount=1.0)
+    await quick_log_service.get_quick_items(USER)
+    await food_service.copy_food_records(USER, seed["start_date"], seed["end_date"])
+
+
+async def _recipe_scenario(seed):
+    await recipe_service.search_recipes(user_email=USER, limit=20)
+    await recipe_service.search_recipes(category=RECIPE_CATEGORIES[0], user_email=USER, limit=20)
+    await recipe_service.search_recipes(keyword=seed["recipe_name_keyword"], user_email=USER, limit=20)
+    await recipe_service.get_recipe_categories(USER)
+    await recipe_service.search_recipe_by_name(USER, seed["recipe_name_keyword"], limit=10)
+    await recipe_service.get_recipe_records(USER, seed["start_date"], seed["end_date"])
+    await recipe_service.get_recipe_records(USER)
+    await recipe_service.update_recipe_record(USER, seed["batch_ids"][0], meal_type="dinner")
+    await recipe_service.delete_recipe_record(USER, seed["batch_ids"][1])
+
+
+async def _popularity_scenario(seed):
+    await popularity_service.record_logs(USER, popularity_service.FOOD, [(seed["food_id"], "公共食物3")])
+    await popularity_service.top_items(popularity_service.FOOD, USER, limit=20)
+    await popularity_service.top_items(popularity_service.RECIPE, popularity_service.GLOBAL_SCOPE, limit=20)
+    await popularity_service.get_counts(popularity_service.FOOD, USER, [seed["food_id"]])
+
+
+async def _sports_scenario(seed):
+    await sports_service.get_available_sports(USER)
+    await sports_service.search_sports_record(
+        SearchSportRecordsRequest(start_date=seed["start_date"], end_date=seed["end_date"]), USER
+    )
+    await sports_service.search_sports_record(SearchSportRecordsRequest(), USER)
+    await sports_service.generate_sports_report(USER)
+    await sports_service.delete_sports_record(seed["sports_log_id"], USER)
+
+
+async def _weight_scenario(seed):
+    await weight_service.get_weight_records(USER, limit=20)
+    await weight_service.get_weight_records(USER, seed["start_date"], seed["end_date"])
+    await weight_service.get_weight_series(USER, seed["start_date"], seed["end_date"], points=20)
+    await weight_service.get_weight_record_by_id(seed["weight_record_id"], USER)
+    await weight_service.create_weight_record(
+        USER, WeightRecordCreateRequest(weight=68.5, recorded_at=datetime.utcnow())
+    )
+    await weight_service.delete_weight_record(seed["weight_record_id"], USER)
+
+
+async def _visualization_scenario(seed):
+    await visualization_service.get_daily_calorie_summary(USER, seed["end_date"])
+    await visualization_service.get_nutrition_analysis(USER, seed["start_date"], seed["end_date"])
+    for view_type in ("day", "week", "month"):
+        await visualization_service.get_time_series_trend(
+            USER, seed["start_date"], seed["end_date"], view_type=view_type
+        )
+    await visualization_service.export_health_report(USER, seed["start_date"], seed["end_date"])
+
+
+SCENARIOS = {
+    "food_service": _food_scenario,
+    "recipe_service": _recipe_scenario,
+    "popularity_service": _popularity_scenario,
+    "sports_service": _sports_scenario,
+    "weight_service": _weight_scenario,
+    "visualization_service": _visualization_scenario,
+}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("service", list(SCENARIOS))
+async def test_service_query_plans(plan_database, service):
+    """测试服务层的每条查询都走索引，且检查的文档数不超过返回文档数的 MAX_DOCS_EXAMINED_RATIO 倍"""
+    db, seed = plan_database
+    commands = await _capture_commands(SCENARIOS[service], seed)
+    assert commands, f"{service} 场景没有发出任何查询"
+
+    failures = _check_plans(db, commands)
+    assert not failures, "\n".join(failures)
+
+
+def test_find_equivalents_of_captured_commands():
+    """测试把各类命令换算为等价 find 的规则（不需要数据库）"""
+    pipeline = [
+        {"$match": {"user_email": USER}},
+        {"$sort": {"recorded_at": -1}},
+        {"$group": {"_id": None, "total": {"$sum": 1}}},
+    ]
+    assert _find_equivalents("aggregate", {"aggregate": "food_records", "pipeline": pipeline}) == [
+        ("food_records", {"filter": {"user_email": USER}, "sort": {"recorded_at": -1}})
+    ]
+    assert _find_equivalents("aggregate", {"aggregate": "food_records", "pipeline": [{"$group": {"_id": None}}]}) == [
+        ("food_records", None)
+    ]
+    assert _find_equivalents(
+        "update", {"update": "trend_changes", "updates": [{"q": {"day": None}, "u": {}}, {"q": {"day": 1}, "u": {}}]}
+    ) == [("trend_changes", {"filter": {"day": None}}), ("trend_changes", {"filter": {"day": 1}})]
+    assert _find_equivalents("distinct", {"distinct": "recipes", "key": "category", "query": {"created_by": "all"}}) == [
+        ("recipes", {"filter": {"created_by": "all"}})
+    ]
+    assert _uses_regex({"$and": [{"created_by": USER}, {"$or": [{"name": {"$regex": "米", "$options": "i"}}]}]})
+    assert not _uses_regex({"user_email": USER, "recorded_at": {"$gte": datetime(2024, 1, 1)}})
+    assert _plan_stages({"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}) == ["FETCH", "IXSCAN"]
@@ -321,6 +321,42 @@ async def test_log_sports_with_past_time(auth_client):
     assert response.json()["success"] is True
 
 
+@pytest.mark.asyncio
+async def test_log_sports_records_batch(auth_client):
+    """测试批量记录运动：逐条返回结果，无效记录不影响其他记录"""
+    base_time = datetime.utcnow() - timedelta(days=2)
+    batch_data = {
+        "records": [
+            {"sport_name": "慢走 3km/h", "created_at": base_time.isoformat(), "duration_time": 30},
+            {"sport_name": "快走 5km/h", "created_at": (base_time + timedelta(hours=1)).isoformat(), "duration_time": 20},
+            {"sport_name": "不存在的运动", "created_at": base_time.isoformat(), "duration_time": 10},
+            {"sport_name": "慢走 3km/h", "created_at": base_time.isoformat()},
+        ]
+    }
+
+    response = await auth_client.post("/api/sports/log/batch", json=batch_data)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 4
+    assert data["success_count"] == 2
+    assert data["failed_count"] == 2
+    assert [item["success"] for item in data["results"]] == [True, True, False, False]
+    assert data["results"][0]["record_id"]
+    assert data["results"][0]["calories_burned"] > 0
+
+    # 清理
+    for item in data["results"]:
+        if item["success"]:
+            await auth_client.delete(f"/api/sports/delete-sport-record/{item['record_id']}")
+
+
+@pytest.mark.asyncio
+async def test_log_sports_records_batch_empty(auth_client):
+    """测试批量记录运动：空列表被拒绝"""
+    response = await auth_client.post("/api/sports/log/batch", json={"records": []})
+    assert response.status_code == 422
+
+
 # ================== 测试：查询运动记录 ==================
 
 @pytest.mark.asyncio
@@ -693,3 +729,26 @@ async def test_complete_workflow(auth_client):
     assert delete_sport_response.status_code == 200
     delete_sport_response = await auth_client.delete(f"/api/sports/delete-sport/{new_sport_type}")
     assert delete_sport_response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_log_sports_records_batch_requires_user_weight(monkeypatch, fake_db):
+    """测试批量记录运动：用户未设置体重时与单条接口一致返回 422，而不是计算卡路里时出错"""
+    from fastapi import HTTPException
+    from app.schemas.sports import LogSportsRequest
+    from app.services import sports_service
+
+    fake_db["sports"].find_results = [{"sport_name": "慢走 3km/h", "sport_type": "有氧运动", "METs": 2.8}]
+
+    async def no_weight(email):
+        return None
+
+    monkeypatch.setattr(sports_service, "get_database", lambda: fake_db)
+    monkeypatch.setattr(sports_service, "get_user_weight", no_weight)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await sports_service.log_sports_records_batch(
+            [LogSportsRequest(sport_name="慢走 3km/h", duration_time=30)], "no-weight@example.com"
+        )
+    assert exc_info.value.status_code == 422
+    assert "insert_many" not in fake_db["sports_log"].methods()  # 未设置体重时不应写入记录
@@ -10,7 +10,9 @@ sys.path.insert(0, backend_path)
 
 import pytest
 from httpx import AsyncClient
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+import asyncio
 import pytest_asyncio
 
 # ========== Fixtures ==========
@@ -197,6 +199,52 @@ async def test_time_series_trend_month_view(async_client: AsyncClient, auth_head
     assert data["view_type"] == "month"
 
 
+@pytest.mark.asyncio
+async def test_time_series_trend_since_returns_changed_buckets(async_client: AsyncClient, auth_headers: dict):
+    """测试时间序列趋势增量刷新（since 水位线）"""
+    end_date = datetime.utcnow().date()
+    start_date = end_date - timedelta(days=30)
+    url = (
+        f"/api/visualization/time-series-trend?start_date={start_date.isoformat()}"
+        f"&end_date={end_date.isoformat()}&view_type=day"
+    )
+
+    response = await async_client.get(url, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["changed_buckets"] is None
+    watermark = data["watermark"]
+
+    # 新增一条 20 天前的体重记录
+    # 发送带时区的 UTC 时间（不带时区的时间会被视为用户本地时间）
+    recorded_at = datetime.now(timezone.utc) - timedelta(days=20)
+    # 分组按用户时区（测试用户未设置时区，使用默认时区）的本地日期
+    bucket = recorded_at.astimezone(ZoneInfo(settings.DEFAULT_TIMEZONE)).date().isoformat()
+    create_response = await async_client.post(
+        "/api/user/weight-record",
+        json={"weight": 66.6, "recorded_at": recorded_at.isoformat()},
+        headers=auth_headers
+    )
+    assert create_response.status_code == 201
+    record_id = create_response.json()["id"]
+    await asyncio.sleep(0.2)  # 变更标记在后台写入
+
+    response = await async_client.get(url, params={"since": watermark}, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert bucket in data["changed_buckets"]
+    assert any(point["date"] == bucket for point in data["weight_trend"])
+    # 只返回有变更的分组
+    assert {point["date"] for point in data["intake_trend"]} <= set(data["changed_buckets"])
+
+    # 删除后该分组仍会出现在 changed_buckets 中
+    await async_client.delete(f"/api/user/weight-record/{record_id}", headers=auth_headers)
+    await asyncio.sleep(0.2)
+    response = await async_client.get(url, params={"since": watermark}, headers=auth_headers)
+    data = response.json()
+    assert bucket in data["changed_buckets"]
+
+
 @pytest.mark.asyncio
 async def test_time_series_trend_invalid_view_type(async_client: AsyncClient, auth_headers: dict):
     """测试无效的视图类型"""
@@ -254,6 +302,52 @@ async def test_export_report(async_client: AsyncClient, auth_headers: dict):
     assert summary["days_count"] == expected_days
 
 
+@pytest.mark.asyncio
+async def test_export_job_csv(async_client: AsyncClient, auth_headers: dict):
+    """测试异步导出任务（创建、查询进度、下载文件）"""
+    end_date = date.today()
+    start_date = end_date - timedelta(days=30)
+
+    response = await async_client.post(
+        "/api/visualization/export-jobs",
+        json={"start_date": start_date.isoformat(), "end_date": end_date.isoformat(), "format": "csv"},
+        headers=auth_headers
+    )
+    assert response.status_code == 202, response.text
+    job = response.json()
+    assert job["status"] in ("pending", "running", "completed")
+
+    for _ in range(60):
+        response = await async_client.get(f"/api/visualization/export-jobs/{job['id']}", headers=auth_headers)
+        assert response.status_code == 200
+        job = response.json()
+        if job["status"] in ("completed", "failed"):
+            break
+        await asyncio.sleep(0.5)
+
+    assert job["status"] == "completed", job.get("error")
+    assert job["progress"] == 100.0
+    assert job["download_url"]
+
+    response = await async_client.get(job["download_url"], headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    header = response.content.decode("utf-8-sig").splitlines()[0]
+    assert header.startswith("record_type,time,name")
+    assert len(response.content.decode("utf-8-sig").splitlines()) == job["rows_written"] + 1
+
+
+@pytest.mark.asyncio
+async def test_export_job_invalid_format(async_client: AsyncClient, auth_headers: dict):
+    """测试导出任务格式校验"""
+    response = await async_client.post(
+        "/api/visualization/export-jobs",
+        json={"start_date": "2025-11-01", "end_date": "2025-11-23", "format": "xlsx"},
+        headers=auth_headers
+    )
+    assert response.status_code == 400
+
+
 @pytest.mark.asyncio
 async def test_visualization_requires_authentication(async_client: AsyncClient):
     """测试可视化 API 需要认证"""
@@ -267,3 +361,28 @@ async def test_visualization_requires_authentication(async_client: AsyncClient):
     for endpoint in endpoints:
         response = await async_client.get(endpoint)
         assert response.status_code in [401, 403], f"Endpoint {endpoint} should require authentication (got {response.status_code})"
+
+
+def test_day_boundary_windows_follow_user_timezone():
+    """测试本地日期换算为 UTC 时间窗口，以及记录时间换算回本地日期"""
+    from datetime import date, datetime
+    from app.services import day_boundary_service
+
+    start, end = day_boundary_service.day_window(date(2025, 1, 1), date(2025, 1, 1), "Asia/Shanghai")
+    assert (start, end) == (datetime(2024, 12, 31, 16), datetime(2025, 1, 1, 16))
+    assert day_boundary_service.time_range_filter(None, date(2025, 7, 1), "America/New_York") == {
+        "$lt": datetime(2025, 7, 2, 4)
+    }
+    # UTC 17:00 在上海已是次日
+    assert day_boundary_service.local_date(datetime(2025, 1, 1, 17), "Asia/Shanghai") == date(2025, 1, 2)
+    expression = day_boundary_service.date_to_string("recorded_at", "%Y-%m-%d", "Asia/Shanghai")
+    assert expression["$dateToString"]["timezone"] == "Asia/Shanghai"
+    assert not day_boundary_service.is_valid_timezone("Mars/Olympus")
+
+    # 写入时：不带时区的请求时间视为本地时间，带时区的按其自身时区换算
+    from datetime import timezone
+    assert day_boundary_service.input_to_utc(datetime(2025, 1, 1, 20), "Asia/Shanghai") == datetime(2025, 1, 1, 12)
+    assert day_boundary_service.input_to_utc(
+        datetime(2025, 1, 1, 20, tzinfo=timezone.utc), "Asia/Shanghai"
+    ) == datetime(2025, 1, 1, 20)
+    assert day_boundary_service.input_to_utc(None, "Asia/Shanghai") is None
@@ -77,6 +77,30 @@ async def test_create_weight_record(auth_client):
     test_record_id = data["id"]
 
 
+# ================== 测试：补录较早的体重记录不覆盖当前体重 ==================
+@pytest.mark.asyncio
+async def test_backdated_weight_record_keeps_current_weight(auth_client):
+    """测试补录更早时间的体重记录时，用户当前体重保持为最新记录的体重"""
+    latest = await auth_client.post(
+        "/api/user/weight-record",
+        json={"weight": 68.2, "recorded_at": datetime.utcnow().isoformat()}
+    )
+    assert latest.status_code == 201
+    backdated = await auth_client.post(
+        "/api/user/weight-record",
+        json={"weight": 80.0, "recorded_at": (datetime.utcnow() - timedelta(days=30)).isoformat()}
+    )
+    assert backdated.status_code == 201
+
+    profile = await auth_client.get("/api/user/profile")
+    assert profile.status_code == 200
+    assert profile.json()["weight"] == 68.2
+
+    # 清理
+    await auth_client.delete(f"/api/user/weight-record/{backdated.json()['id']}")
+    await auth_client.delete(f"/api/user/weight-record/{latest.json()['id']}")
+
+
 # ================== 测试：创建体重记录 - 无效数据 ==================
 @pytest.mark.asyncio
 async def test_create_weight_record_invalid_data(auth_client):
@@ -176,6 +200,45 @@ async def test_get_weight_records_with_date_range(auth_client):
     assert data["records"][0]["weight"] == 71.0
 
 
+# ================== 测试：降采样体重曲线 ==================
+@pytest.mark.asyncio
+async def test_get_weight_series(auth_client):
+    """测试体重曲线降采样、滑动平均与趋势"""
+    get_response = await auth_client.get("/api/user/weight-records?limit=500")
+    if get_response.status_code == 200:
+        for record in get_response.json().get("records", []):
+            await auth_client.delete(f"/api/user/weight-record/{record['id']}")
+
+    # 12 天内体重每天下降 0.1 公斤
+    start = datetime.utcnow() - timedelta(days=11)
+    for day in range(12):
+        await auth_client.post(
+            "/api/user/weight-record",
+            json={
+                "weight": round(72.0 - day * 0.1, 1),
+                "recorded_at": (start + timedelta(days=day)).isoformat(),
+            }
+        )
+
+    response = await auth_client.get("/api/user/weight-records/series?points=5&window_days=3")
+    assert response.status_code == 200, f"查询失败: {response.text}"
+    data = response.json()
+    assert data["total"] == 12
+    assert data["downsampled"] is True
+    assert len(data["points"]) == 5
+    # 首尾点始终保留
+    assert data["points"][0]["weight"] == 72.0
+    assert data["points"][-1]["weight"] == 70.9
+    assert data["points"][-1]["moving_average"] == pytest.approx(71.0, abs=0.01)
+    assert data["trend"]["slope_per_week"] == pytest.approx(-0.7, abs=0.01)
+
+    # 点数不超过目标时原样返回
+    response = await auth_client.get("/api/user/weight-records/series?points=100")
+    data = response.json()
+    assert data["downsampled"] is False
+    assert len(data["points"]) == 12
+
+
 # ================== 测试：更新体重记录 ==================
 @pytest.mark.asyncio
 async def test_update_weight_record(auth_client):